@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Réglage automatique de l'échelle de détection et de la fréquence de traitement
+La latence mesurée de chaque détection fixe l'intervalle entre deux détections
+pour tenir le FPS visé ; la taille des visages trouvés fixe l'échelle.
+"""
+import math
+
+# Valeurs par défaut de recognition.adaptive
+DEFAULT_ADAPTIVE_SETTINGS = {
+    "enabled": True,
+    "target_fps": 15,          # FPS de sortie visé
+    "cpu_budget": 0.5,         # Part du temps d'une frame accordée à la reconnaissance
+    "min_scale": 0.25,         # Échelle de détection minimale
+    "max_scale": 1.0,          # Échelle de détection maximale
+    "scale_step": 0.125,       # Pas d'ajustement de l'échelle
+    "min_interval": 1,         # Traiter au plus une frame sur 1...
+    "max_interval": 10,        # ... et au moins une frame sur 10
+    "min_face_pixels": 80      # Taille minimale d'un visage (px) à l'échelle de détection
+}
+
+
+class AdaptiveController:
+    """Contrôleur rétroactif échelle / intervalle de traitement"""
+
+    def __init__(self, scale=0.5, interval=3, settings=None):
+        """
+        Args:
+            scale: Échelle de départ
+            interval: Intervalle de départ (traiter une frame sur N)
+            settings: Paramètres recognition.adaptive (complétés par les défauts)
+        """
+        self.settings = dict(DEFAULT_ADAPTIVE_SETTINGS)
+        self.settings.update(settings or {})
+
+        self.scale = self._clamp_scale(scale)
+        self.interval = self._clamp_interval(interval)
+
+        # Moyennes glissantes des mesures
+        self.latency = None        # Durée d'une reconnaissance (s)
+        self.smallest_face = None  # Plus petit visage trouvé (px, image d'origine)
+
+    @classmethod
+    def from_config(cls, config, scale=0.5, interval=3):
+        """
+        Crée le contrôleur depuis recognition.adaptive
+
+        Returns:
+            AdaptiveController, ou None si le réglage automatique est désactivé
+        """
+        settings = dict(DEFAULT_ADAPTIVE_SETTINGS)
+        settings.update(config.get("recognition", "adaptive") or {})
+
+        if not settings["enabled"]:
+            return None
+
+        return cls(scale, interval, settings)
+
+    def observe(self, latency, face_sizes):
+        """
+        Intègre la mesure d'une reconnaissance et ajuste échelle et intervalle
+
+        Args:
+            latency: Durée (s) de la détection + encodage
+            face_sizes: Hauteurs des visages trouvés (px, image d'origine)
+        """
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+        if face_sizes:
+            smallest = min(face_sizes)
+            self.smallest_face = (
+                smallest if self.smallest_face is None
+                else 0.7 * self.smallest_face + 0.3 * smallest
+            )
+
+        # Intervalle : la reconnaissance ne doit pas dépasser sa part du budget
+        frame_budget = self.settings["cpu_budget"] / self.settings["target_fps"]
+        required = math.ceil(self.latency / frame_budget) if frame_budget > 0 else self.settings["max_interval"]
+        self.interval = self._clamp_interval(required)
+
+        step = self.settings["scale_step"]
+        min_pixels = self.settings["min_face_pixels"]
+
+        if face_sizes and self.smallest_face * self.scale < min_pixels:
+            # Visages trop petits pour le détecteur : augmenter l'échelle
+            self.scale = self._clamp_scale(self.scale + step)
+        elif required > self.settings["max_interval"]:
+            # Budget dépassé même à l'intervalle maximal : réduire l'échelle,
+            # sans descendre sous la taille détectable des visages observés
+            reduced = self._clamp_scale(self.scale - step)
+            if self.smallest_face is None or self.smallest_face * reduced >= min_pixels * 1.2:
+                self.scale = reduced
+
+    def status(self):
+        """Réglages courants (pour l'API de statut)"""
+        return {
+            "scale": round(self.scale, 3),
+            "process_every_n_frames": self.interval,
+            "detection_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "smallest_face": round(self.smallest_face) if self.smallest_face is not None else None,
+            "target_fps": self.settings["target_fps"]
+        }
+
+    def _clamp_scale(self, scale):
+        return min(self.settings["max_scale"], max(self.settings["min_scale"], scale))
+
+    def _clamp_interval(self, interval):
+        return int(min(self.settings["max_interval"], max(self.settings["min_interval"], interval)))
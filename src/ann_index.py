@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Index approximatif (IVF) pour les grandes galeries
+Quantificateur grossier k-means en NumPy pur + reclassement exact des candidats
+"""
+import logging
+import math
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "ivf.npz"
+
+# Valeurs par défaut de recognition.index
+DEFAULT_INDEX_SETTINGS = {
+    "type": "centroid",   # "exact", "centroid" (préfiltre exact) ou "ivf" (approximatif)
+    "nlist": 0,           # Nombre de listes (0 = automatique, ~4 x sqrt(N))
+    "nprobe": 8,          # Listes explorées par requête
+    "min_size": 10000     # En dessous, le parcours exact reste plus rapide
+}
+
+
+class IVFIndex:
+    """Index à listes inversées : chaque encoding est rangé sous son centroïde le plus proche"""
+
+    def __init__(self, centroids, assignments, generation=None):
+        """
+        Args:
+            centroids: Centroïdes k-means (nlist x 128)
+            assignments: Liste de rattachement de chaque ligne de la galerie
+            generation: Génération de la galerie indexée
+        """
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.assignments = np.asarray(assignments, dtype=np.int32)
+        self.generation = generation
+
+        self._centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+        # Listes inversées au format CSR : lignes triées par liste + offsets
+        self._order = np.argsort(self.assignments, kind='stable').astype(np.int32)
+        counts = np.bincount(self.assignments, minlength=len(self.centroids))
+        self._offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def __len__(self):
+        return len(self.assignments)
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, encodings, nlist=0, iterations=10, seed=0, generation=None):
+        """
+        Entraîne le quantificateur et range toute la galerie
+
+        Args:
+            encodings: Encodings de la galerie (N x 128)
+            nlist: Nombre de listes (0 = automatique)
+            iterations: Itérations de k-means
+            seed: Graine pour l'initialisation
+            generation: Génération de la galerie indexée
+        """
+        encodings = np.asarray(encodings, dtype=np.float32)
+        count = len(encodings)
+
+        if not nlist:
+            nlist = int(4 * math.sqrt(count))
+        nlist = max(1, min(nlist, count))
+
+        rng = np.random.default_rng(seed)
+
+        # Entraînement sur un sous-échantillon (256 points par liste suffisent)
+        sample_size = min(count, 256 * nlist)
+        sample = encodings[np.sort(rng.choice(count, sample_size, replace=False))]
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = _nearest(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+            non_empty = counts > 0
+            sums = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+            centroids[non_empty] = sums / counts[non_empty, None]
+
+            # Listes vides : réinitialiser sur des points aléatoires
+            empty = np.flatnonzero(~non_empty)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+
+        return cls(centroids, _nearest(encodings, centroids), generation=generation)
+
+    def extended(self, encodings):
+        """
+        Range les lignes ajoutées depuis la construction (sans réentraîner)
+
+        Args:
+            encodings: Galerie complète, dont les len(self) premières lignes sont déjà indexées
+
+        Returns:
+            Nouvel IVFIndex (l'index courant n'est pas modifié)
+        """
+        delta = np.asarray(encodings[len(self):], dtype=np.float32)
+        if len(delta) == 0:
+            return self
+
+        assignments = np.concatenate((self.assignments, _nearest(delta, self.centroids)))
+        return IVFIndex(self.centroids, assignments, generation=self.generation)
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def search(self, queries, matcher):
+        """
+        Plus proche voisin approximatif avec reclassement exact
+
+        Les distances renvoyées sont exactes (même calcul que le parcours complet) :
+        la tolérance garde donc la même signification, seul le rappel peut baisser
+        si le vrai plus proche voisin est dans une liste non explorée.
+
+        Args:
+            queries: Encodings des visages détectés (M x 128)
+            matcher: FaceMatcher propriétaire (galerie, normes et nprobe)
+
+        Returns:
+            Tuple (index du meilleur voisin, distance) ; -1 / inf sans candidat
+        """
+        encodings = matcher.encodings
+        squared_norms = matcher.squared_norms
+        nprobe = max(1, min(matcher.nprobe, self.nlist))
+
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        coarse = query_norms[:, None] + self._centroid_norms[None, :] - 2.0 * (queries @ self.centroids.T)
+        probes = np.argpartition(coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        best_indices = np.full(len(queries), -1, dtype=np.int64)
+        best_distances = np.full(len(queries), np.inf, dtype=np.float32)
+
+        for i, query in enumerate(queries):
+            candidates = np.concatenate([
+                self._order[self._offsets[probe]:self._offsets[probe + 1]]
+                for probe in probes[i]
+            ])
+            if len(candidates) == 0:
+                continue
+
+            squared = query_norms[i] + squared_norms[candidates] - 2.0 * (encodings[candidates] @ query)
+            best = int(squared.argmin())
+            best_indices[i] = candidates[best]
+            best_distances[i] = math.sqrt(max(float(squared[best]), 0.0))
+
+        return best_indices, best_distances
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Sauvegarde l'index (npz sans pickle)"""
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            assignments=self.assignments,
+            generation=np.array(self.generation or "")
+        )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Charge un index sauvegardé"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["centroids"],
+                data["assignments"],
+                generation=str(data["generation"]) or None
+            )
+
+
+def _nearest(points, centroids, chunk_size=8192):
+    """Index du centroïde le plus proche de chaque point (par blocs pour limiter la mémoire)"""
+    centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+    result = np.empty(len(points), dtype=np.int32)
+
+    for start in range(0, len(points), chunk_size):
+        block = points[start:start + chunk_size]
+        # ||c||² - 2 p·c suffit pour l'argmin (||p||² est constant par ligne)
+        scores = centroid_norms[None, :] - 2.0 * (block @ centroids.T)
+        result[start:start + chunk_size] = scores.argmin(axis=1)
+
+    return result
+
+
+def index_settings(config):
+    """Paramètres recognition.index complétés par les valeurs par défaut"""
+    settings = dict(DEFAULT_INDEX_SETTINGS)
+    settings.update(config.get("recognition", "index") or {})
+    return settings
+
+
+def load_or_build(snapshot, directory, settings, previous=None):
+    """
+    Fournit l'index IVF d'un snapshot de galerie
+
+    Ordre de préférence : extension de l'index précédent (ajout seul), index
+    persisté à côté de la galerie, puis reconstruction complète.
+
+    Args:
+        snapshot: GallerySnapshot à indexer
+        directory: Dossier de la galerie (l'index est stocké dans ivf.npz)
+        settings: Paramètres recognition.index
+        previous: Index du matcher précédent
+
+    Returns:
+        IVFIndex, ou None si la galerie est trop petite pour en profiter
+    """
+    if settings["type"] != "ivf" or snapshot.count < settings["min_size"]:
+        return None
+
+    path = Path(directory) / INDEX_FILENAME
+    index = None
+
+    if previous is not None and previous.generation == snapshot.generation \
+            and len(previous) <= snapshot.count:
+        index = previous
+    elif path.exists():
+        try:
+            stored = IVFIndex.load(path)
+            if stored.generation == snapshot.generation and len(stored) <= snapshot.count:
+                index = stored
+        except Exception as e:
+            logger.warning(f"⚠️  Index IVF illisible, reconstruction: {e}")
+
+    if index is None:
+        logger.info(f"🧭 Construction de l'index IVF ({snapshot.count} encodings)...")
+        index = IVFIndex.build(snapshot.encodings, nlist=settings["nlist"], generation=snapshot.generation)
+    elif len(index) == snapshot.count:
+        return index
+    else:
+        index = index.extended(snapshot.encodings)
+
+    try:
+        index.save(path)
+    except OSError as e:
+        logger.warning(f"⚠️  Impossible de sauvegarder l'index IVF: {e}")
+
+    logger.info(f"🧭 Index IVF prêt: {index.nlist} listes, {len(index)} encodings")
+    return index
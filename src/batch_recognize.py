@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Reconnaissance hors ligne sur des vidéos enregistrées
+Aucun affichage ni cadence temps réel : le décodage tourne dans un thread dédié,
+la reconnaissance (FacePipeline) traite les frames aussi vite que possible et
+chaque détection est écrite dans une chronologie JSONL ou CSV.
+"""
+import argparse
+import csv
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import cv2
+
+sys.path.append('.')
+from src.recognize_faces import Config, load_known_faces
+from src.face_pipeline import FacePipeline, process_batch
+from src.face_tracker import FaceTracker
+from src.motion_gate import MotionGate
+from src.recognition_pool import RecognitionPool
+from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de la section "batch"
+DEFAULT_BATCH_SETTINGS = {
+    "sample_fps": 5.0,         # Frames analysées par seconde de vidéo (0 = toutes)
+    "queue_size": 64,          # Frames décodées en avance au maximum
+    "encode_batch": 8,         # Frames encodées ensemble (sans pool de processus)
+    "result_timeout": 120.0,   # Attente maximale d'un résultat du pool (s)
+    "progress_interval": 10.0  # Secondes entre deux messages de progression
+}
+
+
+class VideoReader:
+    """Thread de décodage : frames échantillonnées avec leur temps dans la vidéo"""
+
+    def __init__(self, source, sample_fps=5.0, queue_size=64):
+        """
+        Args:
+            source: Fichier vidéo ou URL (RTSP, HTTP)
+            sample_fps: Frames conservées par seconde de vidéo (0 = toutes)
+            queue_size: Frames décodées en avance au maximum
+        """
+        self.source = source
+        self.sample_fps = sample_fps
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._running = False
+
+        self.fps = 0.0
+        self.frame_count = 0       # Frames annoncées par le conteneur (0 = inconnu, flux)
+        self.error = None
+
+        self.stats = {"decoded": 0, "skipped": 0}
+
+    def start(self):
+        """Ouvre la source et démarre le décodage"""
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            raise IOError(f"Impossible d'ouvrir la source vidéo {self.source}")
+
+        self.fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(capture,),
+                                        name=f"decode-{Path(str(self.source)).name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Interrompt le décodage (frames en attente abandonnées)"""
+        self._running = False
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def __iter__(self):
+        """Tuples (frame_index, temps en secondes, frame) jusqu'à la fin de la source"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+    def _run(self, capture):
+        """Boucle de décodage"""
+        # Échantillonnage : grab() seul pour les frames sautées (pas de conversion couleur)
+        step = 1
+        if self.sample_fps and self.fps > self.sample_fps:
+            step = max(1, int(round(self.fps / self.sample_fps)))
+
+        frame_index = 0
+        try:
+            while self._running:
+                if frame_index % step:
+                    if not capture.grab():
+                        break
+                    self.stats["skipped"] += 1
+                    frame_index += 1
+                    continue
+
+                success, frame = capture.read()
+                if not success:
+                    break
+
+                position = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if position <= 0 and self.fps:
+                    position = frame_index / self.fps
+
+                self.stats["decoded"] += 1
+                self._queue.put((frame_index, position, frame))
+                frame_index += 1
+
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"❌ Erreur de décodage {self.source}: {e}")
+
+        finally:
+            capture.release()
+            self._queue.put(None)
+
+
+class TimelineWriter:
+    """Chronologie des identités : JSONL (une frame par ligne) ou CSV (un visage par ligne)"""
+
+    CSV_FIELDS = ["source", "time", "frame", "name", "confidence", "track_id",
+                  "top", "right", "bottom", "left"]
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.format = "csv" if self.path.suffix.lower() == ".csv" else "jsonl"
+
+        self._file = open(self.path, 'w', newline='')
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.CSV_FIELDS)
+
+        self.rows = 0
+
+    def write(self, source, position, frame_index, results):
+        """Écrit les visages reconnus d'une frame"""
+        if self._csv is not None:
+            for result in results:
+                self._csv.writerow([
+                    source, f"{position:.3f}", frame_index, result['name'],
+                    f"{result['confidence']:.4f}", result['track_id'], *result['location']
+                ])
+            self.rows += len(results)
+            return
+
+        record = {
+            "source": source,
+            "time": round(position, 3),
+            "timestamp": format_position(position),
+            "frame": frame_index,
+            "faces": [
+                {
+                    "name": result['name'],
+                    "confidence": round(result['confidence'], 4),
+                    "track_id": result['track_id'],
+                    "location": list(result['location'])
+                }
+                for result in results
+            ]
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+
+def format_position(seconds):
+    """Temps dans la vidéo au format HH:MM:SS.mmm"""
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+
+def process_source(source, face_pipeline, face_matcher, timeline, settings, include_empty=False):
+    """
+    Analyse une vidéo complète
+
+    Returns:
+        Dict de statistiques (frames, durée vidéo, temps de calcul, vitesse)
+    """
+    reader = VideoReader(source, settings["sample_fps"], settings["queue_size"]).start()
+    face_pipeline.reset()
+    positions = {}
+
+    def write(frame_index, results):
+        if results or include_empty:
+            timeline.write(str(source), positions.pop(frame_index), frame_index, results)
+        else:
+            positions.pop(frame_index, None)
+
+    # Frames en attente d'un encodage groupé (chemin sans pool)
+    batch = []
+
+    last_result = time.monotonic()
+
+    def drain(timeout=0.0):
+        """Résultats rendus par le pool ; erreur si un worker est mort ou ne répond plus"""
+        nonlocal last_result
+        collected = face_pipeline.collect(face_matcher, timeout=timeout)
+
+        # Hors ligne, une frame perdue fausse la chronologie : pas de redémarrage silencieux
+        if face_pipeline.pool.stats["restarts"]:
+            raise RuntimeError("Un worker de reconnaissance s'est arrêté")
+
+        if collected:
+            last_result = time.monotonic()
+        elif face_pipeline.pool.depth:
+            if time.monotonic() - last_result > settings["result_timeout"]:
+                raise RuntimeError(f"Aucun résultat du pool depuis {settings['result_timeout']:.0f} s")
+
+        for index, results in collected:
+            write(index, results)
+
+    def flush():
+        jobs = [(face_pipeline, frame, index, at) for index, at, frame in batch]
+        for (index, _, _), results in zip(batch, process_batch(jobs, face_matcher)):
+            write(index, results)
+        batch.clear()
+
+    start = time.monotonic()
+    last_progress = start
+    position = 0.0
+    processed = 0
+
+    try:
+        for frame_index, position, frame in reader:
+            # Le temps de la vidéo sert d'horloge (suivi, mouvement) : pas de cadence réelle
+            if not face_pipeline.should_process(frame, frame_index, now=position):
+                continue
+
+            processed += 1
+            positions[frame_index] = position
+
+            if face_pipeline.pool is None:
+                # Détection frame par frame, encodage et appariement par lots
+                batch.append((frame_index, position, frame))
+                if len(batch) >= settings["encode_batch"]:
+                    flush()
+            else:
+                # Hors ligne, aucune frame n'est abandonnée : attendre une place libre
+                while face_pipeline.pool.depth >= face_pipeline.pool.max_pending:
+                    drain(timeout=0.5)
+                face_pipeline.submit(frame, frame_index, now=position)
+                drain()
+
+            now = time.monotonic()
+            if now - last_progress >= settings["progress_interval"]:
+                last_progress = now
+                done = f"/{reader.frame_count}" if reader.frame_count else ""
+                logger.info(f"⏩ {source}: frame {frame_index}{done} ({format_position(position)}), "
+                            f"x{position / (now - start):.1f} temps réel")
+
+        # Dernier lot et derniers résultats des workers
+        if batch:
+            flush()
+        while face_pipeline.pool is not None and face_pipeline.pool.depth:
+            drain(timeout=1.0)
+
+    finally:
+        reader.stop()
+
+    elapsed = time.monotonic() - start
+    return {
+        "source": str(source),
+        "analyzed_frames": processed,
+        "decoded_frames": reader.stats["decoded"],
+        "video_seconds": round(position, 1),
+        "elapsed_seconds": round(elapsed, 1),
+        "speed": round(position / elapsed, 1) if elapsed > 0 else None,
+        "error": reader.error
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Reconnaissance hors ligne sur des vidéos enregistrées")
+    parser.add_argument("sources", nargs="+", help="Fichiers vidéo ou URL (RTSP, HTTP)")
+    parser.add_argument("-o", "--output", default="logs/timeline.jsonl",
+                        help="Chronologie produite (.jsonl ou .csv)")
+    parser.add_argument("--sample-fps", type=float, help="Frames analysées par seconde de vidéo (0 = toutes)")
+    parser.add_argument("--scale", type=float, default=0.5, help="Échelle de détection")
+    parser.add_argument("--workers", type=int, help="Processus de reconnaissance (remplace recognition.pool.workers)")
+    parser.add_argument("--all-frames", action="store_true", help="Écrire aussi les frames sans visage")
+    parser.add_argument("--motion", action="store_true",
+                        help="Sauter les scènes immobiles (recognition.motion) ; la chronologie "
+                             "n'a alors pas de ligne pour les frames sautées")
+    args = parser.parse_args()
+
+    config = Config()
+
+    settings = dict(DEFAULT_BATCH_SETTINGS)
+    settings.update(config.get("batch") or {})
+    if args.sample_fps is not None:
+        settings["sample_fps"] = args.sample_fps
+
+    face_matcher = load_known_faces(logger, config)
+    if len(face_matcher) == 0:
+        logger.error("❌ Impossible de démarrer sans visages enregistrés")
+        return 1
+
+    if args.workers is not None:
+        recognition_pool = RecognitionPool(args.workers) if args.workers > 0 else None
+    else:
+        recognition_pool = RecognitionPool.from_config(config)
+
+    # Échelle fixe et toutes les frames échantillonnées : pas de contrôleur temps réel.
+    # Sans --motion, chaque frame échantillonnée a sa ligne, même dans une scène immobile
+    face_pipeline = FacePipeline(
+        FaceTracker.from_config(config),
+        scale=args.scale,
+        model=config.get("recognition", "model") or "hog",
+        roi=config.get("recognition", "roi") or {},
+        interval=1,
+        motion_gate=MotionGate.from_config(config) if args.motion else None,
+        pool=recognition_pool
+    )
+
+    timeline = TimelineWriter(args.output)
+    summaries = []
+
+    try:
+        for source in args.sources:
+            logger.info(f"🎞️  Analyse de {source}")
+            try:
+                summary = process_source(source, face_pipeline, face_matcher, timeline,
+                                         settings, include_empty=args.all_frames)
+            except IOError as e:
+                logger.error(f"❌ {e}")
+                continue
+            except RuntimeError as e:
+                # Pool hors service : inutile de passer aux sources suivantes
+                logger.error(f"❌ {source}: {e}")
+                break
+
+            summaries.append(summary)
+            logger.info(f"✅ {source}: {summary['video_seconds']} s de vidéo en "
+                        f"{summary['elapsed_seconds']} s (x{summary['speed']})")
+
+    except KeyboardInterrupt:
+        logger.info("👋 Interruption clavier (Ctrl+C)")
+
+    finally:
+        timeline.close()
+        if recognition_pool is not None:
+            recognition_pool.close()
+
+    logger.info(f"📄 Chronologie: {timeline.path} ({timeline.rows} lignes)")
+    METRICS.log_summary(logger)
+    return 0 if summaries else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Banc de vérification des stratégies d'appariement
+Compare "exact", "centroid" et "ivf" à la référence compare_faces + face_distance
+(distance euclidienne float64, argmin, seuil de tolérance) sur une galerie synthétique
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append('.')
+from src.ann_index import DEFAULT_INDEX_SETTINGS
+from src.face_matcher import FaceMatcher, UNKNOWN_NAME
+from src.gallery_store import GalleryStore
+
+
+def synthetic_gallery(people, per_person, rng):
+    """Galerie proche de dlib : ~0.4 entre photos d'une personne, ~0.9 entre personnes"""
+    centers = rng.normal(0, 0.056, (people, 128))
+    encodings = np.repeat(centers, per_person, axis=0) + rng.normal(0, 0.025, (people * per_person, 128))
+    names = [f"personne_{i:05d}" for i in range(people)]
+    return centers, encodings, names
+
+
+def reference_names(encodings, labels, names, queries, tolerance):
+    """Comportement historique : face_distance puis argmin si compare_faces trouve un match"""
+    results = []
+    for query in queries:
+        distances = np.linalg.norm(encodings - query, axis=1)
+        best = distances.argmin()
+        results.append(names[labels[best]] if distances[best] <= tolerance else UNKNOWN_NAME)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérification des stratégies d'appariement")
+    parser.add_argument("--people", type=int, default=2000, help="Nombre de personnes")
+    parser.add_argument("--per-person", type=int, default=5, help="Encodings par personne")
+    parser.add_argument("--queries", type=int, default=500, help="Nombre de visages à apparier")
+    parser.add_argument("--tolerance", type=float, default=0.6, help="Seuil de reconnaissance")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers, encodings, names = synthetic_gallery(args.people, args.per_person, rng)
+
+    # Moitié de personnes connues, moitié d'inconnus
+    known = centers[rng.choice(args.people, args.queries // 2)]
+    strangers = rng.normal(0, 0.056, (args.queries - len(known), 128))
+    queries = np.vstack((known, strangers)) + rng.normal(0, 0.025, (args.queries, 128))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = GalleryStore(tmp)
+        store.add_many([
+            (name, encodings[i * args.per_person:(i + 1) * args.per_person], None)
+            for i, name in enumerate(names)
+        ])
+        snapshot = store.snapshot()
+
+        print(f"📊 Galerie: {snapshot.count} encodings, {args.people} personnes, {args.queries} visages")
+
+        start = time.perf_counter()
+        expected = reference_names(snapshot.encodings, snapshot.labels, snapshot.names, queries, args.tolerance)
+        reference_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"   référence : {reference_ms:7.3f} ms/visage")
+
+        failures = 0
+        for strategy in ("exact", "centroid", "ivf"):
+            settings = dict(DEFAULT_INDEX_SETTINGS, type=strategy, min_size=0)
+            matcher = FaceMatcher.from_snapshot(
+                snapshot,
+                tolerance=args.tolerance,
+                index_settings=settings,
+                index_dir=tmp
+            )
+
+            start = time.perf_counter()
+            found = [matcher.match(query[None, :])[0]['name'] for query in queries]
+            elapsed_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+            mismatches = sum(a != b for a, b in zip(found, expected))
+            status = "✅" if mismatches == 0 else "⚠️ "
+            print(f"{status} {strategy:9s}: {elapsed_ms:7.3f} ms/visage, {mismatches} différence(s)")
+
+            # L'IVF est approximatif : seules les stratégies exactes doivent être identiques
+            if strategy != "ivf":
+                failures += mismatches
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
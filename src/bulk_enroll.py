@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Enregistrement en masse depuis un dossier de photos
+Arborescence attendue : racine/nom_de_la_personne/*.jpg. Les images sont
+détectées et encodées en parallèle (processus), celles sans visage ou avec
+plusieurs visages sont écartées, et la galerie est complétée en une écriture.
+Un manifeste des fichiers traités permet de reprendre un import interrompu.
+La galerie ne garde pas la photo d'origine de chaque encoding : une personne
+dont une photo a changé est retirée puis ré-encodée depuis toutes ses photos.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+sys.path.append('.')
+from src.gallery_store import GalleryStore
+from src.face_pipeline import detect_face_locations, encode_faces
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+# Statuts enregistrés dans le manifeste
+STATUS_ENROLLED = "enrolled"
+STATUS_NO_FACE = "no_face"
+STATUS_MULTIPLE_FACES = "multiple_faces"
+STATUS_ERROR = "error"
+
+
+def find_images(root):
+    """
+    Images de l'arborescence racine/personne/*
+
+    Returns:
+        Liste triée de tuples (nom de la personne, chemin de l'image)
+    """
+    images = []
+    for person_dir in sorted(Path(root).iterdir()):
+        if not person_dir.is_dir() or person_dir.name.startswith('.'):
+            continue
+        for path in sorted(person_dir.rglob('*')):
+            if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                images.append((person_dir.name, path))
+    return images
+
+
+def encode_image(path, model="hog", max_width=1024):
+    """
+    Détecte et encode l'unique visage d'une photo (exécuté dans un worker)
+
+    La détection se fait sur une copie réduite à `max_width` (photos d'identité
+    souvent en haute résolution), l'encodage sur l'image d'origine.
+
+    Returns:
+        Tuple (chemin, statut, encoding ou None, message)
+    """
+    try:
+        frame = cv2.imread(str(path))
+        if frame is None:
+            return str(path), STATUS_ERROR, None, "image illisible"
+
+        width = frame.shape[1]
+        scale = min(1.0, max_width / float(width)) if max_width else 1.0
+
+        locations = detect_face_locations(frame, scale, model)
+        if not locations:
+            return str(path), STATUS_NO_FACE, None, None
+        if len(locations) > 1:
+            return str(path), STATUS_MULTIPLE_FACES, None, f"{len(locations)} visages"
+
+        return str(path), STATUS_ENROLLED, encode_faces(frame, locations)[0], None
+
+    except Exception as e:
+        return str(path), STATUS_ERROR, None, str(e)
+
+
+class EnrollmentManifest:
+    """Fichiers déjà traités (taille et date de modification), écrit de manière atomique"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.files = {}
+
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.files = json.load(f).get("files", {})
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_size, int(stat.st_mtime)
+
+    def is_done(self, path):
+        """Vrai si le fichier a déjà été traité et n'a pas changé depuis"""
+        entry = self.files.get(str(Path(path).resolve()))
+        if entry is None:
+            return False
+        return (entry["size"], entry["mtime"]) == self._signature(path)
+
+    def is_stale(self, path):
+        """Vrai si le fichier a été enregistré dans la galerie puis modifié (ou invalidé)"""
+        entry = self.files.get(str(Path(path).resolve()))
+        return entry is not None and entry["status"] == STATUS_ENROLLED and not self.is_done(path)
+
+    def invalidate(self, path, person):
+        """Marque le fichier à ré-encoder, la personne à remplacer (même après interruption)"""
+        self.files[str(Path(path).resolve())] = {
+            "person": person,
+            "status": STATUS_ENROLLED,
+            "size": None,
+            "mtime": None
+        }
+
+    def record(self, path, person, status):
+        """Fichier traité ; les erreurs ne sont pas enregistrées (nouvel essai au prochain import)"""
+        if status == STATUS_ERROR:
+            return
+
+        size, mtime = self._signature(path)
+        self.files[str(Path(path).resolve())] = {
+            "person": person,
+            "status": status,
+            "size": size,
+            "mtime": mtime
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.path.with_suffix(".tmp")
+        with open(temp_file, 'w') as f:
+            json.dump({"version": 1, "files": self.files}, f, indent=1, ensure_ascii=False)
+        os.replace(temp_file, self.path)
+
+
+def commit(store, manifest, pending):
+    """
+    Ajoute les encodings en attente à la galerie (une écriture), puis au manifeste
+
+    Args:
+        pending: Liste de tuples (personne, chemin, statut, encoding)
+
+    Returns:
+        Nombre d'encodings ajoutés
+    """
+    if not pending:
+        return 0
+
+    by_person = {}
+    for person, _, status, encoding in pending:
+        if status == STATUS_ENROLLED:
+            by_person.setdefault(person, []).append(encoding)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    store.add_many([(person, encodings, timestamp) for person, encodings in by_person.items()])
+
+    # Manifeste après la galerie : au pire une image est ré-encodée, jamais perdue
+    for person, path, status, _ in pending:
+        manifest.record(path, person, status)
+    manifest.save()
+
+    added = sum(len(encodings) for encodings in by_person.values())
+    pending.clear()
+    return added
+
+
+def replace_people(store, manifest, images, people):
+    """
+    Retire `people` de la galerie avant de les ré-encoder depuis leurs photos
+
+    Les photos sont invalidées dans le manifeste avant la suppression : un
+    import interrompu recommence le remplacement au lieu de s'arrêter à moitié.
+    """
+    for person, path in images:
+        if person in people:
+            manifest.invalidate(path, person)
+    manifest.save()
+
+    removed = store.remove_people(people)
+    if removed:
+        logger.warning(f"♻️  {len(removed)} personne(s) ré-encodée(s) depuis leurs photos : {', '.join(removed)}")
+
+
+def enroll_directory(root, store, manifest, workers=None, model="hog", max_width=1024,
+                     checkpoint=0, start_method="spawn", force=False):
+    """
+    Importe toutes les photos nouvelles ou modifiées de `root`
+
+    Une personne dont une photo déjà enregistrée a changé est remplacée : ses
+    anciens encodings sont retirés et toutes ses photos ré-encodées.
+
+    Args:
+        root: Dossier racine (un sous-dossier par personne)
+        store: GalleryStore à compléter
+        manifest: EnrollmentManifest des fichiers déjà traités
+        workers: Processus d'encodage (None = nombre de CPU)
+        model: Modèle de détection ("hog" ou "cnn")
+        max_width: Largeur maximale pour la détection (0 = taille d'origine)
+        checkpoint: Écrire la galerie toutes les N images (0 = une seule écriture)
+        start_method: Méthode de démarrage multiprocessing
+        force: Ignorer le manifeste et remplacer toutes les personnes du dossier
+
+    Returns:
+        Dict de compteurs par statut (+ "skipped" et "added")
+    """
+    images = find_images(root)
+
+    if force:
+        replaced = {person for person, _ in images}
+    else:
+        replaced = {person for person, path in images if manifest.is_stale(path)}
+    if replaced:
+        replace_people(store, manifest, images, replaced)
+
+    todo = [(person, path) for person, path in images if not manifest.is_done(path)]
+
+    counts = {STATUS_ENROLLED: 0, STATUS_NO_FACE: 0, STATUS_MULTIPLE_FACES: 0, STATUS_ERROR: 0,
+              "skipped": len(images) - len(todo), "added": 0}
+
+    logger.info(f"📂 {len(images)} image(s) trouvée(s), {len(todo)} à traiter "
+                f"({counts['skipped']} déjà importée(s))")
+    if not todo:
+        return counts
+
+    person_of = {str(path): person for person, path in todo}
+    pending = []
+    start = time.monotonic()
+    last_progress = start
+
+    context = multiprocessing.get_context(start_method)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    paths = [str(path) for _, path in todo]
+    chunksize = max(1, min(16, len(paths) // ((workers or os.cpu_count() or 1) * 4)))
+
+    try:
+        results = executor.map(encode_image, paths, [model] * len(paths), [max_width] * len(paths),
+                               chunksize=chunksize)
+
+        for done, (path, status, encoding, message) in enumerate(results, start=1):
+            counts[status] += 1
+            pending.append((person_of[path], path, status, encoding))
+
+            if status != STATUS_ENROLLED:
+                detail = f" ({message})" if message else ""
+                logger.warning(f"⚠️  {path} ignorée : {status}{detail}")
+
+            if checkpoint and len(pending) >= checkpoint:
+                counts["added"] += commit(store, manifest, pending)
+
+            now = time.monotonic()
+            if now - last_progress >= 10.0:
+                last_progress = now
+                logger.info(f"⏩ {done}/{len(todo)} image(s), {done / (now - start):.1f} image(s)/s")
+
+    finally:
+        # Interruption : ce qui est déjà encodé est conservé (reprise au fichier suivant)
+        counts["added"] += commit(store, manifest, pending)
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return counts
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Enregistrement en masse depuis un dossier de photos")
+    parser.add_argument("root", help="Dossier racine (un sous-dossier par personne)")
+    parser.add_argument("--faces-dir", default="data/faces", help="Dossier des visages")
+    parser.add_argument("--manifest", help="Manifeste des fichiers traités "
+                                           "(défaut : <faces-dir>/enroll_manifest.json)")
+    parser.add_argument("--workers", type=int, help="Processus d'encodage (défaut : nombre de CPU)")
+    parser.add_argument("--model", default="hog", choices=["hog", "cnn"], help="Modèle de détection")
+    parser.add_argument("--max-width", type=int, default=1024,
+                        help="Largeur maximale pour la détection (0 = taille d'origine)")
+    parser.add_argument("--checkpoint", type=int, default=0,
+                        help="Écrire la galerie toutes les N images (0 = une seule écriture)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignorer le manifeste et tout retraiter (les personnes du dossier sont "
+                             "remplacées dans la galerie)")
+    args = parser.parse_args()
+
+    if not Path(args.root).is_dir():
+        logger.error(f"❌ Dossier introuvable : {args.root}")
+        return 1
+
+    store = GalleryStore(args.faces_dir)
+    manifest = EnrollmentManifest(args.manifest or Path(args.faces_dir) / "enroll_manifest.json")
+
+    start = time.monotonic()
+    try:
+        counts = enroll_directory(args.root, store, manifest, args.workers, args.model,
+                                  args.max_width, args.checkpoint, force=args.force)
+    except KeyboardInterrupt:
+        logger.info("👋 Interruption : relancer la commande pour reprendre l'import")
+        return 1
+
+    meta = store.read_meta()
+    logger.info(f"✅ {counts['added']} encoding(s) ajouté(s) en {time.monotonic() - start:.1f} s "
+                f"({counts[STATUS_NO_FACE]} sans visage, {counts[STATUS_MULTIPLE_FACES]} à plusieurs visages, "
+                f"{counts[STATUS_ERROR]} en erreur)")
+    logger.info(f"📊 Galerie : {meta['count']} encodings pour {len(meta['people'])} personne(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Supervision de plusieurs caméras dans un seul processus
+Un thread de capture par source (FrameGrabber) ; un seul thread de
+reconnaissance pour toutes les caméras, avec une galerie et un pool de
+processus partagés. Le suivi reste propre à chaque caméra (un FacePipeline
+par source).
+"""
+import logging
+import sys
+import threading
+
+sys.path.append('.')
+from src.frame_grabber import FrameGrabber
+from src.frame_broadcast import FrameBroadcaster
+from src.face_pipeline import FacePipeline, process_batch
+from src.metrics import FPSCounter
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de chaque entrée de "cameras"
+DEFAULT_CAMERA_SETTINGS = {
+    "source": 0,               # Index du périphérique, fichier vidéo ou URL (RTSP, MJPEG)
+    "width": 640,
+    "height": 480,
+    "scale": 0.5,              # Échelle de détection de départ
+    "interval": 3,             # Traiter une frame sur N au départ
+    "history": 30              # Frames gardées pour les captures (~1 s à 30 fps, latence du pool comprise)
+}
+
+
+def camera_settings(config):
+    """
+    Liste des caméras configurées
+
+    Section "cameras" (liste) ; à défaut, la caméra unique de la section "camera".
+
+    Returns:
+        Liste de dicts complétés par les défauts, avec un "id" unique (chaîne)
+    """
+    cameras = config.get("cameras")
+
+    if not cameras:
+        camera = config.get("camera") or {}
+        cameras = [{
+            "id": "0",
+            "source": camera.get("device_id", 0),
+            "width": camera.get("width", 640),
+            "height": camera.get("height", 480),
+            "history": camera.get("history", DEFAULT_CAMERA_SETTINGS["history"])
+        }]
+
+    result = []
+    for index, entry in enumerate(cameras):
+        settings = dict(DEFAULT_CAMERA_SETTINGS)
+        settings.update(entry)
+        settings["id"] = str(entry.get("id", index))
+        settings.setdefault("name", settings["id"])
+
+        # "0" dans le JSON : index de périphérique, pas nom de fichier
+        if isinstance(settings["source"], str) and settings["source"].isdigit():
+            settings["source"] = int(settings["source"])
+
+        result.append(settings)
+
+    ids = [settings["id"] for settings in result]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Identifiants de caméra en double : {ids}")
+
+    return result
+
+
+class Camera:
+    """Une source : capture, pipeline de reconnaissance et diffusion MJPEG"""
+
+    def __init__(self, camera_id, grabber, pipeline, name=None):
+        self.id = camera_id
+        self.name = name or camera_id
+        self.grabber = grabber
+        self.pipeline = pipeline
+        self.broadcaster = FrameBroadcaster()
+
+        # Derniers résultats (dicts location, name, confidence...) et leur frame
+        self.face_data = []
+        self.face_sequence = 0
+
+        # Dernière séquence examinée par le thread de reconnaissance
+        self.last_checked = 0
+
+        # FPS du flux diffusé ; frames jamais examinées (reconnaissance plus lente que la capture)
+        self.fps = FPSCounter()
+        self.stats = {"examined": 0, "skipped": 0}
+
+    def status(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "source": str(self.grabber.source),
+            "running": self.grabber.is_running,
+            "sequence": self.grabber.sequence,
+            "viewers": self.broadcaster.viewers,
+            "faces": len(self.face_data),
+            "fps": round(self.fps.fps, 1),
+            **self.stats,
+            "detection": self.pipeline.status()
+        }
+
+
+class CameraSupervisor:
+    """Caméras multiples, reconnaissance partagée"""
+
+    def __init__(self, cameras, matcher, handler=None, pool=None):
+        """
+        Args:
+            cameras: Liste de Camera
+            matcher: Fonction sans argument renvoyant le FaceMatcher courant
+                (la galerie peut être rechargée pendant l'exécution)
+            handler: Fonction (camera, [(sequence, résultats)]) appelée depuis le
+                thread de reconnaissance à chaque nouvelle frame examinée
+            pool: RecognitionPool partagé (None = reconnaissance par lots dans ce thread)
+        """
+        self.cameras = {camera.id: camera for camera in cameras}
+        self.matcher = matcher
+        self.handler = handler
+        self.pool = pool
+        self.active = False
+
+        self._frame_event = threading.Event()
+        for camera in cameras:
+            camera.grabber.frame_event = self._frame_event
+
+        self._thread = None
+        self._running = False
+
+    @classmethod
+    def from_config(cls, config, matcher, handler=None, pool=None, model=None):
+        """
+        Crée une Camera (capture + pipeline) par entrée de la configuration
+
+        Args:
+            model: Modèle de détection (None = recognition.model)
+        """
+        cameras = []
+        for settings in camera_settings(config):
+            grabber = FrameGrabber(settings["source"], width=settings["width"], height=settings["height"],
+                                   history=settings["history"])
+            pipeline = FacePipeline.from_config(config, scale=settings["scale"], model=model,
+                                                interval=settings["interval"], pool=pool)
+            cameras.append(Camera(settings["id"], grabber, pipeline, settings["name"]))
+        return cls(cameras, matcher, handler, pool)
+
+    @property
+    def default(self):
+        """Première caméra configurée"""
+        return next(iter(self.cameras.values()))
+
+    def get(self, camera_id):
+        """Caméra `camera_id` (None si inconnue)"""
+        return self.cameras.get(str(camera_id))
+
+    def start(self):
+        """Démarre les captures et le thread de reconnaissance"""
+        if self._running:
+            return self
+
+        for camera in self.cameras.values():
+            camera.grabber.start()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="recognition-supervisor", daemon=True)
+        self._thread.start()
+
+        logger.info(f"📹 {len(self.cameras)} caméra(s) supervisée(s)")
+        return self
+
+    def stop(self):
+        self._running = False
+        self._frame_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        for camera in self.cameras.values():
+            camera.grabber.stop()
+
+    def status(self):
+        return [camera.status() for camera in self.cameras.values()]
+
+    def _run(self):
+        """Boucle de reconnaissance : toutes les caméras ayant une nouvelle frame"""
+        while self._running:
+            self._frame_event.wait(timeout=0.5)
+            self._frame_event.clear()
+
+            try:
+                self._cycle()
+            except Exception as e:
+                logger.error(f"❌ Erreur reconnaissance: {e}")
+
+    def _cycle(self):
+        matcher = self.matcher()
+        updated = {}
+        jobs = []
+        job_cameras = []
+
+        for camera in self.cameras.values():
+            sequence, frame = camera.grabber.read()
+            if frame is None or sequence == camera.last_checked:
+                continue
+
+            if camera.last_checked:
+                camera.stats["skipped"] += max(0, sequence - camera.last_checked - 1)
+            camera.stats["examined"] += 1
+            camera.last_checked = sequence
+            updated[camera.id] = []
+
+            if not self.active or not camera.pipeline.should_process(frame, sequence):
+                continue
+
+            if self.pool is not None:
+                # Frame en mémoire partagée ; pool plein, elle remplace la plus ancienne en attente
+                camera.pipeline.submit(frame, sequence)
+            else:
+                jobs.append((camera.pipeline, frame, sequence, None))
+                job_cameras.append(camera)
+
+        if not self.active:
+            # Résultats des frames soumises avant la désactivation : jetés, pas appliqués à la reprise
+            if self.pool is not None:
+                for camera in self.cameras.values():
+                    camera.pipeline.discard()
+            return
+
+        # Sans pool : détection par caméra, encodage et appariement en un seul lot
+        if jobs:
+            for camera, job, face_data in zip(job_cameras, jobs, process_batch(jobs, matcher)):
+                updated[camera.id].append((job[2], face_data))
+
+        # Avec pool : résultats rendus à chaque caméra dans l'ordre de ses frames
+        if self.pool is not None:
+            for camera in self.cameras.values():
+                collected = camera.pipeline.collect(matcher)
+                if collected:
+                    updated.setdefault(camera.id, []).extend(collected)
+
+        for camera_id, results in updated.items():
+            camera = self.cameras[camera_id]
+            if results:
+                camera.face_sequence, camera.face_data = results[-1]
+            if self.handler is not None:
+                self.handler(camera, results)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Appariement vectorisé des visages
+Remplace le double passage compare_faces + face_distance par un seul calcul matriciel
+"""
+import numpy as np
+
+from src.ann_index import DEFAULT_INDEX_SETTINGS, IVFIndex, load_or_build
+
+UNKNOWN_NAME = "Inconnu"
+ENCODING_SIZE = 128
+
+
+class _GrowableBuffer:
+    """Tableau 1-D en ajout seul, partagé entre matchers successifs"""
+
+    def __init__(self, values):
+        self.data = np.array(values, dtype=np.float32)
+        self.filled = len(self.data)
+
+    def append(self, values):
+        """Ajoute en place (capacité doublée si nécessaire)"""
+        needed = self.filled + len(values)
+        if needed > len(self.data):
+            grown = np.empty(max(needed, 2 * len(self.data)), dtype=np.float32)
+            grown[:self.filled] = self.data[:self.filled]
+            self.data = grown
+        self.data[self.filled:needed] = values
+        self.filled = needed
+
+    def view(self, length):
+        return self.data[:length]
+
+
+class PersonCentroids:
+    """
+    Préfiltre exact par centroïde de personne
+
+    Pour chaque personne : centroïde c et rayon r (distance max d'un de ses
+    encodings à c). Par inégalité triangulaire, aucun encoding de la personne
+    n'est à moins de ||q - c|| - r de la requête : seules les personnes dont
+    cette borne reste sous la tolérance sont comparées encoding par encoding.
+    Le résultat est identique au argmin complet dès que le meilleur visage est
+    sous la tolérance (sinon le visage est inconnu dans les deux cas).
+    """
+
+    # Marge sur la borne pour absorber les erreurs d'arrondi float32
+    BOUND_SLACK = 1e-4
+
+    def __init__(self, centroids, radii, order, offsets, count, generation=None):
+        """
+        Args:
+            centroids: Centroïde de chaque personne (P x 128)
+            radii: Rayon de chaque personne
+            order: Lignes de la galerie triées par personne
+            offsets: Début des lignes de chaque personne dans `order` (P + 1)
+            count: Nombre de lignes de galerie couvertes
+            generation: Génération de la galerie couverte
+        """
+        self.centroids = centroids
+        self.radii = radii
+        self.order = order
+        self.offsets = offsets
+        self.count = count
+        self.generation = generation
+        self.centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def for_matcher(cls, matcher, previous=None):
+        """
+        Calcule centroïdes et rayons de la galerie d'un matcher
+
+        Avec un préfiltre précédent de la même génération, seules les personnes
+        concernées par les nouvelles lignes sont recalculées.
+        """
+        labels = matcher.labels
+        people = len(matcher.names)
+
+        order = np.argsort(labels, kind='stable').astype(np.int64)
+        counts = np.bincount(labels, minlength=people)
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        centroids = np.zeros((people, ENCODING_SIZE), dtype=np.float32)
+        radii = np.full(people, np.inf, dtype=np.float32)
+
+        if isinstance(previous, cls) and previous.generation == matcher.generation \
+                and previous.count <= len(matcher):
+            known = len(previous.centroids)
+            centroids[:known] = previous.centroids
+            radii[:known] = previous.radii
+            touched = np.unique(labels[previous.count:])
+        else:
+            touched = np.flatnonzero(counts)
+
+        for label in touched:
+            rows = order[offsets[label]:offsets[label + 1]]
+            members = matcher.encodings[rows]
+            centroid = members.mean(axis=0)
+            centroids[label] = centroid
+            radii[label] = np.sqrt(((members - centroid) ** 2).sum(axis=1)).max()
+
+        return cls(centroids, radii, order, offsets, len(matcher), generation=matcher.generation)
+
+    def search(self, queries, matcher):
+        """
+        Meilleur voisin parmi les personnes candidates
+
+        Returns:
+            Tuple (index du meilleur voisin, distance) ; -1 / inf sans candidat
+        """
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        squared = query_norms[:, None] + self.centroid_norms[None, :] - 2.0 * (queries @ self.centroids.T)
+        bounds = np.sqrt(np.maximum(squared, 0.0)) - self.radii[None, :]
+
+        best_indices = np.full(len(queries), -1, dtype=np.int64)
+        best_distances = np.full(len(queries), np.inf, dtype=np.float32)
+        limit = matcher.tolerance + self.BOUND_SLACK
+
+        for i, query in enumerate(queries):
+            candidates = np.flatnonzero(bounds[i] <= limit)
+            if len(candidates) == 0:
+                continue
+
+            # La personne la plus prometteuse donne une première distance
+            # qui resserre la borne pour toutes les autres
+            first = candidates[bounds[i][candidates].argmin()]
+            rows = self.order[self.offsets[first]:self.offsets[first + 1]]
+            first_best = np.sqrt(max(float(self._squared_distances(query, query_norms[i], rows, matcher).min()), 0.0))
+
+            selected = bounds[i] <= min(limit, first_best + self.BOUND_SLACK)
+
+            # Lignes dans l'ordre de la galerie : en cas d'égalité, même choix que argmin
+            rows = np.flatnonzero(selected[matcher.labels])
+            distances = self._squared_distances(query, query_norms[i], rows, matcher)
+            best = int(distances.argmin())
+            best_indices[i] = rows[best]
+            best_distances[i] = np.sqrt(max(float(distances[best]), 0.0))
+
+        return best_indices, best_distances
+
+    @staticmethod
+    def _squared_distances(query, query_norm, rows, matcher):
+        """Distances au carré exactes entre une requête et des lignes de la galerie"""
+        return query_norm + matcher.squared_norms[rows] - 2.0 * (matcher.encodings[rows] @ query)
+
+
+class FaceMatcher:
+    """Galerie de visages connus sous forme de matrice float32 contiguë (N x 128)"""
+
+    def __init__(self, encodings, labels, names, tolerance=0.6):
+        """
+        Args:
+            encodings: Tableau d'encodings 128-d (un memmap float32 n'est pas copié)
+            labels: Index de la personne pour chaque encoding
+            names: Noms des personnes, indexés par label
+            tolerance: Distance maximale pour considérer un visage reconnu
+        """
+        self.encodings = np.ascontiguousarray(encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.names = list(names)
+        self.tolerance = tolerance
+
+        if len(self.labels) != len(self.encodings):
+            raise ValueError(f"{len(self.encodings)} encodings pour {len(self.labels)} labels")
+
+        self.snapshot = None
+        self.generation = None
+        self.index = None
+        self.nprobe = DEFAULT_INDEX_SETTINGS["nprobe"]
+        self._people_count = len(np.unique(self.labels))
+
+        # Normes au carré précalculées : ||q - e||² = ||q||² + ||e||² - 2 q·e
+        self._norm_buffer = _GrowableBuffer(np.einsum('ij,ij->i', self.encodings, self.encodings))
+        self.squared_norms = self._norm_buffer.view(len(self.encodings))
+
+    @classmethod
+    def from_snapshot(cls, snapshot, tolerance=0.6, previous=None, index_settings=None, index_dir=None):
+        """
+        Construit le matcher d'un snapshot de galerie
+
+        Si le snapshot ne fait qu'ajouter des lignes au matcher précédent, seules
+        les nouvelles lignes sont traitées : l'ajout d'une personne coûte
+        O(cette personne) et non O(galerie). Le matcher précédent n'est pas modifié.
+
+        Args:
+            snapshot: GallerySnapshot à apparier
+            tolerance: Distance maximale pour considérer un visage reconnu
+            previous: Matcher construit sur un snapshot antérieur
+            index_settings: Paramètres recognition.index (None = parcours exact)
+            index_dir: Dossier où persister l'index approximatif
+        """
+        matcher = cls._from_snapshot(snapshot, tolerance, previous)
+
+        if index_settings is not None:
+            matcher.nprobe = index_settings["nprobe"]
+            previous_index = previous.index if previous is not None else None
+
+            if index_settings["type"] == "centroid":
+                matcher.index = PersonCentroids.for_matcher(matcher, previous=previous_index)
+            else:
+                matcher.index = load_or_build(
+                    snapshot,
+                    index_dir or ".",
+                    index_settings,
+                    previous=previous_index if isinstance(previous_index, IVFIndex) else None
+                )
+
+        return matcher
+
+    @classmethod
+    def _from_snapshot(cls, snapshot, tolerance, previous):
+        """Construction du matcher, incrémentale si possible"""
+        if previous is None or previous.generation != snapshot.generation \
+                or previous._norm_buffer.filled != len(previous) \
+                or len(previous) > snapshot.count:
+            matcher = cls(snapshot.encodings, snapshot.labels, snapshot.names, tolerance=tolerance)
+            matcher.snapshot = snapshot
+            matcher.generation = snapshot.generation
+            return matcher
+
+        matcher = cls.__new__(cls)
+        matcher.index = None
+        matcher.nprobe = previous.nprobe
+        matcher.encodings = np.ascontiguousarray(snapshot.encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+        matcher.labels = np.asarray(snapshot.labels, dtype=np.int32)
+        matcher.names = list(snapshot.names)
+        matcher.tolerance = tolerance
+        matcher.snapshot = snapshot
+        matcher.generation = snapshot.generation
+
+        # Les nouvelles personnes ont des labels au-delà de ceux déjà connus
+        delta_labels = matcher.labels[len(previous):]
+        new_people = np.unique(delta_labels[delta_labels >= len(previous.names)])
+        matcher._people_count = previous._people_count + len(new_people)
+
+        delta = matcher.encodings[len(previous):]
+        matcher._norm_buffer = previous._norm_buffer
+        matcher._norm_buffer.append(np.einsum('ij,ij->i', delta, delta))
+        matcher.squared_norms = matcher._norm_buffer.view(len(matcher.encodings))
+
+        return matcher
+
+    @classmethod
+    def empty(cls, tolerance=0.6):
+        """Galerie vide (aucun visage ne sera reconnu)"""
+        return cls(np.empty((0, ENCODING_SIZE), dtype=np.float32), [], [], tolerance=tolerance)
+
+    def __len__(self):
+        return len(self.encodings)
+
+    @property
+    def people_count(self):
+        """Nombre de personnes distinctes dans la galerie"""
+        return self._people_count
+
+    def name_of(self, index):
+        """Nom de la personne associée à la ligne `index` de la galerie"""
+        return self.names[self.labels[index]]
+
+    def distances(self, face_encodings):
+        """
+        Calcule toutes les distances euclidiennes en un seul appel
+
+        Args:
+            face_encodings: Encodings des visages détectés (M x 128)
+
+        Returns:
+            Matrice float32 (M x N) des distances à la galerie
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+
+        if len(self.encodings) == 0 or len(queries) == 0:
+            return np.empty((len(queries), len(self.encodings)), dtype=np.float32)
+
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        squared = query_norms[:, None] + self.squared_norms[None, :] - 2.0 * (queries @ self.encodings.T)
+
+        # Les erreurs d'arrondi peuvent donner de petites valeurs négatives
+        np.maximum(squared, 0.0, out=squared)
+        return np.sqrt(squared, out=squared)
+
+    def nearest(self, face_encodings):
+        """
+        Meilleur voisin de chaque visage (index IVF si disponible, sinon parcours exact)
+
+        Returns:
+            Tuple (index du meilleur voisin, distance) ; -1 / inf si galerie vide
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, ENCODING_SIZE)
+
+        if len(self.encodings) == 0 or len(queries) == 0:
+            return (np.full(len(queries), -1, dtype=np.int64),
+                    np.full(len(queries), np.inf, dtype=np.float32))
+
+        if self.index is not None:
+            return self.index.search(queries, self)
+
+        distance_matrix = self.distances(queries)
+        best_indices = distance_matrix.argmin(axis=1)
+        return best_indices, distance_matrix[np.arange(len(queries)), best_indices]
+
+    def match(self, face_encodings, with_distances=False):
+        """
+        Associe chaque visage détecté au meilleur visage connu
+
+        Args:
+            face_encodings: Encodings des visages d'une frame
+            with_distances: Inclure la ligne complète de distances (mode debug)
+
+        Returns:
+            Liste de dictionnaires {name, distance, confidence, index[, distances]}
+        """
+        best_indices, best_distances = self.nearest(face_encodings)
+        distance_matrix = self.distances(face_encodings) if with_distances else None
+        results = []
+
+        for i, (best_index, best_distance) in enumerate(zip(best_indices, best_distances)):
+            result = {
+                'name': UNKNOWN_NAME,
+                'distance': None,
+                'confidence': 0.0,
+                'index': None
+            }
+
+            if best_index >= 0:
+                best_index = int(best_index)
+                best_distance = float(best_distance)
+                result['distance'] = best_distance
+
+                if best_distance <= self.tolerance:
+                    result['name'] = self.name_of(best_index)
+                    result['confidence'] = 1 - best_distance
+                    result['index'] = best_index
+
+            if with_distances:
+                result['distances'] = distance_matrix[i].tolist()
+
+            results.append(result)
+
+        return results
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Étape de reconnaissance commune au CLI et à l'interface web
+Détection (sur image réduite, autour des visages connus quand c'est possible),
+suivi des pistes, encodage et appariement des seuls visages qui en ont besoin.
+"""
+import logging
+import sys
+import time
+
+import cv2
+import face_recognition
+import numpy as np
+
+# Encodage par lots (chips alignées) : API dlib sous-jacente à face_recognition
+try:
+    import dlib
+    from face_recognition.api import _raw_face_landmarks, face_encoder
+except ImportError:
+    dlib = None
+
+sys.path.append('.')
+from src.face_tracker import FaceTracker, box_iou
+from src.adaptive_controller import AdaptiveController
+from src.motion_gate import MotionGate
+from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Taille et marge des chips alignées (identiques à face_recognition.face_encodings)
+CHIP_SIZE = 150
+CHIP_PADDING = 0.25
+
+# Valeurs par défaut de recognition.roi
+DEFAULT_ROI_SETTINGS = {
+    "enabled": True,
+    "padding": 0.75,           # Marge autour du visage précédent (fraction de sa taille)
+    "full_scan_interval": 10   # Détection sur l'image entière toutes les N détections
+}
+
+
+def detect_face_locations(frame, scale=0.5, model="hog"):
+    """
+    Détection sur une image réduite, boîtes ramenées à la taille d'origine
+
+    Args:
+        frame: Image BGR
+        scale: Facteur de réduction avant détection (1.0 = taille d'origine)
+        model: "hog" ou "cnn"
+
+    Returns:
+        Liste de boîtes (top, right, bottom, left) dans l'image d'origine
+    """
+    with METRICS.time("preprocess"):
+        if scale != 1.0:
+            small_frame = cv2.resize(frame, (0, 0), fx=scale, fy=scale)
+        else:
+            small_frame = frame
+
+        rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+
+    with METRICS.time("detect"):
+        locations = face_recognition.face_locations(rgb_small, model=model)
+
+    if scale == 1.0:
+        return locations
+
+    return [
+        (int(top / scale), int(right / scale), int(bottom / scale), int(left / scale))
+        for (top, right, bottom, left) in locations
+    ]
+
+
+def detect_in_regions(frame, boxes, scale=0.5, model="hog", padding=0.75):
+    """
+    Détection limitée à des fenêtres autour de positions connues
+
+    Args:
+        frame: Image BGR
+        boxes: Positions précédentes (top, right, bottom, left)
+        scale: Facteur de réduction appliqué à chaque fenêtre
+        model: "hog" ou "cnn"
+        padding: Marge ajoutée autour de chaque boîte (fraction de sa taille)
+
+    Returns:
+        Tuple (boîtes détectées dans l'image d'origine, nombre de fenêtres sans visage)
+    """
+    height, width = frame.shape[:2]
+    found = []
+    empty_windows = 0
+
+    for top, right, bottom, left in boxes:
+        margin_y = int((bottom - top) * padding)
+        margin_x = int((right - left) * padding)
+        y0, y1 = max(0, top - margin_y), min(height, bottom + margin_y)
+        x0, x1 = max(0, left - margin_x), min(width, right + margin_x)
+
+        if y1 <= y0 or x1 <= x0:
+            empty_windows += 1
+            continue
+
+        locations = detect_face_locations(frame[y0:y1, x0:x1], scale, model)
+        if not locations:
+            empty_windows += 1
+
+        for (t, r, b, l) in locations:
+            box = (t + y0, r + x0, b + y0, l + x0)
+            # Fenêtres qui se chevauchent : garder une seule fois chaque visage
+            if all(box_iou(box, other) < 0.5 for other in found):
+                found.append(box)
+
+    return found, empty_windows
+
+
+def encode_faces(frame, locations):
+    """Encodings 128-d calculés sur l'image d'origine (précision maximale)"""
+    return encode_batch([(frame, locations)])[0]
+
+
+def encode_batch(items):
+    """
+    Encodings 128-d des visages de plusieurs frames (ou caméras) en un seul lot
+
+    Les repères faciaux sont calculés frame par frame, puis tous les visages sont
+    normalisés en chips alignées 150x150 et le réseau d'encodage tourne une seule
+    fois sur l'ensemble (au lieu d'un appel par visage). Sans l'API dlib, repli
+    sur face_recognition.face_encodings frame par frame.
+
+    Args:
+        items: Liste de tuples (image BGR, boîtes (top, right, bottom, left))
+
+    Returns:
+        Liste (une entrée par frame) de listes d'encodings alignées sur les boîtes
+    """
+    if not any(locations for _, locations in items):
+        return [[] for _ in items]
+
+    with METRICS.time("encode"):
+        return _encode_batch(items)
+
+
+def _encode_batch(items):
+    """Corps de encode_batch (chronométré par l'appelant)"""
+    if dlib is None:
+        return [
+            face_recognition.face_encodings(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), locations)
+            if locations else []
+            for frame, locations in items
+        ]
+
+    chips = []
+    for frame, locations in items:
+        if not locations:
+            continue
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        landmarks = dlib.full_object_detections(_raw_face_landmarks(rgb_frame, locations, model="small"))
+        chips.extend(dlib.get_face_chips(rgb_frame, landmarks, size=CHIP_SIZE, padding=CHIP_PADDING))
+
+    descriptors = [np.array(d) for d in face_encoder.compute_face_descriptor(chips)]
+
+    encodings = []
+    offset = 0
+    for _, locations in items:
+        encodings.append(descriptors[offset:offset + len(locations)])
+        offset += len(locations)
+    return encodings
+
+
+def detect_planned(frame, regions=None, scale=0.5, model="hog", padding=0.75):
+    """
+    Détection dans les fenêtres prévues, image entière en repli
+
+    Args:
+        frame: Image BGR
+        regions: Boîtes autour desquelles chercher (None = image entière)
+        scale, model: Paramètres du détecteur
+        padding: Marge des fenêtres
+
+    Returns:
+        Tuple (boîtes, type d'analyse : "full", "roi" ou "roi_fallback")
+    """
+    if regions:
+        locations, empty_windows = detect_in_regions(frame, regions, scale, model, padding)
+        if not empty_windows:
+            return locations, "roi"
+
+        # Visage perdu : il a pu sortir de sa fenêtre, analyser toute l'image
+        return detect_face_locations(frame, scale, model), "roi_fallback"
+
+    return detect_face_locations(frame, scale, model), "full"
+
+
+def analyze_frame(frame, regions=None, scale=0.5, model="hog", padding=0.75, skip_boxes=()):
+    """
+    Détection puis encodage de tous les visages sauf ceux déjà identifiés
+
+    Utilisé par les workers du pool : les visages qui recouvrent une boîte de
+    `skip_boxes` (pistes identifiées, pas encore à re-vérifier) ne sont pas encodés.
+
+    Returns:
+        Tuple (boîtes, type d'analyse, encodings alignés sur les boîtes ou None)
+    """
+    locations, scan = detect_planned(frame, regions, scale, model, padding)
+
+    wanted = [
+        index for index, location in enumerate(locations)
+        if all(box_iou(location, box) < 0.5 for box in skip_boxes)
+    ]
+
+    encodings = [None] * len(locations)
+    for index, encoding in zip(wanted, encode_faces(frame, [locations[i] for i in wanted])):
+        encodings[index] = encoding
+
+    return locations, scan, encodings
+
+
+def match_encodings(matcher, encodings, with_distances=False):
+    """
+    Appariement des encodings non nuls en un seul appel
+
+    Returns:
+        Résultats alignés sur `encodings` (None pour un encoding absent)
+    """
+    known = [index for index, encoding in enumerate(encodings) if encoding is not None]
+    matches = [None] * len(encodings)
+    if known:
+        with METRICS.time("match"):
+            found = matcher.match([encodings[index] for index in known], with_distances=with_distances)
+        for index, match in zip(known, found):
+            matches[index] = match
+    return matches
+
+
+def process_batch(jobs, matcher, with_distances=False):
+    """
+    Reconnaissance de plusieurs frames avec un seul lot d'encodage et d'appariement
+
+    La détection et le suivi restent propres à chaque frame (et à chaque pipeline,
+    donc à chaque caméra) ; les visages à encoder de toutes les frames passent
+    ensemble dans encode_batch puis dans un seul appel au matcher. Une piste déjà
+    présente plus tôt dans le lot n'est encodée qu'une fois.
+
+    Args:
+        jobs: Liste de tuples (FacePipeline, frame, frame_index, now)
+        matcher: FaceMatcher partagé
+        with_distances: Joindre toutes les distances (mode debug)
+
+    Returns:
+        Résultats de chaque frame, dans l'ordre de `jobs`
+    """
+    start = time.monotonic()
+    prepared = []
+    queued = set()
+
+    for pipeline, frame, frame_index, now in jobs:
+        pipeline._last_processed = frame_index
+        locations, scan = detect_planned(
+            frame, pipeline._plan_regions(frame_index), pipeline.scale, pipeline.model,
+            pipeline.roi["padding"]
+        )
+        pending = pipeline._track(frame_index, locations, scan, now)
+
+        if pending["tracks"] is not None:
+            keep = [i for i, track in enumerate(pending["tracks"]) if track not in queued]
+            queued.update(pending["tracks"])
+            skipped = len(pending["tracks"]) - len(keep)
+            pending["tracks"] = [pending["tracks"][i] for i in keep]
+            pending["boxes"] = [pending["boxes"][i] for i in keep]
+            pipeline.tracker.stats["encoded"] -= skipped
+            pipeline.tracker.stats["reused"] += skipped
+
+        prepared.append((pipeline, frame, pending))
+
+    encodings = encode_batch([(frame, pending["boxes"]) for _, frame, pending in prepared])
+    matches = match_encodings(matcher, [e for frame_encodings in encodings for e in frame_encodings],
+                              with_distances)
+
+    results = []
+    offset = 0
+    for pipeline, _, pending in prepared:
+        count = len(pending["boxes"])
+        results.append(pipeline._complete(pending, matches[offset:offset + count]))
+        offset += count
+
+    # Latence par frame pour le contrôleur adaptatif
+    duration = (time.monotonic() - start) / max(1, len(jobs))
+    for (pipeline, _, _), frame_results in zip(prepared, results):
+        pipeline._observe(duration, frame_results)
+
+    return results
+
+
+class FacePipeline:
+    """Détection + suivi + reconnaissance d'une frame"""
+
+    def __init__(self, tracker=None, scale=0.5, model="hog", roi=None, interval=3, controller=None,
+                 motion_gate=None, pool=None):
+        """
+        Args:
+            tracker: FaceTracker (None = encodage de tous les visages à chaque détection)
+            scale: Facteur de réduction pour la détection
+            model: Modèle de détection ("hog" ou "cnn")
+            roi: Paramètres recognition.roi (None = image entière à chaque détection)
+            interval: Traiter une frame sur N (si pas de contrôleur)
+            controller: AdaptiveController réglant échelle et intervalle
+            motion_gate: MotionGate (None = traiter même une scène immobile)
+            pool: RecognitionPool (None = détection et encodage dans ce thread)
+        """
+        self.tracker = tracker
+        self.scale = scale
+        self.model = model
+        self.interval = interval
+        self.controller = controller
+        self.motion_gate = motion_gate
+        self.pool = pool
+        self._last_processed = None
+
+        self.roi = dict(DEFAULT_ROI_SETTINGS)
+        self.roi.update(roi or {})
+        if roi is None:
+            self.roi["enabled"] = False
+
+        self._last_locations = []
+        self._since_full_scan = 0
+
+        # Pistes publiées pour le dessin (remplacées d'un bloc à chaque frame terminée)
+        self._published = ()
+
+        self.stats = {"full_scans": 0, "roi_scans": 0, "roi_fallbacks": 0}
+
+    @classmethod
+    def from_config(cls, config, scale=0.5, model=None, interval=3, pool=None):
+        """
+        Crée le pipeline depuis la section "recognition"
+
+        Suivi selon recognition.tracking, fenêtres selon recognition.roi,
+        échelle et intervalle réglés selon recognition.adaptive. Le pool de
+        processus (recognition.pool) est créé par l'appelant, avant ses threads.
+        """
+        if model is None:
+            model = config.get("recognition", "model") or "hog"
+        return cls(
+            FaceTracker.from_config(config),
+            scale=scale,
+            model=model,
+            roi=config.get("recognition", "roi") or {},
+            interval=interval,
+            controller=AdaptiveController.from_config(config, scale=scale, interval=interval),
+            motion_gate=MotionGate.from_config(config),
+            pool=pool
+        )
+
+    @property
+    def process_interval(self):
+        """Nombre de frames entre deux reconnaissances"""
+        if self.controller is not None:
+            return self.controller.interval
+        return self.interval
+
+    def should_process(self, frame, frame_index, now=None):
+        """
+        Indique si la reconnaissance doit tourner sur cette frame
+
+        Scène immobile : rien n'est fait (les derniers résultats restent valides).
+        Reprise du mouvement : traitement immédiat, sans attendre l'intervalle.
+
+        `now` (ici comme dans process/submit) est l'horloge des délais de suivi et
+        de mouvement : time.monotonic() par défaut, temps de la vidéo hors ligne.
+        """
+        if self.motion_gate is not None:
+            if not self.motion_gate.update(frame, now):
+                return False
+            if self.motion_gate.woke:
+                return True
+
+        if self._last_processed is None:
+            return True
+
+        return frame_index - self._last_processed >= self.process_interval
+
+    def status(self):
+        """Réglages et compteurs courants (pour l'API de statut)"""
+        status = {
+            "scale": self.scale,
+            "process_every_n_frames": self.process_interval,
+            "scans": dict(self.stats)
+        }
+        if self.controller is not None:
+            status["adaptive"] = self.controller.status()
+        if self.motion_gate is not None:
+            status["motion"] = self.motion_gate.status()
+        if self.pool is not None:
+            status["pool"] = {"workers": self.pool.workers, "pending": self.pool.depth, **self.pool.stats}
+        return status
+
+    def process(self, frame, frame_index, matcher, with_distances=False, now=None):
+        """
+        Détecte et reconnaît les visages d'une frame (dans ce thread)
+
+        Avec le suivi, seuls les visages nouveaux ou à re-vérifier sont encodés ;
+        les autres gardent l'identité de leur piste.
+
+        Args:
+            frame: Image BGR (non modifiée)
+            frame_index: Numéro de la frame
+            matcher: FaceMatcher utilisé pour l'appariement
+            with_distances: Joindre toutes les distances (mode debug)
+            now: Instant (time.monotonic() par défaut)
+
+        Returns:
+            Liste de dicts {location, name, confidence, distances, track_id}
+        """
+        return process_batch([(self, frame, frame_index, now)], matcher, with_distances)[0]
+
+    def submit(self, frame, frame_index, now=None):
+        """
+        Confie la frame au pool de processus (ne bloque jamais)
+
+        Les visages déjà identifiés (pistes pas encore à re-vérifier) ne seront
+        pas encodés par le worker.
+
+        Returns:
+            True si la frame est acceptée (elle peut remplacer une frame plus ancienne
+            encore en attente) ; False si elle est abandonnée
+        """
+        if now is None:
+            now = time.monotonic()
+
+        skip_boxes = []
+        if self.tracker is not None:
+            skip_boxes = [
+                track.predict(frame_index) for track in self.tracker.visible_tracks()
+                if track.identified and now - track.verified_at < self.tracker.reverify_interval
+            ]
+
+        params = {
+            "regions": self._plan_regions(frame_index),
+            "scale": self.scale,
+            "model": self.model,
+            "padding": self.roi["padding"],
+            "skip_boxes": skip_boxes
+        }
+
+        submitted = self.pool.submit(frame, frame_index, params, extra=now, client=self)
+        if submitted:
+            self._last_processed = frame_index
+        return submitted
+
+    def collect(self, matcher, with_distances=False, timeout=0.0):
+        """
+        Applique les résultats rendus par le pool, dans l'ordre des frames
+
+        Returns:
+            Liste de tuples (frame_index, résultats) ; vide si rien n'est terminé
+        """
+        collected = []
+
+        for item in self.pool.collect(timeout, client=self):
+            encodings = item["encodings"]
+            locations = item["locations"]
+
+            def encoded(boxes):
+                # Encodings déjà calculés par le worker (None si le visage a été sauté)
+                return [encodings[locations.index(box)] for box in boxes]
+
+            results = self._identify(
+                item["frame_index"], locations, item["scan"], matcher, with_distances, encoded,
+                item["extra"]
+            )
+
+            # Durée de calcul répartie sur les workers (parallélisme)
+            self._observe(item["duration"] / self.pool.workers, results)
+            collected.append((item["frame_index"], results))
+
+        return collected
+
+    def discard(self):
+        """
+        Jette les résultats rendus par le pool sans les appliquer (reconnaissance désactivée)
+
+        Returns:
+            Nombre de résultats jetés
+        """
+        return len(self.pool.collect(client=self))
+
+    def _identify(self, frame_index, locations, scan, matcher, with_distances, encode, now=None):
+        """
+        Suivi puis appariement des visages à identifier
+
+        Args:
+            encode: Fonction boîtes -> encodings (None pour un visage non encodé)
+            now: Instant de la frame (time.monotonic() par défaut)
+        """
+        pending = self._track(frame_index, locations, scan, now)
+        encodings = encode(pending["boxes"]) if pending["boxes"] else []
+        return self._complete(pending, match_encodings(matcher, encodings, with_distances))
+
+    def _track(self, frame_index, locations, scan, now=None):
+        """
+        Met à jour les pistes d'après les boîtes détectées
+
+        Returns:
+            Dict {boxes: visages à encoder, tracks: pistes correspondantes,
+            visible: pistes visibles et leur boîte sur cette frame, now}
+        """
+        self._record_scan(scan, locations)
+
+        if self.tracker is None:
+            return {"boxes": list(locations), "tracks": None, "visible": None, "now": now}
+
+        to_encode = self.tracker.update(locations, frame_index, now)
+        return {
+            "boxes": [track.box for track in to_encode],
+            "tracks": to_encode,
+            "visible": [(track, track.box) for track in self.tracker.visible_tracks()],
+            "now": now
+        }
+
+    def _complete(self, pending, matches):
+        """
+        Attache les résultats d'appariement et construit les résultats de la frame
+
+        Args:
+            pending: Dict renvoyé par _track
+            matches: Résultat d'appariement par boîte à encoder (None si non encodée)
+        """
+        if pending["tracks"] is None:
+            return [
+                {
+                    'location': location,
+                    'name': match['name'],
+                    'confidence': match['confidence'],
+                    'distances': match.get('distances'),
+                    'track_id': None
+                }
+                for location, match in zip(pending["boxes"], matches) if match is not None
+            ]
+
+        for track, match in zip(pending["tracks"], matches):
+            if match is not None:
+                self.tracker.identify(track, match, pending["now"])
+        self._published = self.tracker.snapshot()
+
+        # Une piste sans identité (visage sauté par un worker) attend la détection suivante.
+        # Boîtes mémorisées au moment du suivi : une frame plus récente a pu les déplacer
+        return [
+            self._result(track, box)
+            for track, box in pending["visible"] if track.identified
+        ]
+
+    def _observe(self, duration, results):
+        """Réglage automatique d'après la latence et la taille des visages"""
+        if self.controller is None:
+            return
+
+        sizes = [bottom - top for (top, _, bottom, _) in (r['location'] for r in results)]
+        self.controller.observe(duration, sizes)
+        self.scale = self.controller.scale
+
+    def _plan_regions(self, frame_index):
+        """
+        Fenêtres de recherche autour des visages précédents (None = image entière)
+
+        L'image entière est analysée quand aucun visage n'est connu et toutes les
+        `full_scan_interval` détections (nouveaux arrivants) ; une fenêtre vide
+        déclenche aussi une analyse complète (voir detect_planned).
+        """
+        if self.tracker is not None:
+            previous = [track.predict(frame_index) for track in self.tracker.visible_tracks()]
+        else:
+            previous = self._last_locations
+
+        if (self.roi["enabled"] and previous
+                and self._since_full_scan < self.roi["full_scan_interval"]):
+            self._since_full_scan += 1
+            return previous
+
+        self._since_full_scan = 0
+        return None
+
+    def _record_scan(self, scan, locations):
+        """Compteurs d'analyse et positions pour la prochaine détection"""
+        if scan == "full":
+            self.stats["full_scans"] += 1
+        else:
+            self.stats["roi_scans"] += 1
+            if scan == "roi_fallback":
+                self.stats["roi_fallbacks"] += 1
+                self.stats["full_scans"] += 1
+                self._since_full_scan = 0
+
+        self._last_locations = locations
+
+    def annotations(self, frame_index, results):
+        """
+        Résultats à dessiner sur une frame intermédiaire
+
+        Avec le suivi, les boîtes sont extrapolées à `frame_index` : elles suivent
+        le mouvement au lieu de rester à la position de la dernière détection.
+        Appelée depuis le thread de diffusion : seules les pistes publiées à la
+        fin de la dernière frame reconnue (identifiées, copiées) sont lues, jamais
+        les pistes que le thread de reconnaissance est en train de modifier.
+        """
+        if self.tracker is None:
+            return results
+
+        return [self._result(track, track.predict(frame_index)) for track in self._published]
+
+    def reset(self):
+        """Oublie les pistes (ex: après rechargement de la galerie, nouvelle vidéo)"""
+        if self.tracker is not None:
+            self.tracker.reset()
+        self._published = ()
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        self._last_processed = None
+        self._last_locations = []
+        self._since_full_scan = 0
+
+    @staticmethod
+    def _result(track, location):
+        return {
+            'location': location,
+            'name': track.name,
+            'confidence': track.confidence,
+            'distances': track.distances,
+            'track_id': track.id
+        }
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Suivi des visages entre les détections
+Chaque visage détecté est associé à une piste (IoU, puis distance des centres) ;
+l'identité reste attachée à la piste. L'encodage 128-d et l'appariement ne sont
+relancés que pour les nouvelles pistes ou à l'échéance de re-vérification.
+"""
+import copy
+import itertools
+import time
+
+# Valeurs par défaut de recognition.tracking
+DEFAULT_TRACKING_SETTINGS = {
+    "enabled": True,
+    "iou_threshold": 0.3,      # Recouvrement minimum pour prolonger une piste
+    "max_missed": 2,           # Détections consécutives manquées avant suppression
+    "reverify_interval": 2.0   # Secondes avant de ré-encoder une piste identifiée
+}
+
+# Frames au-delà desquelles une piste n'est plus extrapolée
+MAX_EXTRAPOLATION = 15
+
+
+def box_iou(a, b):
+    """IoU de deux boîtes (top, right, bottom, left)"""
+    top = max(a[0], b[0])
+    right = min(a[1], b[1])
+    bottom = min(a[2], b[2])
+    left = max(a[3], b[3])
+
+    if right <= left or bottom <= top:
+        return 0.0
+
+    inter = (right - left) * (bottom - top)
+    area_a = (a[1] - a[3]) * (a[2] - a[0])
+    area_b = (b[1] - b[3]) * (b[2] - b[0])
+    return inter / float(area_a + area_b - inter)
+
+
+def _center(box):
+    return (box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0
+
+
+class Track:
+    """Piste d'un visage : position, vitesse et identité"""
+
+    def __init__(self, track_id, box, frame_index):
+        self.id = track_id
+        self.box = box
+        self.velocity = (0.0, 0.0)   # Déplacement (dy, dx) par frame
+        self.last_frame = frame_index
+        self.missed = 0
+
+        # Identité (remplie par identify)
+        self.name = None
+        self.confidence = 0.0
+        self.distances = None
+        self.verified_at = None
+
+    @property
+    def identified(self):
+        return self.verified_at is not None
+
+    def predict(self, frame_index):
+        """Boîte extrapolée à `frame_index` (vitesse constante)"""
+        # Extrapolation bornée : sans nouvelle détection, la boîte finit par s'arrêter
+        elapsed = min(frame_index - self.last_frame, MAX_EXTRAPOLATION)
+        if elapsed <= 0:
+            return self.box
+
+        dy = int(round(self.velocity[0] * elapsed))
+        dx = int(round(self.velocity[1] * elapsed))
+        top, right, bottom, left = self.box
+        return (top + dy, right + dx, bottom + dy, left + dx)
+
+    def update(self, box, frame_index):
+        """Nouvelle position détectée (vitesse lissée)"""
+        elapsed = frame_index - self.last_frame
+        if elapsed > 0:
+            (old_y, old_x), (new_y, new_x) = _center(self.box), _center(box)
+            velocity = ((new_y - old_y) / elapsed, (new_x - old_x) / elapsed)
+            self.velocity = (
+                0.5 * self.velocity[0] + 0.5 * velocity[0],
+                0.5 * self.velocity[1] + 0.5 * velocity[1]
+            )
+
+        self.box = box
+        self.last_frame = frame_index
+        self.missed = 0
+
+
+class FaceTracker:
+    """Association détections -> pistes et planification des encodages"""
+
+    def __init__(self, iou_threshold=0.3, max_missed=2, reverify_interval=2.0):
+        """
+        Args:
+            iou_threshold: IoU minimum pour associer une détection à une piste
+            max_missed: Détections manquées avant de supprimer une piste
+            reverify_interval: Secondes avant de ré-encoder une piste déjà identifiée
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.reverify_interval = reverify_interval
+
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+        self.stats = {"tracks": 0, "encoded": 0, "reused": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Crée le tracker depuis recognition.tracking
+
+        Returns:
+            FaceTracker, ou None si le suivi est désactivé
+        """
+        settings = dict(DEFAULT_TRACKING_SETTINGS)
+        settings.update(config.get("recognition", "tracking") or {})
+
+        if not settings["enabled"]:
+            return None
+
+        return cls(settings["iou_threshold"], settings["max_missed"], settings["reverify_interval"])
+
+    def update(self, locations, frame_index, now=None):
+        """
+        Associe les visages détectés aux pistes existantes
+
+        Args:
+            locations: Boîtes détectées (top, right, bottom, left)
+            frame_index: Numéro de la frame (pour la vitesse des pistes)
+            now: Instant (time.monotonic() par défaut)
+
+        Returns:
+            Pistes à encoder : nouvelles, non identifiées ou à re-vérifier
+        """
+        if now is None:
+            now = time.monotonic()
+
+        # Paires (score, piste, détection) : IoU avec la position prédite,
+        # puis proximité des centres pour les visages rapides
+        pairs = []
+        for track_index, track in enumerate(self.tracks):
+            predicted = track.predict(frame_index)
+            size = max(predicted[2] - predicted[0], predicted[1] - predicted[3], 1)
+            center_y, center_x = _center(predicted)
+
+            for location_index, location in enumerate(locations):
+                iou = box_iou(predicted, location)
+                if iou >= self.iou_threshold:
+                    pairs.append((1.0 + iou, track_index, location_index))
+                    continue
+
+                y, x = _center(location)
+                offset = ((y - center_y) ** 2 + (x - center_x) ** 2) ** 0.5 / size
+                if offset < 0.5:
+                    pairs.append((0.5 - offset, track_index, location_index))
+
+        # Association gloutonne, meilleurs scores d'abord
+        pairs.sort(reverse=True)
+        used_tracks, used_locations = set(), set()
+        for _, track_index, location_index in pairs:
+            if track_index in used_tracks or location_index in used_locations:
+                continue
+            used_tracks.add(track_index)
+            used_locations.add(location_index)
+            self.tracks[track_index].update(locations[location_index], frame_index)
+
+        # Pistes non retrouvées
+        kept = []
+        for track_index, track in enumerate(self.tracks):
+            if track_index not in used_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            kept.append(track)
+
+        # Nouvelles pistes
+        for location_index, location in enumerate(locations):
+            if location_index not in used_locations:
+                kept.append(Track(next(self._ids), location, frame_index))
+                self.stats["tracks"] += 1
+
+        self.tracks = kept
+
+        to_encode = [
+            track for track in self.tracks
+            if track.missed == 0 and (
+                not track.identified or now - track.verified_at >= self.reverify_interval
+            )
+        ]
+
+        visible = sum(1 for track in self.tracks if track.missed == 0)
+        self.stats["encoded"] += len(to_encode)
+        self.stats["reused"] += visible - len(to_encode)
+
+        return to_encode
+
+    def identify(self, track, match, now=None):
+        """Attache le résultat d'appariement (dict de FaceMatcher.match) à une piste"""
+        track.name = match['name']
+        track.confidence = match['confidence']
+        track.distances = match.get('distances')
+        track.verified_at = time.monotonic() if now is None else now
+
+    def visible_tracks(self):
+        """Pistes retrouvées lors de la dernière détection"""
+        return [track for track in self.tracks if track.missed == 0]
+
+    def snapshot(self):
+        """
+        Copie figée des pistes visibles et identifiées
+
+        Lue depuis un autre thread (diffusion) pendant que update et identify
+        modifient les pistes d'origine.
+        """
+        return tuple(copy.copy(track) for track in self.tracks if track.missed == 0 and track.identified)
+
+    def reset(self):
+        """Oublie toutes les pistes (ex: rechargement de la galerie)"""
+        self.tracks = []
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Diffusion d'images JPEG à plusieurs clients MJPEG
+Le pipeline publie une seule fois chaque image encodée ; chaque client ne fait
+que relire les derniers octets.
+"""
+import threading
+
+
+class FrameBroadcaster:
+    """Tampon de diffusion : derniers octets JPEG + numéro de séquence"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._data = None
+        self._sequence = 0
+        self._viewers = 0
+
+    @property
+    def viewers(self):
+        """Nombre de clients connectés"""
+        return self._viewers
+
+    def publish(self, data):
+        """Publie une nouvelle image encodée et réveille les clients"""
+        with self._condition:
+            self._data = data
+            self._sequence += 1
+            self._condition.notify_all()
+
+    def wait_next(self, last_sequence, timeout=1.0):
+        """
+        Attend une image plus récente que `last_sequence`
+
+        Returns:
+            Tuple (sequence, octets JPEG) ; None en cas de timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > last_sequence, timeout=timeout)
+            if self._sequence > last_sequence:
+                return self._sequence, self._data
+            return last_sequence, None
+
+    def stream(self, boundary=b'frame'):
+        """
+        Générateur multipart/x-mixed-replace pour un client
+
+        Un client lent saute simplement des images : il n'influence ni le
+        pipeline ni les autres clients.
+        """
+        with self._condition:
+            self._viewers += 1
+
+        try:
+            last_sequence = 0
+            while True:
+                last_sequence, data = self.wait_next(last_sequence)
+                if data is None:
+                    continue
+
+                yield (b'--' + boundary + b'\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + data + b'\r\n')
+        finally:
+            with self._condition:
+                self._viewers -= 1
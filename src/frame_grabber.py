@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Capture vidéo dans un thread dédié
+Un seul thread possède le périphérique et publie la dernière frame avec un numéro
+de séquence : les consommateurs ne se volent plus les frames et ne bloquent plus
+sur le driver.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+sys.path.append('.')
+from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+
+class FrameGrabber:
+    """Thread de capture avec emplacement "dernière frame" partagé"""
+
+    def __init__(self, source=0, width=640, height=480, reconnect_delay=2.0, history=30,
+                 frame_event=None):
+        """
+        Args:
+            source: Index du périphérique, fichier vidéo ou URL
+            width: Largeur demandée
+            height: Hauteur demandée
+            reconnect_delay: Attente (s) avant de rouvrir une source en erreur
+            history: Nombre de frames récentes retrouvables par numéro de séquence
+            frame_event: threading.Event levé à chaque frame (partageable entre
+                plusieurs sources pour attendre la première qui publie)
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.reconnect_delay = reconnect_delay
+        self.frame_event = frame_event
+
+        self._capture = None
+        self._thread = None
+        self._running = False
+        self._condition = threading.Condition()
+
+        # Dernière frame publiée (lecture seule) et son numéro de séquence
+        self._frame = None
+        self._sequence = 0
+
+        # Anneau des dernières frames (références, aucune copie)
+        self._history = deque(maxlen=max(1, history))
+
+    def start(self):
+        """Démarre le thread de capture (sans effet s'il tourne déjà)"""
+        if self._running:
+            return self
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.source}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le thread et libère le périphérique"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def is_running(self):
+        return self._running
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def read(self):
+        """
+        Dernière frame disponible, sans attendre ni copier
+
+        La frame est partagée entre tous les consommateurs et marquée en lecture
+        seule : la copier avant de dessiner dessus.
+
+        Returns:
+            Tuple (sequence, frame) ; frame vaut None tant qu'aucune image n'est arrivée
+        """
+        with self._condition:
+            return self._sequence, self._frame
+
+    def wait_next(self, last_sequence, timeout=1.0):
+        """
+        Attend une frame plus récente que `last_sequence`
+
+        Les frames intermédiaires sont sautées : un consommateur lent reçoit
+        toujours la plus récente.
+
+        Returns:
+            Tuple (sequence, frame) ; frame vaut None en cas de timeout
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._sequence > last_sequence or not self._running,
+                timeout=timeout
+            )
+            if self._sequence > last_sequence:
+                return self._sequence, self._frame
+            return last_sequence, None
+
+    def frame_at(self, sequence):
+        """
+        Frame publiée sous le numéro `sequence`, si elle est encore dans l'anneau
+
+        Permet de ne récupérer les pixels qu'au moment où un événement en a
+        besoin, au lieu de garder une image par détection.
+
+        Returns:
+            Frame (lecture seule) ou None si elle a déjà été remplacée
+        """
+        with self._condition:
+            for frame_sequence, frame in reversed(self._history):
+                if frame_sequence == sequence:
+                    return frame
+        return None
+
+    def _open(self):
+        """Ouvre la source vidéo"""
+        capture = cv2.VideoCapture(self.source)
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+
+        # Tampon driver minimal : la lecture continue le vide, pas de latence cumulée
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if capture.isOpened():
+            logger.info(f"📹 Source vidéo {self.source} initialisée")
+        return capture
+
+    def _run(self):
+        """Boucle de capture"""
+        while self._running:
+            if self._capture is None or not self._capture.isOpened():
+                self._capture = self._open()
+                if not self._capture.isOpened():
+                    logger.error(f"❌ Impossible d'ouvrir la source vidéo {self.source}")
+                    time.sleep(self.reconnect_delay)
+                    continue
+
+            start = time.perf_counter()
+            success, frame = self._capture.read()
+
+            if not success:
+                logger.error("❌ Erreur de lecture frame, réouverture de la source")
+                self._capture.release()
+                self._capture = None
+                time.sleep(self.reconnect_delay)
+                continue
+
+            METRICS.observe("capture", time.perf_counter() - start)
+
+            # cv2 alloue une nouvelle image à chaque lecture : publier la référence suffit
+            frame.flags.writeable = False
+
+            with self._condition:
+                self._frame = frame
+                self._sequence += 1
+                self._history.append((self._sequence, frame))
+                self._condition.notify_all()
+
+            if self.frame_event is not None:
+                self.frame_event.set()
+
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
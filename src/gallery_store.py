@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Stockage binaire de la galerie de visages
+Remplace les fichiers pickle par personne par une galerie unique :
+- encodings.f32 : matrice float32 (N x 128) mappable en mémoire
+- labels.i32    : index de la personne pour chaque ligne
+- gallery.json  : table des personnes et nombre de lignes valides
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou inter-processus non disponible
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_SIZE = 128
+ENCODING_DTYPE = np.float32
+LABEL_DTYPE = np.int32
+FORMAT_VERSION = 1
+
+# Relectures si gallery.json change pendant un chargement (compaction concurrente)
+LOAD_RETRIES = 5
+LOAD_RETRY_DELAY = 0.05
+
+
+class GallerySnapshot:
+    """Vue immuable de la galerie à un instant donné"""
+
+    def __init__(self, generation, encodings, labels, names, stamp, delta_start=0):
+        """
+        Args:
+            generation: Identifiant de génération (change à chaque compaction)
+            encodings: Encodings N x 128 (memmap en lecture seule)
+            labels: Index de la personne pour chaque ligne
+            names: Noms des personnes, indexés par label
+            stamp: Signature (mtime, taille) de gallery.json lue
+            delta_start: Première ligne ajoutée depuis le snapshot précédent
+        """
+        self.generation = generation
+        self.encodings = encodings
+        self.labels = labels
+        self.names = tuple(names)
+        self.stamp = stamp
+        self.delta_start = delta_start
+
+    @property
+    def count(self):
+        return len(self.encodings)
+
+    def extends(self, other):
+        """Vrai si ce snapshot ne fait qu'ajouter des lignes à `other`"""
+        return (
+            other is not None
+            and other.generation == self.generation
+            and other.count <= self.count
+            and self.names[:len(other.names)] == other.names
+        )
+
+
+class GalleryStore:
+    """Galerie de visages sur disque, en ajout seul lors des enregistrements"""
+
+    def __init__(self, faces_dir="data/faces"):
+        """
+        Args:
+            faces_dir: Dossier des visages (la galerie est créée dans faces_dir/gallery)
+        """
+        self.faces_dir = Path(faces_dir)
+        self.directory = self.faces_dir / "gallery"
+        self.encodings_file = self.directory / "encodings.f32"
+        self.labels_file = self.directory / "labels.i32"
+        self.meta_file = self.directory / "gallery.json"
+        self.lock_file = self.directory / ".lock"
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lecture
+    # ------------------------------------------------------------------
+
+    def read_meta(self):
+        """Lit la table des métadonnées (galerie vide si absente)"""
+        if not self.meta_file.exists():
+            return {
+                "version": FORMAT_VERSION,
+                "generation": None,
+                "count": 0,
+                "people": []
+            }
+
+        with open(self.meta_file, 'r') as f:
+            return json.load(f)
+
+    def load(self):
+        """
+        Charge la galerie sans copie (memmap en lecture seule)
+
+        Une compaction remplace les fichiers de données avant gallery.json : si la
+        signature de gallery.json change pendant la lecture, ou si les fichiers ne
+        correspondent pas au nombre de lignes lu, le chargement est recommencé.
+
+        Returns:
+            Tuple (encodings N x 128, labels N, noms des personnes, métadonnées)
+        """
+        return self._load_consistent()[:4]
+
+    def _load_consistent(self):
+        """Chargement cohérent avec la signature de gallery.json correspondante"""
+        for _ in range(LOAD_RETRIES):
+            stamp = self._meta_stamp()
+            try:
+                loaded = self._load_files()
+            except ValueError:
+                # Fichiers déjà remplacés, plus courts que le nombre de lignes lu
+                loaded = None
+
+            if loaded is not None and self._meta_stamp() == stamp:
+                return loaded + (stamp,)
+            time.sleep(LOAD_RETRY_DELAY)
+
+        # Écritures en rafale : lire sous le verrou des écrivains
+        with self._locked():
+            return self._load_files() + (self._meta_stamp(),)
+
+    def _load_files(self):
+        """Métadonnées puis memmap des `count` lignes valides (sans contrôle de cohérence)"""
+        meta = self.read_meta()
+        count = meta["count"]
+        names = [person["name"] for person in meta["people"]]
+
+        if count == 0:
+            encodings = np.empty((0, ENCODING_SIZE), dtype=ENCODING_DTYPE)
+            labels = np.empty(0, dtype=LABEL_DTYPE)
+            return encodings, labels, names, meta
+
+        # Seules les `count` premières lignes sont valides : un ajout interrompu
+        # peut laisser des octets en fin de fichier, ils sont ignorés ici
+        encodings = np.memmap(self.encodings_file, dtype=ENCODING_DTYPE, mode='r',
+                              shape=(count, ENCODING_SIZE))
+        labels = np.memmap(self.labels_file, dtype=LABEL_DTYPE, mode='r', shape=(count,))
+
+        return encodings, labels, names, meta
+
+    def snapshot(self, previous=None):
+        """
+        Recharge la galerie de manière incrémentale
+
+        La signature de gallery.json (mtime, taille) sert de manifeste : si elle
+        n'a pas changé, le snapshot précédent est réutilisé tel quel. Sinon seules
+        les lignes ajoutées depuis `previous` sont nouvelles (le memmap ne relit
+        rien), sauf après une compaction qui change la génération.
+
+        Args:
+            previous: Snapshot précédent (None pour un chargement complet)
+
+        Returns:
+            GallerySnapshot (éventuellement `previous` lui-même)
+        """
+        if previous is not None and self._meta_stamp() == previous.stamp:
+            return previous
+
+        encodings, labels, names, meta, stamp = self._load_consistent()
+        if previous is not None and stamp == previous.stamp:
+            return previous
+
+        snapshot = GallerySnapshot(meta.get("generation"), encodings, labels, names, stamp)
+
+        if snapshot.extends(previous):
+            snapshot.delta_start = previous.count
+
+        return snapshot
+
+    def legacy_files(self):
+        """Liste les anciens fichiers pickle encore présents"""
+        return sorted(self.faces_dir.glob("*.pkl"))
+
+    # ------------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------------
+
+    def add_person(self, name, encodings, timestamp=None):
+        """
+        Ajoute les encodings d'une personne en fin de galerie
+
+        Args:
+            name: Nom de la personne (une personne existante est complétée)
+            encodings: Liste d'encodings 128-d
+            timestamp: Horodatage de l'enregistrement (défaut : maintenant)
+
+        Returns:
+            Nombre total d'encodings dans la galerie
+        """
+        return self.add_many([(name, encodings, timestamp)])
+
+    def add_many(self, entries):
+        """
+        Ajoute plusieurs enregistrements en une seule écriture
+
+        Args:
+            entries: Liste de tuples (name, encodings, timestamp)
+
+        Returns:
+            Nombre total d'encodings dans la galerie
+        """
+        with self._locked():
+            meta = self.read_meta()
+            count = meta["count"]
+            people = meta["people"]
+            label_by_name = {person["name"]: i for i, person in enumerate(people)}
+
+            new_encodings = []
+            new_labels = []
+
+            for name, encodings, timestamp in entries:
+                block = np.asarray(encodings, dtype=ENCODING_DTYPE).reshape(-1, ENCODING_SIZE)
+                if len(block) == 0:
+                    continue
+
+                if name not in label_by_name:
+                    label_by_name[name] = len(people)
+                    people.append({"name": name, "enrollments": []})
+
+                label = label_by_name[name]
+                people[label]["enrollments"].append({
+                    "timestamp": timestamp or datetime.now().strftime("%Y%m%d_%H%M%S"),
+                    "start": count + sum(len(b) for b in new_encodings),
+                    "count": len(block)
+                })
+
+                new_encodings.append(block)
+                new_labels.append(np.full(len(block), label, dtype=LABEL_DTYPE))
+
+            if not new_encodings:
+                return count
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            # Tronquer un éventuel ajout interrompu avant d'écrire à la suite
+            self._append(self.encodings_file, np.concatenate(new_encodings),
+                         count * ENCODING_SIZE * np.dtype(ENCODING_DTYPE).itemsize)
+            self._append(self.labels_file, np.concatenate(new_labels),
+                         count * np.dtype(LABEL_DTYPE).itemsize)
+
+            meta["count"] = count + sum(len(b) for b in new_encodings)
+            if meta.get("generation") is None:
+                meta["generation"] = uuid.uuid4().hex
+            self._write_meta(meta)
+
+            return meta["count"]
+
+    def remove_person(self, name):
+        """
+        Supprime une personne et compacte la galerie
+
+        Returns:
+            True si la personne existait
+        """
+        return bool(self.remove_people([name]))
+
+    def remove_people(self, names):
+        """
+        Supprime plusieurs personnes en une seule compaction
+
+        Returns:
+            Liste des personnes supprimées (celles qui existaient)
+        """
+        with self._locked():
+            encodings, labels, current, meta = self._load_files()
+
+            names = set(names)
+            removed = [i for i, name in enumerate(current) if name in names]
+            if not removed:
+                return []
+
+            labels = np.asarray(labels)
+            keep = ~np.isin(labels, removed)
+
+            # Nouveaux index des personnes restantes
+            remap = np.cumsum([i not in removed for i in range(len(current))], dtype=LABEL_DTYPE) - 1
+
+            new_encodings = np.array(encodings[keep], dtype=ENCODING_DTYPE)
+            new_labels = np.array(remap[labels[keep]], dtype=LABEL_DTYPE)
+
+            # Décaler les plages des enregistrements restants
+            removed_rows = np.cumsum(~keep)
+            people = [person for i, person in enumerate(meta["people"]) if i not in removed]
+            for person in people:
+                for enrollment in person["enrollments"]:
+                    start = enrollment["start"]
+                    shift = int(removed_rows[start - 1]) if start > 0 else 0
+                    enrollment["start"] = start - shift
+
+            # Réécriture complète, gallery.json en dernier sous une nouvelle génération :
+            # un lecteur qui voit les nouveaux fichiers avec l'ancien gallery.json recommence
+            self._replace(self.encodings_file, new_encodings)
+            self._replace(self.labels_file, new_labels)
+
+            meta["people"] = people
+            meta["count"] = len(new_encodings)
+            meta["generation"] = uuid.uuid4().hex
+            self._write_meta(meta)
+
+            removed_names = [current[i] for i in removed]
+            for name in removed_names:
+                logger.info(f"🗑️  {name} supprimé de la galerie")
+            return removed_names
+
+    def migrate_legacy(self, remove=False):
+        """
+        Importe les anciens fichiers pickle dans la galerie
+
+        ⚠️  pickle exécute du code au chargement : n'importer que des fichiers de confiance
+
+        Args:
+            remove: Renommer les fichiers importés en .pkl.migrated
+
+        Returns:
+            Nombre de fichiers importés
+        """
+        import pickle
+
+        entries = []
+        migrated = []
+
+        for file_path in self.legacy_files():
+            try:
+                with open(file_path, 'rb') as f:
+                    data = pickle.load(f)
+                entries.append((data['name'], data['encodings'], data.get('timestamp')))
+                migrated.append(file_path)
+                logger.info(f"✅ Importé: {data['name']} ({len(data['encodings'])} encodings)")
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de l'import de {file_path}: {e}")
+
+        self.add_many(entries)
+
+        if remove:
+            for file_path in migrated:
+                file_path.rename(file_path.with_suffix(".pkl.migrated"))
+
+        return len(migrated)
+
+    # ------------------------------------------------------------------
+    # Utilitaires internes
+    # ------------------------------------------------------------------
+
+    def _meta_stamp(self):
+        """Signature de gallery.json pour détecter les modifications"""
+        try:
+            stat = self.meta_file.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _locked(self):
+        """Verrou intra et inter-processus pour les écritures"""
+        return _GalleryLock(self)
+
+    def _append(self, path, array, valid_size):
+        """Ajoute un tableau en fin de fichier après troncature à valid_size octets"""
+        mode = 'r+b' if path.exists() else 'wb'
+        with open(path, mode) as f:
+            f.truncate(valid_size)
+            f.seek(valid_size)
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _replace(self, path, array):
+        """Remplace atomiquement un fichier (les memmaps existants restent valides)"""
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _write_meta(self, meta):
+        """Écrit les métadonnées de manière atomique"""
+        tmp_path = self.meta_file.with_suffix(".json.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_file)
+
+
+class _GalleryLock:
+    """Context manager combinant verrou de thread et flock"""
+
+    def __init__(self, store):
+        self.store = store
+        self.handle = None
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        if fcntl is not None:
+            self.store.directory.mkdir(parents=True, exist_ok=True)
+            self.handle = open(self.store.lock_file, 'w')
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+        self.store._lock.release()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    parser = argparse.ArgumentParser(description="Gestion de la galerie de visages")
+    parser.add_argument("--faces-dir", default="data/faces", help="Dossier des visages")
+    parser.add_argument("--list", action="store_true", help="Lister les personnes enregistrées")
+    parser.add_argument("--remove", metavar="NOM", help="Supprimer une personne")
+    parser.add_argument("--migrate", action="store_true",
+                        help="Importer les anciens fichiers .pkl (fichiers de confiance uniquement)")
+    args = parser.parse_args()
+
+    store = GalleryStore(args.faces_dir)
+
+    if args.migrate:
+        count = store.migrate_legacy(remove=True)
+        print(f"📦 {count} fichier(s) pickle importé(s) dans {store.directory}")
+
+    if args.remove:
+        if store.remove_person(args.remove):
+            print(f"✅ {args.remove} supprimé")
+        else:
+            print(f"⚠️  {args.remove} introuvable")
+
+    if args.list or not (args.migrate or args.remove):
+        meta = store.read_meta()
+        print(f"📊 {meta['count']} encodings pour {len(meta['people'])} personne(s)")
+        for person in meta["people"]:
+            total = sum(e["count"] for e in person["enrollments"])
+            print(f"  - {person['name']} ({total} encodings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,14 @@ Permet de contrôler les appareils HA lors de reconnaissances
 """
 import requests
 import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+sys.path.append('.')
+from src.http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +25,14 @@ class HomeAssistantIntegration:
         self.url = config.get("home_assistant", "url")
         self.token = config.get("home_assistant", "token")
         
+        # Client HTTP partagé : keep-alive vers Home Assistant
+        self.http = get_http_client(config)
+        
+        # Pool d'exécution des actions en parallèle
+        max_parallel = config.get("home_assistant", "max_parallel") or 4
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="ha-action")
+        self.last_report = None
+        
         if self.enabled and self.url and self.token:
             logger.info("🏠 Intégration Home Assistant activée")
         else:
@@ -28,40 +42,95 @@ class HomeAssistantIntegration:
         """
         Exécute les actions Home Assistant configurées
         
+        Les actions d'un même groupe ("group", 0 par défaut) sont lancées en
+        parallèle ; les groupes s'enchaînent par ordre croissant. La latence
+        totale est celle de l'action la plus lente de chaque groupe.
+        
         Args:
             event_type: "on_arrival" ou "on_departure"
             name: Nom de la personne (pour personnalisation)
+        
+        Returns:
+            Rapport {event, name, success, duration, actions: [...]}
         """
+        report = {
+            "event": event_type,
+            "name": name,
+            "success": True,
+            "duration": 0.0,
+            "actions": []
+        }
+        
         if not self.enabled:
-            return
+            return report
         
         actions = self.config.get("home_assistant", "actions", event_type)
         
         if not actions:
-            return
+            return report
         
         # Récupérer le message personnalisé si existe
         custom_message = self._get_personalized_message(name, event_type)
         
+        # Regrouper les actions par groupe d'ordonnancement
+        groups = {}
         for action in actions:
-            service = action.get("service", "")
+            groups.setdefault(action.get("group", 0), []).append(
+                self._personalize_action(action, name, custom_message)
+            )
+        
+        start = time.monotonic()
+        
+        for group in sorted(groups):
+            futures = [
+                (action, self.executor.submit(self._timed_call, action))
+                for action in groups[group]
+            ]
             
-            # Si c'est une action TTS, personnaliser le message
-            if "tts" in service.lower():
-                personalized_action = action.copy()
-                personalized_action["data"] = action.get("data", {}).copy()
-                
-                # Utiliser message personnalisé si existe, sinon remplacer {name}
-                if custom_message:
-                    personalized_action["data"]["message"] = custom_message
-                elif "message" in personalized_action["data"] and name:
-                    original_message = personalized_action["data"]["message"]
-                    personalized_action["data"]["message"] = original_message.replace("{name}", name)
-                
-                self._call_service(personalized_action)
-            else:
-                # Actions non-TTS : exécuter normalement
-                self._call_service(action)
+            for action, future in futures:
+                success, duration = future.result()
+                report["actions"].append({
+                    "service": action.get("service"),
+                    "entity_id": action.get("entity_id"),
+                    "group": group,
+                    "success": success,
+                    "duration": round(duration, 3)
+                })
+                report["success"] = report["success"] and success
+        
+        report["duration"] = round(time.monotonic() - start, 3)
+        self.last_report = report
+        
+        ok_count = sum(1 for a in report["actions"] if a["success"])
+        logger.info(f"🏠 {event_type}: {ok_count}/{len(report['actions'])} action(s) OK en {report['duration']:.2f}s")
+        
+        return report
+    
+    def _personalize_action(self, action, name, custom_message):
+        """Personnalise le message des actions TTS"""
+        service = action.get("service", "")
+        
+        if "tts" not in service.lower():
+            # Actions non-TTS : exécuter normalement
+            return action
+        
+        personalized_action = action.copy()
+        personalized_action["data"] = action.get("data", {}).copy()
+        
+        # Utiliser message personnalisé si existe, sinon remplacer {name}
+        if custom_message:
+            personalized_action["data"]["message"] = custom_message
+        elif "message" in personalized_action["data"] and name:
+            original_message = personalized_action["data"]["message"]
+            personalized_action["data"]["message"] = original_message.replace("{name}", name)
+        
+        return personalized_action
+    
+    def _timed_call(self, action):
+        """Appelle un service et mesure sa durée"""
+        start = time.monotonic()
+        success = self._call_service(action)
+        return success, time.monotonic() - start
     
     def _get_personalized_message(self, name, event_type):
         """
@@ -88,19 +157,19 @@ class HomeAssistantIntegration:
         return personalized_messages[name].get(message_key)
     
     def _call_service(self, action):
-        """Appelle un service Home Assistant"""
+        """Appelle un service Home Assistant (renvoie True si l'appel a réussi)"""
         entity_id = action.get("entity_id")
         service = action.get("service")
         data = action.get("data", {})
         
         if not entity_id or not service:
             logger.error("❌ Action HA invalide: entity_id ou service manquant")
-            return
+            return False
         
         # Extraire domain et service du format "domain.service"
         if "." not in service:
             logger.error(f"❌ Format service invalide: {service}")
-            return
+            return False
         
         domain, service_name = service.split(".", 1)
         
@@ -124,18 +193,22 @@ class HomeAssistantIntegration:
             logger.debug(f"   URL: {url}")
             logger.debug(f"   Payload: {payload}")
             
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self.http.post(url, json=payload, headers=headers)
             
             if response.status_code in [200, 201]:
                 logger.info(f"✅ Home Assistant: {service} OK")
-            else:
-                logger.error(f"❌ Home Assistant erreur: {response.status_code}")
-                logger.error(f"   Réponse: {response.text}")
+                return True
+            
+            logger.error(f"❌ Home Assistant erreur: {response.status_code}")
+            logger.error(f"   Réponse: {response.text}")
+            return False
         
         except requests.exceptions.Timeout:
             logger.error(f"❌ Home Assistant timeout: {url}")
+            return False
         except Exception as e:
             logger.error(f"❌ Home Assistant erreur: {e}")
+            return False
     
     def test_connection(self):
         """Test la connexion à Home Assistant"""
@@ -146,7 +219,7 @@ class HomeAssistantIntegration:
         headers = {"Authorization": f"Bearer {self.token}"}
         
         try:
-            response = requests.get(url, headers=headers, timeout=5)
+            response = self.http.get(url, headers=headers)
             if response.status_code == 200:
                 logger.info("✅ Connexion Home Assistant OK")
                 return True
@@ -160,9 +233,9 @@ class HomeAssistantIntegration:
     def trigger_on_arrival(self, name):
         """Actions lors d'une arrivée avec message personnalisé"""
         logger.info(f"🏠 Déclenchement actions arrivée pour {name}")
-        self.execute_actions("on_arrival", name)
+        return self.execute_actions("on_arrival", name)["success"]
     
     def trigger_on_departure(self, name):
         """Actions lors d'un départ avec message personnalisé"""
         logger.info(f"🏠 Déclenchement actions départ pour {name}")
-        self.execute_actions("on_departure", name)
\ No newline at end of file
+        return self.execute_actions("on_departure", name)["success"]
\ No newline at end of file
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Client HTTP partagé avec pool de connexions
+Une seule session requests pour Discord et Home Assistant : les connexions
+TCP/TLS restent ouvertes (keep-alive) et sont réutilisées par hôte.
+"""
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de la section "http"
+DEFAULT_HTTP_SETTINGS = {
+    "pool_connections": 4,    # Nombre d'hôtes gardés en pool
+    "pool_maxsize": 8,        # Connexions gardées par hôte (>= workers d'envoi)
+    "connect_timeout": 3.05,  # Timeout d'établissement de connexion (s)
+    "read_timeout": 10        # Timeout de lecture par défaut (s)
+}
+
+
+class HttpClient:
+    """Session requests avec pool par hôte et timeouts par défaut"""
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Paramètres de la section "http" (complétés par les défauts)
+        """
+        self.settings = dict(DEFAULT_HTTP_SETTINGS)
+        self.settings.update(settings or {})
+
+        adapter = HTTPAdapter(
+            pool_connections=self.settings["pool_connections"],
+            pool_maxsize=self.settings["pool_maxsize"],
+            pool_block=False
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.default_timeout = (self.settings["connect_timeout"], self.settings["read_timeout"])
+
+    def request(self, method, url, **kwargs):
+        """Requête sur la session partagée (timeout par défaut si non précisé)"""
+        kwargs.setdefault("timeout", self.default_timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """Ferme toutes les connexions du pool"""
+        self.session.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client(config=None):
+    """
+    Client HTTP partagé par tout le processus
+
+    Le premier appel fixe les paramètres (section "http" de la configuration).
+    """
+    global _shared_client
+
+    with _shared_lock:
+        if _shared_client is None:
+            settings = config.get("http") if config is not None else None
+            _shared_client = HttpClient(settings)
+            logger.info(f"🌐 Client HTTP partagé (pool de {_shared_client.settings['pool_maxsize']} connexions par hôte)")
+
+    return _shared_client
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Mesures de performance du pipeline
+Chronomètres par étape (capture, prétraitement, détection, encodage,
+appariement, dessin, JPEG, notifications) enregistrés dans des histogrammes à
+seaux fixes, et jauges lues à la demande (files d'attente, frames perdues).
+Le tout est exporté au format texte Prometheus (route /metrics).
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+
+# Bornes des seaux (secondes) : de 0,5 ms à 2,5 s
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+STAGE_METRIC = "face_stage_duration_seconds"
+
+
+class Histogram:
+    """Histogramme cumulable : un compteur par seau, somme et nombre d'observations"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # Dernier seau : +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """Tuple (comptes cumulés par seau, somme, nombre)"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        cumulative = []
+        running = 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class _Timer:
+    """Chronomètre d'une étape (with METRICS.time("detect"): ...)"""
+
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _Capture:
+    """Observations gardées en liste (worker d'un autre processus) au lieu des histogrammes"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.observations = []
+
+    def __enter__(self):
+        self.registry._local.capture = self.observations
+        return self.observations
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry._local.capture = None
+        return False
+
+
+class MetricsRegistry:
+    """Histogrammes par étape et jauges lues au moment de l'export"""
+
+    def __init__(self):
+        self._stages = {}
+        self._collectors = []        # (nom, aide, type, fonction)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def time(self, stage):
+        """Chronomètre une étape : `with METRICS.time("encode"):`"""
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        """Enregistre une durée mesurée ailleurs"""
+        capture = getattr(self._local, "capture", None)
+        if capture is not None:
+            capture.append((stage, seconds))
+            return
+
+        histogram = self._stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._stages.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def capture(self):
+        """
+        Redirige les observations de ce thread vers une liste
+
+        Utilisé par les workers du pool : leurs mesures repartent avec le résultat
+        et sont ajoutées aux histogrammes du processus principal (merge).
+        """
+        return _Capture(self)
+
+    def merge(self, observations):
+        """Ajoute des observations (stage, secondes) rapportées par un worker"""
+        for stage, seconds in observations:
+            self.observe(stage, seconds)
+
+    def register(self, name, help_text, collect, kind="gauge"):
+        """
+        Ajoute une mesure lue à chaque export
+
+        Args:
+            name: Nom Prometheus (ex: "face_pool_pending")
+            help_text: Description
+            collect: Fonction sans argument renvoyant une valeur, ou une liste
+                de tuples (dict de labels, valeur)
+            kind: "gauge" ou "counter"
+        """
+        with self._lock:
+            self._collectors = [c for c in self._collectors if c[0] != name]
+            self._collectors.append((name, help_text, kind, collect))
+
+    def summary(self):
+        """Nombre d'observations et durée moyenne (ms) par étape (bilan en fin d'exécution)"""
+        result = {}
+        for stage, histogram in sorted(self._stages.items()):
+            _, total, count = histogram.snapshot()
+            if count:
+                result[stage] = {"count": count, "mean_ms": round(total / count * 1000, 2)}
+        return result
+
+    def log_summary(self, logger):
+        """Écrit le bilan par étape dans les logs"""
+        for stage, values in self.summary().items():
+            logger.info(f"⏱️  {stage}: {values['mean_ms']} ms en moyenne ({values['count']} mesures)")
+
+    def render(self):
+        """Export au format texte Prometheus (version 0.0.4)"""
+        lines = [
+            f"# HELP {STAGE_METRIC} Durée de chaque étape du pipeline",
+            f"# TYPE {STAGE_METRIC} histogram"
+        ]
+
+        for stage, histogram in sorted(self._stages.items()):
+            cumulative, total, count = histogram.snapshot()
+            bounds = [_format_value(bound) for bound in histogram.buckets] + ["+Inf"]
+            for bound, value in zip(bounds, cumulative):
+                lines.append(f'{STAGE_METRIC}_bucket{{stage="{stage}",le="{bound}"}} {value}')
+            lines.append(f'{STAGE_METRIC}_sum{{stage="{stage}"}} {_format_value(total)}')
+            lines.append(f'{STAGE_METRIC}_count{{stage="{stage}"}} {count}')
+
+        for name, help_text, kind, collect in list(self._collectors):
+            try:
+                samples = collect()
+            except Exception:
+                continue
+            if samples is None:
+                continue
+            if not isinstance(samples, list):
+                samples = [({}, samples)]
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+# Registre partagé par tous les modules du processus
+METRICS = MetricsRegistry()
+
+
+class FPSCounter:
+    """Compteur de FPS"""
+
+    def __init__(self):
+        self.fps = 0
+        self.frame_count = 0
+        self.start_time = datetime.now()
+
+    def update(self):
+        """Met à jour le compteur FPS"""
+        self.frame_count += 1
+        elapsed = (datetime.now() - self.start_time).total_seconds()
+
+        if elapsed > 1.0:
+            self.fps = self.frame_count / elapsed
+            self.frame_count = 0
+            self.start_time = datetime.now()
+
+        return self.fps
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Détection de mouvement avant la reconnaissance
+Différence avec un fond moyen sur une vignette en niveaux de gris : quand la
+scène est immobile, la détection HOG et l'encodage sont sautés.
+"""
+import time
+
+import cv2
+
+# Valeurs par défaut de recognition.motion
+DEFAULT_MOTION_SETTINGS = {
+    "enabled": True,
+    "thumbnail_width": 64,     # Largeur de la vignette analysée (px)
+    "pixel_threshold": 20,     # Écart de niveau de gris compté comme changement
+    "min_changed": 0.01,       # Part minimale de pixels changés pour un mouvement
+    "learning_rate": 0.05,     # Vitesse d'adaptation du fond (éclairage)
+    "hold": 2.0,               # Secondes de traitement après le dernier mouvement
+    "max_idle": 30.0           # Reconnaissance forcée après N secondes sans mouvement
+}
+
+
+class MotionGate:
+    """Porte de mouvement : laisse passer les frames quand la scène bouge"""
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Paramètres recognition.motion (complétés par les défauts)
+        """
+        self.settings = dict(DEFAULT_MOTION_SETTINGS)
+        self.settings.update(settings or {})
+
+        self._background = None
+        self._last_motion = None
+        self._last_open = None
+        self._active = True
+
+        self.woke = False          # La scène vient de se remettre à bouger
+        self.changed = 0.0         # Part de pixels changés sur la dernière frame
+
+        self.stats = {"frames": 0, "idle_frames": 0, "wakeups": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Crée la porte depuis recognition.motion
+
+        Returns:
+            MotionGate, ou None si la détection de mouvement est désactivée
+        """
+        settings = dict(DEFAULT_MOTION_SETTINGS)
+        settings.update(config.get("recognition", "motion") or {})
+
+        if not settings["enabled"]:
+            return None
+
+        return cls(settings)
+
+    @property
+    def active(self):
+        """True tant que la scène est considérée comme animée"""
+        return self._active
+
+    def update(self, frame, now=None):
+        """
+        Analyse une frame (coût : une vignette de quelques milliers de pixels)
+
+        Args:
+            frame: Image BGR
+            now: Instant (time.monotonic() par défaut)
+
+        Returns:
+            True si la reconnaissance doit tourner sur cette frame
+        """
+        if now is None:
+            now = time.monotonic()
+
+        self.stats["frames"] += 1
+        thumbnail = self._thumbnail(frame)
+
+        if self._background is None:
+            self._background = thumbnail.astype("float32")
+            self._last_motion = now
+            self._last_open = now
+            return True
+
+        diff = cv2.absdiff(thumbnail, cv2.convertScaleAbs(self._background))
+        self.changed = float((diff > self.settings["pixel_threshold"]).mean())
+        cv2.accumulateWeighted(thumbnail, self._background, self.settings["learning_rate"])
+
+        was_active = self._active
+        if self.changed >= self.settings["min_changed"]:
+            self._last_motion = now
+
+        self._active = now - self._last_motion <= self.settings["hold"]
+        self.woke = self._active and not was_active
+        if self.woke:
+            self.stats["wakeups"] += 1
+
+        # Vérification périodique même sans mouvement (personne immobile, dérive)
+        if not self._active and now - self._last_open >= self.settings["max_idle"]:
+            self._last_open = now
+            return True
+
+        if self._active:
+            self._last_open = now
+        else:
+            self.stats["idle_frames"] += 1
+
+        return self._active
+
+    def reset(self):
+        """Oublie le fond (nouvelle source, horloge remise à zéro)"""
+        self._background = None
+        self._last_motion = None
+        self._last_open = None
+        self._active = True
+        self.woke = False
+
+    def status(self):
+        return {
+            "active": self._active,
+            "changed": round(self.changed, 4),
+            **self.stats
+        }
+
+    def _thumbnail(self, frame):
+        """Vignette en niveaux de gris, légèrement floutée (bruit capteur)"""
+        height, width = frame.shape[:2]
+        thumb_width = self.settings["thumbnail_width"]
+        thumb_height = max(1, int(height * thumb_width / width))
+
+        small = cv2.resize(frame, (thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (3, 3), 0)
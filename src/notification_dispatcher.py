@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+File d'envoi asynchrone des notifications
+La boucle vidéo se contente d'ajouter des tâches ; un pool de workers effectue
+les appels réseau (Discord, Home Assistant) avec relances et backoff.
+"""
+import atexit
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+
+sys.path.append('.')
+from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de notifications.dispatch
+DEFAULT_DISPATCH_SETTINGS = {
+    "workers": 2,              # Threads d'envoi
+    "max_queue": 100,          # Tâches en attente au maximum
+    "policy": "drop_oldest",   # File pleine : "drop_oldest" ou "drop_new"
+    "backoff": 1.0,            # Délai initial avant relance (s), doublé à chaque échec
+    "max_backoff": 30.0,       # Délai maximal entre deux relances (s)
+    "retries": {
+        "discord": 3,
+        "home_assistant": 0    # Pas de relance : un TTS ne doit pas être répété
+    }
+}
+
+
+class _Task:
+    """Tâche d'envoi vers une destination"""
+
+    __slots__ = ("destination", "action", "args", "key", "attempt", "not_before", "cancelled")
+
+    def __init__(self, destination, action, args, key):
+        self.destination = destination
+        self.action = action
+        self.args = args
+        self.key = key
+        self.attempt = 0
+        self.not_before = 0.0
+        self.cancelled = False
+
+
+class NotificationDispatcher:
+    """File bornée + pool de workers avec relances par destination"""
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Paramètres notifications.dispatch (complétés par les défauts)
+        """
+        self.settings = dict(DEFAULT_DISPATCH_SETTINGS)
+        self.settings.update(settings or {})
+        self.retries = dict(DEFAULT_DISPATCH_SETTINGS["retries"])
+        self.retries.update(self.settings.get("retries") or {})
+
+        self._condition = threading.Condition()
+        self._heap = []              # (not_before, ordre, tâche)
+        self._counter = itertools.count()
+        self._pending = 0            # Tâches non annulées dans le tas
+        self._by_key = {}            # Clé de regroupement -> tâche en attente
+        self._running = True
+
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "dropped": 0, "coalesced": 0}
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"notify-{i}", daemon=True)
+            for i in range(max(1, int(self.settings["workers"])))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        atexit.register(self.stop)
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée le dispatcher depuis la section notifications.dispatch"""
+        return cls(config.get("notifications", "dispatch"))
+
+    @property
+    def depth(self):
+        """Nombre de tâches en attente"""
+        return self._pending
+
+    def submit(self, destination, action, *args, key=None):
+        """
+        Ajoute une tâche sans jamais attendre le réseau
+
+        Args:
+            destination: Nom de la destination ("discord", "home_assistant"...)
+            action: Fonction d'envoi, renvoie False en cas d'échec (relance)
+            *args: Arguments de la fonction
+            key: Clé de regroupement : une tâche en attente de même clé est remplacée
+
+        Returns:
+            True si la tâche a été acceptée
+        """
+        task = _Task(destination, action, args, key)
+
+        with self._condition:
+            if not self._running:
+                return False
+
+            # Regroupement : la nouvelle tâche remplace l'ancienne encore en attente
+            if key is not None and key in self._by_key:
+                self._cancel(self._by_key.pop(key))
+                self.stats["coalesced"] += 1
+
+            if self._pending >= self.settings["max_queue"]:
+                if self.settings["policy"] == "drop_new":
+                    self.stats["dropped"] += 1
+                    logger.warning(f"⚠️  File de notifications pleine, {destination} ignoré")
+                    return False
+                self._drop_oldest()
+
+            self._push(task)
+            self.stats["queued"] += 1
+            return True
+
+    def stop(self, timeout=5.0):
+        """Arrête les workers après avoir vidé la file (dans la limite du timeout)"""
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            while self._pending and time.monotonic() < deadline:
+                self._condition.wait(timeout=0.1)
+            self._running = False
+            self._condition.notify_all()
+
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    # ------------------------------------------------------------------
+    # Interne
+    # ------------------------------------------------------------------
+
+    def _push(self, task):
+        heapq.heappush(self._heap, (task.not_before, next(self._counter), task))
+        self._pending += 1
+        if task.key is not None:
+            self._by_key[task.key] = task
+        self._condition.notify()
+
+    def _cancel(self, task):
+        task.cancelled = True
+        self._pending -= 1
+
+    def _drop_oldest(self):
+        """Retire la tâche la plus ancienne encore en attente"""
+        oldest = min(
+            (entry for entry in self._heap if not entry[2].cancelled),
+            key=lambda entry: entry[1],
+            default=None
+        )
+        if oldest is None:
+            return
+
+        task = oldest[2]
+        if task.key is not None:
+            self._by_key.pop(task.key, None)
+        self._cancel(task)
+        self.stats["dropped"] += 1
+        logger.warning(f"⚠️  File de notifications pleine, plus ancienne tâche {task.destination} abandonnée")
+
+    def _next_task(self):
+        """Attend la prochaine tâche prête (None à l'arrêt)"""
+        with self._condition:
+            while True:
+                # Purger les tâches annulées en tête
+                while self._heap and self._heap[0][2].cancelled:
+                    heapq.heappop(self._heap)
+
+                # Arrêt : stop() a déjà laissé le temps de vider la file
+                if not self._running:
+                    return None
+
+                if self._heap:
+                    not_before = self._heap[0][0]
+                    delay = not_before - time.monotonic()
+                    if delay <= 0:
+                        task = heapq.heappop(self._heap)[2]
+                        self._pending -= 1
+                        if task.key is not None and self._by_key.get(task.key) is task:
+                            del self._by_key[task.key]
+                        return task
+                    self._condition.wait(timeout=delay)
+                else:
+                    self._condition.wait()
+
+    def _work(self):
+        """Boucle d'un worker"""
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+
+            try:
+                with METRICS.time(f"notify_{task.destination}"):
+                    success = task.action(*task.args)
+            except Exception as e:
+                logger.error(f"❌ Erreur envoi {task.destination}: {e}")
+                success = False
+
+            with self._condition:
+                if success is not False:
+                    self.stats["sent"] += 1
+                elif task.key is not None and task.key in self._by_key:
+                    # Une tâche plus récente de même clé attend déjà : pas de relance
+                    self.stats["coalesced"] += 1
+                elif task.attempt < self.retries.get(task.destination, 0) and self._running:
+                    # Relance différée, avec backoff exponentiel
+                    delay = min(self.settings["backoff"] * (2 ** task.attempt), self.settings["max_backoff"])
+                    task.attempt += 1
+                    task.not_before = time.monotonic() + delay
+                    logger.warning(f"🔁 Relance {task.destination} dans {delay:.1f}s (tentative {task.attempt})")
+                    self._push(task)
+                else:
+                    self.stats["failed"] += 1
+                    logger.error(f"❌ Échec définitif de l'envoi {task.destination}")
+
+                self._condition.notify_all()
@@ -3,18 +3,33 @@
 Module de notifications avec détection arrivée/départ
 Support Discord, Telegram, Email, Webhook
 """
-import requests
 import json
 import logging
+from collections import namedtuple
 from datetime import datetime, timedelta
 import cv2
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 import sys
 sys.path.append('.')
 from src.home_assistant_integration import HomeAssistantIntegration
+from src.notification_dispatcher import NotificationDispatcher
+from src.http_client import get_http_client
+from src.recognition_debounce import RecognitionDebouncer
+from src.metrics import METRICS
+
+# Valeurs par défaut de notifications.discord.image
+DEFAULT_IMAGE_SETTINGS = {
+    "quality": 80,        # Qualité JPEG (0-100)
+    "max_width": 640,     # Largeur maximale envoyée (0 = taille d'origine)
+    "crop_face": False,   # Recadrer sur le visage reconnu
+    "crop_margin": 0.5    # Marge autour du visage (fraction de sa taille)
+}
+
+# Détection légère transmise au suivi de présence : pas de pixels, seulement
+# la position du visage et le numéro de la frame d'origine
+Detection = namedtuple("Detection", ["name", "confidence", "location", "sequence"])
 
 class NotificationManager:
     """Gestionnaire de notifications avec détection présence"""
@@ -29,16 +44,28 @@ class NotificationManager:
         self.absence_threshold = 10  # Secondes sans détection = parti
         self.min_presence_duration = 3  # Secondes minimum de présence avant notification départ
 
+        # Client HTTP partagé (connexions réutilisées entre les envois)
+        self.http = get_http_client(config)
+        
         # Intégration Home Assistant
         self.ha_integration = HomeAssistantIntegration(config)
         
+        # File d'envoi asynchrone : la boucle vidéo n'attend jamais le réseau
+        self.dispatcher = NotificationDispatcher.from_config(config)
+        
+        # Délai minimum entre deux notifications Discord d'une même personne
+        cooldown = config.get("notifications", "discord", "cooldown") or 0
+        self.discord_cooldown = RecognitionDebouncer(min_interval=cooldown, confidence_delta=None)
+        
     
-    def update_presence(self, detected_people):
+    def update_presence(self, detected_people, frame_lookup=None):
         """
         Met à jour l'état de présence et retourne les événements (arrivée/départ)
         
         Args:
-            detected_people: Liste de tuples (name, confidence, frame)
+            detected_people: Liste de Detection (name, confidence, location, sequence)
+            frame_lookup: Fonction sequence -> frame, appelée uniquement quand
+                une arrivée a besoin d'une capture (ex: FrameGrabber.frame_at)
         
         Returns:
             Liste d'événements: [{"type": "arrival/departure", "name": str, "data": dict}]
@@ -49,7 +76,7 @@ class NotificationManager:
         # Marquer qui est présent maintenant
         currently_present = set()
         
-        for name, confidence, frame in detected_people:
+        for name, confidence, face_location, sequence in detected_people:
             if name == "Inconnu":
                 continue
             
@@ -64,12 +91,20 @@ class NotificationManager:
                     "arrival_time": current_time
                 }
                 
+                # Pixels récupérés seulement maintenant, dans l'anneau de frames
+                frame = frame_lookup(sequence) if frame_lookup is not None else None
+                if frame_lookup is not None and frame is None:
+                    logger.warning(f"⚠️  Frame {sequence} déjà sortie de l'historique : "
+                                   f"arrivée de {name} sans capture (augmenter camera.history)")
+                
                 events.append({
                     "type": "arrival",
                     "name": name,
                     "data": {
                         "confidence": confidence,
                         "frame": frame,
+                        "face_location": face_location,
+                        "frame_sequence": sequence,
                         "timestamp": current_time
                     }
                 })
@@ -111,7 +146,7 @@ class NotificationManager:
         return events
     
     def process_events(self, events):
-        """Traite les événements et envoie les notifications appropriées"""
+        """Met en file les notifications des événements (ne bloque jamais)"""
         for event in events:
             if event["type"] == "arrival":
                 self._notify_arrival(event["name"], event["data"])
@@ -120,21 +155,35 @@ class NotificationManager:
     
     def _notify_arrival(self, name, data):
         """Notification d'arrivée"""
-        if self.config.get("notifications", "discord", "enabled"):
-            self._send_discord_arrival(name, data)
+        if (self.config.get("notifications", "discord", "enabled")
+                and self._discord_allowed("arrival", name)):
+            self.dispatcher.submit("discord", self._send_discord_arrival, name, data,
+                                   key=("discord", "arrival", name))
 
         # Déclencher actions Home Assistant
-        if self.ha_integration:
-            self.ha_integration.trigger_on_arrival(name)
+        if self.ha_integration and self.ha_integration.enabled:
+            self.dispatcher.submit("home_assistant", self.ha_integration.trigger_on_arrival, name,
+                                   key=("home_assistant", "arrival", name))
     
     def _notify_departure(self, name, data):
         """Notification de départ"""
-        if self.config.get("notifications", "discord", "enabled"):
-            self._send_discord_departure(name, data)
+        if (self.config.get("notifications", "discord", "enabled")
+                and self._discord_allowed("departure", name)):
+            self.dispatcher.submit("discord", self._send_discord_departure, name, data,
+                                   key=("discord", "departure", name))
 
         # Déclencher actions Home Assistant
-        if self.ha_integration:
-            self.ha_integration.trigger_on_departure(name)
+        if self.ha_integration and self.ha_integration.enabled:
+            self.dispatcher.submit("home_assistant", self.ha_integration.trigger_on_departure, name,
+                                   key=("home_assistant", "departure", name))
+    
+    def _discord_allowed(self, event_type, name):
+        """Respecte notifications.discord.cooldown (par personne et par type)"""
+        if self.discord_cooldown.should_emit((event_type, name)):
+            return True
+        
+        logger.info(f"⏳ Notification Discord ({event_type}) de {name} ignorée (cooldown)")
+        return False
     
     def _send_discord_arrival(self, name, data):
         """Envoie une notification Discord d'arrivée"""
@@ -184,19 +233,25 @@ class NotificationManager:
             
             # Envoyer avec image si demandé
             if send_image and data["frame"] is not None:
-                self._send_with_image(webhook_url, payload, data["frame"], f"arrival_{name}")
-            else:
-                response = requests.post(
-                    webhook_url,
-                    json=payload,
-                    headers={'Content-Type': 'application/json'}
-                )
-                
-                if response.status_code in [200, 204]:
-                    logger.info(f"✅ Notification Discord (arrivée) envoyée pour {name}")
+                return self._send_with_image(webhook_url, payload, data["frame"], f"arrival_{name}",
+                                             data.get("face_location"))
+            
+            response = self.http.post(
+                webhook_url,
+                json=payload,
+                headers={'Content-Type': 'application/json'}
+            )
+            
+            if response.status_code in [200, 204]:
+                logger.info(f"✅ Notification Discord (arrivée) envoyée pour {name}")
+                return True
+            
+            logger.error(f"❌ Discord a répondu {response.status_code}")
+            return False
         
         except Exception as e:
             logger.error(f"❌ Erreur envoi Discord: {e}")
+            return False
     
     def _send_discord_departure(self, name, data):
         """Envoie une notification Discord de départ"""
@@ -241,7 +296,7 @@ class NotificationManager:
             
             payload = {"embeds": [embed]}
             
-            response = requests.post(
+            response = self.http.post(
                 webhook_url,
                 json=payload,
                 headers={'Content-Type': 'application/json'}
@@ -249,33 +304,32 @@ class NotificationManager:
             
             if response.status_code in [200, 204]:
                 logger.info(f"✅ Notification Discord (départ) envoyée pour {name}")
+                return True
+            
+            logger.error(f"❌ Discord a répondu {response.status_code}")
+            return False
         
         except Exception as e:
             logger.error(f"❌ Erreur envoi Discord: {e}")
+            return False
     
-    def _send_with_image(self, webhook_url, payload, frame, prefix):
-        """Envoie un message Discord avec image"""
+    def _send_with_image(self, webhook_url, payload, frame, prefix, face_location=None):
+        """Envoie un message Discord avec image (encodée en mémoire, aucun fichier)"""
         try:
-            # Sauvegarder temporairement l'image
-            temp_dir = Path("../../logs/temp_notifications")
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            temp_file = temp_dir / f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-            cv2.imwrite(str(temp_file), frame)
-            
-            # Envoyer avec fichier
-            with open(temp_file, 'rb') as f:
-                files = {
-                    'file': (temp_file.name, f, 'image/jpeg')
-                }
-                response = requests.post(
-                    webhook_url,
-                    data={'payload_json': json.dumps(payload)},
-                    files=files
-                )
+            image = self._encode_snapshot(frame, face_location)
+            if image is None:
+                logger.error("❌ Encodage JPEG de la capture impossible")
+                return False
             
-            # Nettoyer le fichier temporaire
-            temp_file.unlink()
+            filename = f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+            files = {
+                'file': (filename, image, 'image/jpeg')
+            }
+            response = self.http.post(
+                webhook_url,
+                data={'payload_json': json.dumps(payload)},
+                files=files
+            )
             
             return response.status_code in [200, 204]
         
@@ -283,6 +337,45 @@ class NotificationManager:
             logger.error(f"❌ Erreur envoi image: {e}")
             return False
     
+    def _encode_snapshot(self, frame, face_location=None):
+        """
+        Encode la capture en JPEG directement en mémoire
+        
+        Args:
+            frame: Image BGR (jamais modifiée)
+            face_location: (top, right, bottom, left) pour recadrer sur le visage
+        
+        Returns:
+            Octets JPEG ou None
+        """
+        settings = dict(DEFAULT_IMAGE_SETTINGS)
+        settings.update(self.config.get("notifications", "discord", "image") or {})
+        
+        # Recadrage autour du visage (vue, pas de copie)
+        if settings["crop_face"] and face_location is not None:
+            top, right, bottom, left = face_location
+            margin_y = int((bottom - top) * settings["crop_margin"])
+            margin_x = int((right - left) * settings["crop_margin"])
+            height, width = frame.shape[:2]
+            frame = frame[
+                max(0, top - margin_y):min(height, bottom + margin_y),
+                max(0, left - margin_x):min(width, right + margin_x)
+            ]
+        
+        # Réduction si l'image dépasse la largeur maximale
+        max_width = settings["max_width"]
+        if max_width and frame.shape[1] > max_width:
+            scale = max_width / frame.shape[1]
+            frame = cv2.resize(frame, (max_width, max(1, int(frame.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+        
+        with METRICS.time("snapshot"):
+            success, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(settings["quality"])])
+        if not success:
+            return None
+        
+        return buffer.tobytes()
+    
     def _format_duration(self, seconds):
         """Formate une durée en secondes en format lisible"""
         if seconds < 60:
@@ -297,7 +390,11 @@ class NotificationManager:
             return f"{hours}h {minutes} min"
     
     def send_new_registration(self, name):
-        """Notification pour un nouveau visage enregistré"""
+        """Notification pour un nouveau visage enregistré (mise en file, ne bloque pas)"""
+        self.dispatcher.submit("discord", self._send_discord_registration, name)
+    
+    def _send_discord_registration(self, name):
+        """Envoie la notification Discord d'enregistrement"""
         webhook_url = self.config.get("notifications", "discord", "webhook_url")
         
         if not webhook_url or webhook_url == "TON_URL_WEBHOOK_ICI":
@@ -327,7 +424,7 @@ class NotificationManager:
             
             payload = {"embeds": [embed]}
             
-            response = requests.post(
+            response = self.http.post(
                 webhook_url,
                 json=payload,
                 headers={'Content-Type': 'application/json'}
@@ -335,6 +432,11 @@ class NotificationManager:
             
             if response.status_code in [200, 204]:
                 logger.info(f"✅ Notification enregistrement envoyée pour {name}")
+                return True
+            
+            logger.error(f"❌ Discord a répondu {response.status_code}")
+            return False
         
         except Exception as e:
-            logger.error(f"❌ Erreur notification enregistrement: {e}")
\ No newline at end of file
+            logger.error(f"❌ Erreur notification enregistrement: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Anti-rebond des reconnaissances par identité
+Placé entre l'appariement et le journal / les notifications : une personne
+immobile devant la caméra ne produit plus une ligne par frame traitée.
+"""
+import threading
+import time
+
+# Valeurs par défaut de recognition.debounce
+DEFAULT_DEBOUNCE_SETTINGS = {
+    "min_interval": 5.0,       # Secondes minimum entre deux émissions pour une personne
+    "confidence_delta": 0.05   # ... sauf si la confiance a changé d'au moins cet écart
+}
+
+
+class RecognitionDebouncer:
+    """Laisse passer une reconnaissance par identité et par intervalle"""
+
+    def __init__(self, min_interval=5.0, confidence_delta=0.05):
+        """
+        Args:
+            min_interval: Intervalle minimum (s) entre deux émissions d'une même identité
+            confidence_delta: Variation de confiance qui force une émission (None = jamais)
+        """
+        self.min_interval = min_interval
+        self.confidence_delta = confidence_delta
+
+        self._lock = threading.Lock()
+        self._last = {}  # {key: (instant, confiance émise)}
+
+        self.stats = {"emitted": 0, "suppressed": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """Crée l'anti-rebond depuis recognition.debounce"""
+        settings = dict(DEFAULT_DEBOUNCE_SETTINGS)
+        settings.update(config.get("recognition", "debounce") or {})
+        return cls(settings["min_interval"], settings["confidence_delta"])
+
+    def should_emit(self, key, confidence=None, now=None):
+        """
+        Indique si la reconnaissance doit être journalisée / notifiée
+
+        Args:
+            key: Identité (nom, ou tuple pour séparer plusieurs flux)
+            confidence: Confiance actuelle (ignorée si None)
+            now: Instant (time.monotonic() par défaut)
+
+        Returns:
+            True pour la première reconnaissance, après `min_interval`, ou si la
+            confiance a varié d'au moins `confidence_delta`
+        """
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            last = self._last.get(key)
+
+            emit = (
+                last is None
+                or now - last[0] >= self.min_interval
+                or (self.confidence_delta is not None and confidence is not None
+                    and last[1] is not None
+                    and abs(confidence - last[1]) >= self.confidence_delta)
+            )
+
+            if emit:
+                self._last[key] = (now, confidence)
+                self.stats["emitted"] += 1
+            else:
+                self.stats["suppressed"] += 1
+
+            return emit
+
+    def reset(self, key=None):
+        """Oublie une identité (ou toutes)"""
+        with self._lock:
+            if key is None:
+                self._last.clear()
+            else:
+                self._last.pop(key, None)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Historique des reconnaissances en SQLite
+Index sur l'horodatage et le nom : les requêtes par période, par personne et
+les "N dernières" ne dépendent plus de la taille de l'historique.
+"""
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recognitions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    confidence REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recognitions_timestamp ON recognitions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_recognitions_name_timestamp ON recognitions (name, timestamp);
+"""
+
+# Regroupements disponibles pour les agrégats (expression SQL sur l'horodatage ISO)
+GROUPINGS = {
+    "name": "name",
+    "day": "substr(timestamp, 1, 10)",
+    "hour": "substr(timestamp, 1, 13)"
+}
+
+MAX_PAGE_SIZE = 500
+
+
+class RecognitionHistory:
+    """Base SQLite des reconnaissances (utilisable comme destination du journal)"""
+
+    def __init__(self, path="logs/recognitions.db"):
+        """
+        Args:
+            path: Fichier SQLite (créé au besoin)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Une connexion partagée, protégée par un verrou (écritures par lots peu fréquentes)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+
+    def write(self, rows):
+        """Insère un lot de lignes (timestamp, name, confidence) en une transaction"""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO recognitions (timestamp, name, confidence) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @property
+    def empty(self):
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM recognitions LIMIT 1").fetchone() is None
+
+    def import_csv(self, paths, batch_size=10000):
+        """
+        Importe des journaux CSV (timestamp,name,confidence), du plus ancien au plus récent
+
+        Lignes illisibles ignorées ; une seule transaction (import interrompu = base vide).
+
+        Returns:
+            Nombre de lignes importées
+        """
+        imported = 0
+
+        with self._lock, self._connection:
+            for path in paths:
+                batch = []
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        # Le nom peut contenir des virgules : horodatage en tête, confiance en fin
+                        timestamp, _, rest = line.rstrip("\n").partition(",")
+                        name, _, confidence = rest.rpartition(",")
+                        try:
+                            batch.append((timestamp, name, float(confidence)))
+                        except ValueError:
+                            continue        # En-tête ou ligne tronquée
+
+                        if len(batch) >= batch_size:
+                            imported += self._insert(batch)
+                if batch:
+                    imported += self._insert(batch)
+
+        return imported
+
+    def _insert(self, rows):
+        """Insère sans transaction propre (appelant sous verrou)"""
+        self._connection.executemany(
+            "INSERT INTO recognitions (timestamp, name, confidence) VALUES (?, ?, ?)",
+            rows
+        )
+        count = len(rows)
+        rows.clear()
+        return count
+
+    def recent(self, limit=20):
+        """
+        N dernières reconnaissances, de la plus récente à la plus ancienne
+
+        Parcours inverse de la clé primaire : coût proportionnel à N.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, timestamp, name, confidence FROM recognitions ORDER BY id DESC LIMIT ?",
+                (min(int(limit), MAX_PAGE_SIZE),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def query(self, start=None, end=None, name=None, limit=50, offset=0):
+        """
+        Reconnaissances filtrées et paginées (plus récentes d'abord)
+
+        Args:
+            start: Horodatage ISO minimum (inclus)
+            end: Horodatage ISO maximum (exclu)
+            name: Filtrer sur une personne
+            limit: Taille de page (plafonnée à MAX_PAGE_SIZE)
+            offset: Décalage de la page
+
+        Returns:
+            Dict {total, limit, offset, items}
+        """
+        where, params = self._filters(start, end, name)
+        limit = max(0, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+
+        with self._lock:
+            total = self._connection.execute(
+                f"SELECT COUNT(*) FROM recognitions{where}", params
+            ).fetchone()[0]
+            rows = self._connection.execute(
+                f"SELECT id, timestamp, name, confidence FROM recognitions{where} "
+                f"ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+
+        return {
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "items": [dict(row) for row in rows]
+        }
+
+    def counts(self, start=None, end=None, name=None, group_by="name"):
+        """
+        Nombre de reconnaissances par personne, par jour ou par heure
+
+        Returns:
+            Liste de {key, count, first, last, avg_confidence}
+        """
+        if group_by not in GROUPINGS:
+            raise ValueError(f"Regroupement inconnu: {group_by}")
+
+        where, params = self._filters(start, end, name)
+        key = GROUPINGS[group_by]
+
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {key} AS key, COUNT(*) AS count, MIN(timestamp) AS first, "
+                f"MAX(timestamp) AS last, AVG(confidence) AS avg_confidence "
+                f"FROM recognitions{where} GROUP BY {key} ORDER BY {key}",
+                params
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _filters(start, end, name):
+        """Clause WHERE (servie par les index timestamp / name+timestamp)"""
+        clauses, params = [], []
+
+        if name:
+            clauses.append("name = ?")
+            params.append(name)
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Journal des reconnaissances en arrière-plan
+La boucle vidéo ajoute les lignes dans une file en mémoire ; un thread les
+écrit par lots (taille ou délai) et fait tourner les fichiers par jour ou par
+taille. Aucune entrée/sortie disque dans la boucle vidéo.
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append('.')
+from src.recognition_history import RecognitionHistory
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de la section "recognition_log"
+DEFAULT_LOG_SETTINGS = {
+    "path": "logs/recognitions.csv",
+    "history_path": "logs/recognitions.db",  # Historique SQLite (None = désactivé)
+    "batch_size": 100,         # Écriture dès que N lignes sont en attente
+    "flush_interval": 2.0,     # ... ou au plus tard après N secondes
+    "max_queue": 10000,        # Lignes gardées en mémoire au maximum
+    "rotate": "daily",         # "daily", "size" ou "none"
+    "max_bytes": 10485760      # Taille maximale d'un fichier en rotation "size" (10 Mo)
+}
+
+CSV_HEADER = "timestamp,name,confidence\n"
+
+
+class CsvSink:
+    """Fichier CSV en ajout, gardé ouvert, avec rotation par jour ou par taille"""
+
+    def __init__(self, path, rotate="daily", max_bytes=DEFAULT_LOG_SETTINGS["max_bytes"]):
+        """
+        Args:
+            path: Fichier actif (les fichiers tournés sont rangés à côté)
+            rotate: "daily", "size" ou "none"
+            max_bytes: Taille déclenchant la rotation en mode "size"
+        """
+        self.path = Path(path)
+        self.rotate = rotate
+        self.max_bytes = max_bytes
+
+        self._file = None
+        self._day = None
+
+    def write(self, rows):
+        """Écrit un lot de lignes (timestamp, name, confidence) en un seul appel"""
+        if self._file is None:
+            self._open()
+
+        self._maybe_rotate()
+
+        self._file.write("".join(
+            f"{timestamp},{name},{confidence:.4f}\n" for timestamp, name, confidence in rows
+        ))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def files(self):
+        """Fichiers archivés puis fichier actif, du plus ancien au plus récent"""
+        archived = sorted(self.path.parent.glob(f"{self.path.stem}_*{self.path.suffix}"),
+                          key=os.path.getmtime)
+        return archived + ([self.path] if self.path.exists() else [])
+
+    def _open(self):
+        """Ouvre le fichier actif (en-tête si nouveau)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a')
+        if self._file.tell() == 0:
+            self._file.write(CSV_HEADER)
+
+        # Jour du fichier : celui de sa dernière modification s'il existait déjà
+        self._day = datetime.fromtimestamp(os.path.getmtime(self.path)).date()
+
+    def _maybe_rotate(self):
+        """Fait tourner le fichier actif si le jour ou la taille l'exige"""
+        today = datetime.now().date()
+
+        if self.rotate == "daily" and today != self._day:
+            self._rotate_to(self._day.strftime('%Y%m%d'))
+        elif self.rotate == "size" and self._file.tell() >= self.max_bytes:
+            self._rotate_to(datetime.now().strftime('%Y%m%d_%H%M%S'))
+
+    def _rotate_to(self, suffix):
+        """Renomme le fichier actif en <nom>_<suffix>.csv et en ouvre un nouveau"""
+        self.close()
+
+        target = self.path.with_name(f"{self.path.stem}_{suffix}{self.path.suffix}")
+        index = 1
+        while target.exists():
+            target = self.path.with_name(f"{self.path.stem}_{suffix}_{index}{self.path.suffix}")
+            index += 1
+
+        os.replace(self.path, target)
+        logger.info(f"🗂️  Journal archivé: {target.name}")
+
+        self._open()
+
+
+class RecognitionLogWriter:
+    """File en mémoire + thread d'écriture par lots"""
+
+    def __init__(self, settings=None, sinks=None):
+        """
+        Args:
+            settings: Paramètres "recognition_log" (complétés par les défauts)
+            sinks: Destinations (objets write(rows) / close()) ; CSV par défaut
+        """
+        self.settings = dict(DEFAULT_LOG_SETTINGS)
+        self.settings.update(settings or {})
+
+        if sinks is None:
+            sinks = [CsvSink(self.settings["path"], self.settings["rotate"], self.settings["max_bytes"])]
+        self.sinks = sinks
+        self.history = None
+
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self._running = True
+        self._flush_requested = False
+        self._writing = False
+
+        self.stats = {"written": 0, "dropped": 0, "batches": 0}
+
+        self._thread = threading.Thread(target=self._run, name="recognition-log", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, config, base_dir="."):
+        """
+        Crée le journal depuis la section "recognition_log"
+
+        Destinations : CSV, plus l'historique SQLite si `history_path` est défini.
+        Historique vide (première création) : rempli depuis les CSV existants.
+
+        Args:
+            config: Configuration
+            base_dir: Dossier de référence des chemins relatifs
+        """
+        settings = dict(DEFAULT_LOG_SETTINGS)
+        settings.update(config.get("recognition_log") or {})
+
+        base_dir = Path(base_dir)
+        csv_sink = CsvSink(base_dir / settings["path"], settings["rotate"], settings["max_bytes"])
+        sinks = [csv_sink]
+
+        history = None
+        if settings["history_path"]:
+            history = RecognitionHistory(base_dir / settings["history_path"])
+            sinks.append(history)
+
+            # Mise à jour depuis le journal CSV seul : reprendre l'historique existant
+            if history.empty:
+                imported = history.import_csv(csv_sink.files())
+                if imported:
+                    logger.info(f"📥 Historique initialisé depuis les CSV : {imported} reconnaissance(s)")
+
+        writer = cls(settings, sinks=sinks)
+        writer.history = history
+        return writer
+
+    @property
+    def depth(self):
+        """Nombre de lignes en attente d'écriture"""
+        return len(self._queue)
+
+    def log(self, name, confidence, timestamp=None):
+        """
+        Ajoute une reconnaissance à la file (ne fait jamais d'entrée/sortie)
+
+        Si la file est pleine, la ligne la plus ancienne est abandonnée.
+        """
+        if timestamp is None:
+            timestamp = datetime.now().isoformat()
+
+        with self._condition:
+            if not self._running:
+                return
+
+            if len(self._queue) >= self.settings["max_queue"]:
+                self._queue.popleft()
+                self.stats["dropped"] += 1
+
+            self._queue.append((timestamp, name, float(confidence)))
+
+            if len(self._queue) >= self.settings["batch_size"]:
+                self._condition.notify()
+
+    def flush(self, timeout=5.0):
+        """Demande l'écriture immédiate et attend que la file soit vide"""
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while (self._queue or self._writing) and time.monotonic() < deadline:
+                self._condition.wait(timeout=0.1)
+
+    def close(self, timeout=5.0):
+        """Vide la file puis arrête le thread et ferme les fichiers"""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+
+        self._thread.join(timeout=timeout)
+
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                logger.error(f"❌ Erreur fermeture journal: {e}")
+
+    # ------------------------------------------------------------------
+    # Interne
+    # ------------------------------------------------------------------
+
+    def _next_batch(self):
+        """Attend un lot complet, le délai d'écriture ou l'arrêt"""
+        deadline = time.monotonic() + self.settings["flush_interval"]
+
+        with self._condition:
+            while (self._running and not self._flush_requested
+                   and len(self._queue) < self.settings["batch_size"]):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(timeout=remaining)
+
+            batch = list(self._queue)
+            self._queue.clear()
+            self._flush_requested = False
+            self._writing = bool(batch)
+            return batch
+
+    def _run(self):
+        """Boucle du thread d'écriture"""
+        while True:
+            batch = self._next_batch()
+
+            if batch:
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception as e:
+                        logger.error(f"❌ Erreur écriture journal: {e}")
+
+                with self._condition:
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                    self._writing = False
+                    self._condition.notify_all()
+
+            # Arrêt seulement une fois la file vidée
+            if not self._running and not self._queue:
+                return
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Pool de processus de reconnaissance
+La détection HOG et l'encodage dlib tournent dans des processus séparés (pas de
+GIL). Les frames sont transmises par mémoire partagée, les résultats rendus
+dans l'ordre de soumission de chaque client (un pipeline par caméra). Une frame
+n'est envoyée qu'à un worker libre ; pool plein, la plus ancienne frame encore
+en attente est remplacée par la nouvelle (pas de latence cumulée). Un worker
+mort est redémarré, sa frame en cours rendue en erreur.
+"""
+import atexit
+import itertools
+import logging
+import multiprocessing
+import queue
+import sys
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.append('.')
+from src.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut de recognition.pool
+DEFAULT_POOL_SETTINGS = {
+    "workers": 0,              # Processus de reconnaissance (0 = dans le processus principal)
+    "max_pending": 0,          # Frames en cours ou en attente au maximum (0 = deux par worker)
+    "start_method": "spawn"    # "spawn" (sûr avec des threads) ou "fork"
+}
+
+
+def _worker_main(tasks, results):
+    """Boucle d'un worker : attache la mémoire partagée, analyse, renvoie"""
+    # Import en erreur (dépendance absente) : chaque frame est rendue en erreur
+    # au lieu d'un worker mort sans réponse
+    try:
+        from src.face_pipeline import analyze_frame
+        from src.metrics import METRICS
+        import_error = None
+    except Exception as e:
+        import_error = f"import impossible: {e}"
+
+    segments = {}              # Emplacement -> segment attaché
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        job_id, slot_id, slot_name, shape, params = task
+        start = time.monotonic()
+
+        if import_error is not None:
+            results.put((job_id, [], "full", [], 0.0, import_error, []))
+            continue
+
+        try:
+            segment = segments.get(slot_id)
+            if segment is None or segment.name != slot_name:
+                # Emplacement recréé (taille de frame changée) : détacher l'ancien segment
+                if segment is not None:
+                    segment.close()
+                segment = shared_memory.SharedMemory(name=slot_name)
+                segments[slot_id] = segment
+
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+
+            # Durées des étapes renvoyées avec le résultat (histogrammes du processus principal)
+            with METRICS.capture() as timings:
+                locations, scan, encodings = analyze_frame(frame, **params)
+            results.put((job_id, locations, scan, encodings, time.monotonic() - start, None, timings))
+
+        except Exception as e:
+            results.put((job_id, [], "full", [], time.monotonic() - start, str(e), []))
+
+    for segment in segments.values():
+        segment.close()
+
+
+class _Slot:
+    """Emplacement de mémoire partagée pour une frame"""
+
+    def __init__(self, slot_id, size):
+        self.id = slot_id
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        self.size = size
+
+    def release(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+class RecognitionPool:
+    """Workers de reconnaissance multi-processus avec résultats ordonnés"""
+
+    def __init__(self, workers=2, max_pending=0, start_method="spawn"):
+        """
+        Args:
+            workers: Nombre de processus
+            max_pending: Frames en cours ou en attente au maximum (0 = deux par worker)
+            start_method: Méthode de démarrage multiprocessing
+        """
+        self.workers = workers
+        self.max_pending = max_pending or 2 * workers
+
+        # Une file de tâches par worker : on sait quelle frame perd un worker mort
+        self._context = multiprocessing.get_context(start_method)
+        self._results = self._context.Queue()
+        self._tasks = []
+        self._processes = []
+        for index in range(workers):
+            self._start_worker(index)
+
+        self._free_slots = []
+        self._all_slots = []
+        self._slot_ids = itertools.count()
+        self._pending = {}       # job_id -> (slot, frame_index, submit_time, extra)
+        self._waiting = deque()  # (job_id, client, shape, params) pas encore envoyées
+        self._busy = {}          # worker -> job_id envoyé, résultat non reçu
+        self._done = {}          # job_id -> résultat arrivé en avance
+        self._order = {}         # client -> job_ids dans l'ordre de soumission
+        self._next_job = 0
+
+        self.stats = {"submitted": 0, "completed": 0, "dropped": 0, "errors": 0, "restarts": 0}
+
+        atexit.register(self.close)
+
+        logger.info(f"🧵 Pool de reconnaissance : {workers} processus")
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Crée le pool depuis recognition.pool
+
+        Returns:
+            RecognitionPool, ou None si `workers` vaut 0
+        """
+        settings = dict(DEFAULT_POOL_SETTINGS)
+        settings.update(config.get("recognition", "pool") or {})
+
+        if not settings["workers"]:
+            return None
+
+        return cls(settings["workers"], settings["max_pending"], settings["start_method"])
+
+    @property
+    def alive(self):
+        """Vrai si tous les workers tournent encore"""
+        return bool(self._processes) and all(process.is_alive() for process in self._processes)
+
+    @property
+    def depth(self):
+        """Frames en cours de traitement ou en attente d'un worker"""
+        return len(self._pending)
+
+    def submit(self, frame, frame_index, params, extra=None, client=None):
+        """
+        Confie une frame à un worker, sans jamais attendre
+
+        Une frame attend dans le processus principal qu'un worker se libère. Pool
+        plein : la plus ancienne frame en attente (du même client de préférence)
+        est abandonnée au profit de celle-ci, plus récente. Les frames déjà
+        envoyées à un worker vont toujours au bout.
+
+        Args:
+            frame: Image BGR uint8 (copiée dans la mémoire partagée)
+            frame_index: Numéro de la frame
+            params: Arguments de analyze_frame (regions, scale, model, padding, skip_boxes)
+            extra: Données rendues telles quelles avec le résultat
+            client: Clé du consommateur (résultats ordonnés par client)
+
+        Returns:
+            True si la frame est acceptée ; False si aucune frame en attente ne
+            peut lui céder la place (frame abandonnée)
+        """
+        if len(self._pending) >= self.max_pending and not self._drop_waiting(client):
+            self.stats["dropped"] += 1
+            return False
+
+        slot = self._take_slot(frame.nbytes)
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=slot.memory.buf)[...] = frame
+
+        job_id = self._next_job
+        self._next_job += 1
+
+        self._pending[job_id] = (slot, frame_index, time.monotonic(), extra)
+        self._order.setdefault(client, deque()).append(job_id)
+        self._waiting.append((job_id, client, frame.shape, params))
+        self.stats["submitted"] += 1
+
+        self._dispatch()
+        return True
+
+    def collect(self, timeout=0.0, client=None):
+        """
+        Résultats terminés d'un client, dans l'ordre de soumission
+
+        Les résultats des autres clients arrivés entre-temps sont gardés pour
+        eux. Les workers morts sont redémarrés, leur frame rendue en erreur.
+        À appeler depuis un seul thread.
+
+        Args:
+            timeout: Attente maximale (s) du prochain résultat attendu (0 = aucune)
+            client: Clé passée à submit
+
+        Returns:
+            Liste de dicts {frame_index, locations, scan, encodings,
+            duration, latency, extra}
+        """
+        deadline = time.monotonic() + timeout
+        order = self._order.get(client)
+        ready = []
+
+        self._reap()
+
+        while True:
+            if not order:
+                return ready
+
+            # Résultat attendu déjà arrivé : le rendre
+            if order[0] in self._done:
+                job_id = order.popleft()
+                ready.append(self._finish(job_id, self._done.pop(job_id)))
+                continue
+
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not ready:
+                    item = self._results.get(timeout=remaining)
+                else:
+                    item = self._results.get_nowait()
+            except queue.Empty:
+                # Rien n'arrive : un worker mort a peut-être emporté une frame
+                if self._reap():
+                    continue
+                return ready
+
+            # Un worker s'est libéré : lui envoyer la prochaine frame en attente
+            job_id = item[0]
+            worker = next((index for index, busy in self._busy.items() if busy == job_id), None)
+            if worker is None:
+                continue        # Frame déjà rendue en erreur (worker redémarré)
+            del self._busy[worker]
+            self._done[job_id] = item
+            self._dispatch()
+
+    def close(self):
+        """Arrête les workers et libère la mémoire partagée"""
+        if not self._processes:
+            return
+
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        for slot in self._all_slots:
+            try:
+                slot.release()
+            except FileNotFoundError:
+                pass
+        self._all_slots = []
+        self._free_slots = []
+        self._waiting.clear()
+        self._busy.clear()
+
+    # ------------------------------------------------------------------
+    # Interne
+    # ------------------------------------------------------------------
+
+    def _start_worker(self, index):
+        """Démarre (ou remplace) le worker `index` avec une file de tâches neuve"""
+        tasks = self._context.Queue()
+        process = self._context.Process(target=_worker_main, args=(tasks, self._results),
+                                        name=f"recognition-{index}", daemon=True)
+        process.start()
+
+        if index < len(self._processes):
+            self._tasks[index] = tasks
+            self._processes[index] = process
+        else:
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+    def _reap(self):
+        """
+        Redémarre les workers morts ; leur frame en cours est rendue en erreur
+
+        Returns:
+            True si une frame a été rendue en erreur
+        """
+        failed = False
+
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                continue
+
+            logger.error(f"❌ Worker de reconnaissance {process.name} arrêté "
+                         f"(code {process.exitcode}), redémarrage")
+            self.stats["restarts"] += 1
+
+            job_id = self._busy.pop(index, None)
+            if job_id is not None:
+                self._done[job_id] = (job_id, [], "full", [], 0.0, "worker arrêté", [])
+                failed = True
+
+            self._start_worker(index)
+
+        if failed:
+            self._dispatch()
+        return failed
+
+    def _dispatch(self):
+        """Envoie les frames en attente aux workers libres"""
+        for index in range(len(self._processes)):
+            if not self._waiting:
+                return
+            if index in self._busy:
+                continue
+
+            job_id, _, shape, params = self._waiting.popleft()
+            slot = self._pending[job_id][0]
+            self._tasks[index].put((job_id, slot.id, slot.memory.name, shape, params))
+            self._busy[index] = job_id
+
+    def _drop_waiting(self, client):
+        """
+        Abandonne la plus ancienne frame en attente (du même client s'il en a une)
+
+        Returns:
+            False si toutes les frames en cours sont déjà chez un worker
+        """
+        if not self._waiting:
+            return False
+
+        index = next((i for i, entry in enumerate(self._waiting) if entry[1] is client), 0)
+        job_id, owner, _, _ = self._waiting[index]
+        del self._waiting[index]
+
+        self._order[owner].remove(job_id)
+        slot = self._pending.pop(job_id)[0]
+        self._free_slots.append(slot)
+        self.stats["dropped"] += 1
+        return True
+
+    def _take_slot(self, size):
+        """Emplacement libre assez grand (créé au besoin)"""
+        for index, slot in enumerate(self._free_slots):
+            if slot.size >= size:
+                return self._free_slots.pop(index)
+
+        # Taille de frame changée : recréer un emplacement trop petit sous le même
+        # identifiant (les workers détachent alors l'ancien segment)
+        if self._free_slots:
+            old = self._free_slots.pop()
+            self._all_slots.remove(old)
+            old.release()
+            slot = _Slot(old.id, size)
+        else:
+            slot = _Slot(next(self._slot_ids), size)
+
+        self._all_slots.append(slot)
+        return slot
+
+    def _finish(self, job_id, item):
+        """Libère l'emplacement et met en forme le résultat"""
+        _, locations, scan, encodings, duration, error, timings = item
+        slot, frame_index, submitted_at, extra = self._pending.pop(job_id)
+        self._free_slots.append(slot)
+
+        latency = time.monotonic() - submitted_at
+        METRICS.merge(timings)
+        METRICS.observe("pool_latency", latency)
+
+        if error is not None:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Erreur worker de reconnaissance: {error}")
+        else:
+            self.stats["completed"] += 1
+
+        return {
+            "frame_index": frame_index,
+            "locations": locations,
+            "scan": scan,
+            "encodings": encodings,
+            "duration": duration,
+            "latency": latency,
+            "extra": extra
+        }
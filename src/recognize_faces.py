@@ -4,15 +4,24 @@ Reconnaissance faciale en temps réel
 EPIC 5, 6, 7 - Version complète avec feedback, logs et robustesse
 """
 import cv2
-import face_recognition
-import pickle
 import os
-import glob
 import json
 import logging
+import sys
+import time
 from datetime import datetime
 from pathlib import Path
 
+sys.path.append('.')
+from src.face_matcher import FaceMatcher, UNKNOWN_NAME
+from src.gallery_store import GalleryStore
+from src.ann_index import index_settings
+from src.recognition_log import RecognitionLogWriter
+from src.recognition_debounce import RecognitionDebouncer
+from src.face_pipeline import FacePipeline
+from src.recognition_pool import RecognitionPool
+from src.metrics import METRICS, FPSCounter
+
 # Configuration du logging
 def setup_logging():
     """Configure le système de logs"""
@@ -47,7 +56,62 @@ class Config:
             "recognition": {
                 "tolerance": 0.6,
                 "process_every_n_frames": 2,
-                "model": "hog"  # ou "cnn" pour plus de précision (mais plus lent)
+                "model": "hog",  # ou "cnn" pour plus de précision (mais plus lent)
+                "debounce": {
+                    "min_interval": 5.0,  # Secondes entre deux journalisations d'une personne
+                    "confidence_delta": 0.05  # ... sauf variation de confiance
+                },
+                "tracking": {
+                    "enabled": True,
+                    "iou_threshold": 0.3,
+                    "max_missed": 2,
+                    "reverify_interval": 2.0  # Secondes avant de ré-encoder un visage suivi
+                },
+                "adaptive": {
+                    "enabled": True,
+                    "target_fps": 15,  # FPS de sortie visé
+                    "cpu_budget": 0.5,  # Part du temps d'une frame pour la reconnaissance
+                    "min_scale": 0.25,
+                    "max_scale": 1.0,
+                    "scale_step": 0.125,
+                    "min_interval": 1,
+                    "max_interval": 10,
+                    "min_face_pixels": 80  # Visage minimal (px) à l'échelle de détection
+                },
+                "motion": {
+                    "enabled": True,
+                    "thumbnail_width": 64,  # Vignette analysée pour le mouvement
+                    "pixel_threshold": 20,
+                    "min_changed": 0.01,  # Part de pixels changés = mouvement
+                    "learning_rate": 0.05,
+                    "hold": 2.0,  # Secondes de traitement après le dernier mouvement
+                    "max_idle": 30.0  # Vérification forcée sans mouvement
+                },
+                "pool": {
+                    "workers": 0,  # Processus de reconnaissance (0 = dans ce processus)
+                    "max_pending": 0,  # Frames en cours ou en attente au maximum (0 = deux par worker)
+                    "start_method": "spawn"
+                },
+                "roi": {
+                    "enabled": True,
+                    "padding": 0.75,  # Marge des fenêtres autour des visages précédents
+                    "full_scan_interval": 10  # Image entière toutes les N détections
+                },
+                "index": {
+                    "type": "centroid",  # "exact", "centroid" (préfiltre exact) ou "ivf" (approximatif)
+                    "nlist": 0,
+                    "nprobe": 8,
+                    "min_size": 10000
+                }
+            },
+            "recognition_log": {
+                "path": "logs/recognitions.csv",
+                "history_path": "logs/recognitions.db",  # None pour désactiver l'historique SQLite
+                "batch_size": 100,
+                "flush_interval": 2.0,
+                "max_queue": 10000,
+                "rotate": "daily",  # "daily", "size" ou "none"
+                "max_bytes": 10485760
             },
             "display": {
                 "show_confidence": True,
@@ -97,73 +161,50 @@ class Config:
         return value
 
 
-def load_known_faces(logger):
-    """Charge tous les visages enregistrés"""
+def load_known_faces(logger, config, previous=None):
+    """
+    Charge la galerie des visages enregistrés (memmap, sans copie)
     
-    known_faces = []
-    known_names = []
+    Avec `previous`, seules les lignes ajoutées depuis ce matcher sont traitées.
+    """
     
-    face_files = glob.glob("data/faces/*.pkl")
+    store = GalleryStore("data/faces")
+    current = previous.snapshot if previous is not None else None
+    snapshot = store.snapshot(previous=current)
     
-    if not face_files:
-        logger.warning("⚠️  Aucun visage enregistré trouvé dans data/faces/")
-        return [], []
+    if previous is not None and snapshot is current:
+        return previous
     
-    logger.info(f"📂 Chargement de {len(face_files)} fichier(s) de visages...")
+    if snapshot.count == 0:
+        if store.legacy_files():
+            logger.warning("⚠️  Anciens fichiers .pkl détectés: lancez 'python3 src/gallery_store.py --migrate'")
+        logger.warning("⚠️  Aucun visage enregistré trouvé dans data/faces/")
     
-    for file_path in face_files:
-        try:
-            with open(file_path, 'rb') as f:
-                data = pickle.load(f)
-                
-                for encoding in data['encodings']:
-                    known_faces.append(encoding)
-                    known_names.append(data['name'])
-                
-                logger.info(f"✅ Chargé: {data['name']} ({len(data['encodings'])} encodings)")
-        
-        except Exception as e:
-            logger.error(f"❌ Erreur lors du chargement de {file_path}: {e}")
+    face_matcher = FaceMatcher.from_snapshot(
+        snapshot,
+        tolerance=config.get("recognition", "tolerance"),
+        previous=previous if snapshot.extends(current) else None,
+        index_settings=index_settings(config),
+        index_dir=store.directory
+    )
     
-    logger.info(f"📊 Total: {len(known_faces)} encodings pour {len(set(known_names))} personne(s)")
+    logger.info(f"📊 Total: {len(face_matcher)} encodings pour {face_matcher.people_count} personne(s)")
     
-    return known_faces, known_names
-
-
-def log_recognition(logger, name, confidence, timestamp):
-    """Log une reconnaissance dans un fichier CSV"""
-    log_file = Path("logs/recognitions.csv")
-    
-    # Créer le fichier avec en-tête si nécessaire
-    if not log_file.exists():
-        log_file.parent.mkdir(exist_ok=True)
-        with open(log_file, 'w') as f:
-            f.write("timestamp,name,confidence\n")
-    
-    # Ajouter l'entrée
-    with open(log_file, 'a') as f:
-        f.write(f"{timestamp},{name},{confidence:.4f}\n")
+    return face_matcher
 
 
-class FPSCounter:
-    """Compteur de FPS"""
-    
-    def __init__(self):
-        self.fps = 0
-        self.frame_count = 0
-        self.start_time = datetime.now()
-    
-    def update(self):
-        """Met à jour le compteur FPS"""
-        self.frame_count += 1
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        
-        if elapsed > 1.0:
-            self.fps = self.frame_count / elapsed
-            self.frame_count = 0
-            self.start_time = datetime.now()
+def log_results(face_data, debouncer, recognition_log, logger):
+    """Journalise les visages reconnus d'une frame (anti-rebond par personne)"""
+    for data in face_data:
+        name = data['name']
+        confidence = data['confidence']
         
-        return self.fps
+        if name != UNKNOWN_NAME and debouncer.should_emit(name, confidence):
+            timestamp = datetime.now().isoformat()
+            logger.info(f"✅ Reconnu: {name} (confiance: {confidence:.2%})")
+            
+            # Logger la reconnaissance (mise en file, écrite par lots)
+            recognition_log.log(name, confidence, timestamp)
 
 
 def recognize_faces():
@@ -178,10 +219,16 @@ def recognize_faces():
     logger.info("🎭 DÉMARRAGE DU SYSTÈME DE RECONNAISSANCE FACIALE")
     logger.info("=" * 50)
     
-    # Charger les visages connus
-    known_face_encodings, known_face_names = load_known_faces(logger)
+    # Journal des reconnaissances écrit en arrière-plan
+    recognition_log = RecognitionLogWriter.from_config(config)
+    
+    # Anti-rebond : une ligne par personne et par intervalle, pas par frame
+    debouncer = RecognitionDebouncer.from_config(config)
+    
+    # Charger les visages connus (galerie vectorisée pour l'appariement)
+    face_matcher = load_known_faces(logger, config)
     
-    if not known_face_encodings:
+    if len(face_matcher) == 0:
         logger.error("❌ Impossible de démarrer sans visages enregistrés")
         logger.info("💡 Utilisez 'python3 src/register_face.py' pour enregistrer un visage")
         return
@@ -199,10 +246,9 @@ def recognize_faces():
     video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, config.get("camera", "height"))
     
     logger.info("✅ Webcam ouverte avec succès")
-    logger.info("📹 Appuyez sur 'q' pour quitter, 'd' pour toggle debug mode")
+    logger.info("📹 Appuyez sur 'q' pour quitter, 'd' pour toggle debug mode, 'r' pour recharger les visages")
     
     # Paramètres
-    tolerance = config.get("recognition", "tolerance")
     process_every_n_frames = config.get("recognition", "process_every_n_frames")
     model = config.get("recognition", "model")
     
@@ -217,9 +263,16 @@ def recognize_faces():
     color_unknown = tuple(config.get("colors", "unknown"))
     color_text = tuple(config.get("colors", "text"))
     
-    # Variables pour mémoriser les derniers résultats
-    last_face_locations = []
-    last_face_data = []  # Liste de dictionnaires avec name, confidence, etc.
+    # Détection à pleine résolution + suivi des visages entre les détections
+    # (une frame sur N au départ, échelle et N réglés ensuite selon la latence)
+    # Détection et encodage dans des processus séparés si recognition.pool.workers > 0
+    recognition_pool = RecognitionPool.from_config(config)
+    face_pipeline = FacePipeline.from_config(config, scale=1.0, model=model,
+                                             interval=process_every_n_frames,
+                                             pool=recognition_pool)
+    
+    # Derniers résultats mémorisés (dicts location, name, confidence, distances...)
+    last_face_data = []
     frame_count = 0
     
     try:
@@ -233,68 +286,42 @@ def recognize_faces():
             frame_count += 1
             current_fps = fps_counter.update()
             
-            # Traiter seulement certaines frames
-            if frame_count % process_every_n_frames == 0:
-                # Convertir en RGB
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Détecter les visages
-                try:
-                    face_locations = face_recognition.face_locations(rgb_frame, model=model)
-                    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
-                except Exception as e:
-                    logger.error(f"❌ Erreur lors de la détection: {e}")
-                    continue
-                
-                # Réinitialiser les données pour cette frame
-                face_data = []
-                
-                # Pour chaque visage détecté
-                for face_encoding in face_encodings:
-                    # Comparer avec les visages connus
-                    matches = face_recognition.compare_faces(
-                        known_face_encodings, 
-                        face_encoding, 
-                        tolerance=tolerance
-                    )
-                    name = "Inconnu"
-                    confidence = 0.0
-                    
-                    # Calculer les distances
-                    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
+            # Traiter seulement certaines frames (N ajusté automatiquement),
+            # et seulement si la scène bouge
+            if face_pipeline.should_process(frame, frame_count):
+                if face_pipeline.pool is not None:
+                    # Workers : la frame est copiée en mémoire partagée avant le dessin
+                    face_pipeline.submit(frame, frame_count)
+                else:
+                    # Détection + suivi : seuls les visages nouveaux ou à re-vérifier sont encodés
+                    try:
+                        face_data = face_pipeline.process(frame, frame_count, face_matcher,
+                                                          with_distances=debug_mode)
+                    except Exception as e:
+                        logger.error(f"❌ Erreur lors de la détection: {e}")
+                        continue
                     
-                    if True in matches:
-                        # Trouver le meilleur match
-                        best_match_index = face_distances.argmin()
-                        
-                        if matches[best_match_index]:
-                            name = known_face_names[best_match_index]
-                            # Convertir distance en score de confiance (0-1)
-                            confidence = 1 - face_distances[best_match_index]
-                            
-                            timestamp = datetime.now().isoformat()
-                            logger.info(f"✅ Reconnu: {name} (confiance: {confidence:.2%})")
-                            
-                            # Logger la reconnaissance
-                            log_recognition(logger, name, confidence, timestamp)
+                    log_results(face_data, debouncer, recognition_log, logger)
                     
-                    face_data.append({
-                        'name': name,
-                        'confidence': confidence,
-                        'distances': face_distances.tolist() if debug_mode else None
-                    })
-                
-                # Mémoriser les résultats
-                last_face_locations = face_locations
-                last_face_data = face_data
+                    # Mémoriser les résultats
+                    last_face_data = face_data
             
-            # Dessiner avec les derniers résultats mémorisés
-            for (top, right, bottom, left), data in zip(last_face_locations, last_face_data):
+            # Résultats rendus par les workers, dans l'ordre des frames
+            if face_pipeline.pool is not None:
+                for _, face_data in face_pipeline.collect(face_matcher, with_distances=debug_mode):
+                    log_results(face_data, debouncer, recognition_log, logger)
+                    last_face_data = face_data
+            
+            # Dessiner les derniers résultats (boîtes extrapolées par le suivi)
+            draw_start = time.perf_counter()
+            face_annotations = face_pipeline.annotations(frame_count, last_face_data)
+            for data in face_annotations:
+                top, right, bottom, left = data['location']
                 name = data['name']
                 confidence = data['confidence']
                 
                 # Couleur selon reconnaissance
-                color = color_known if name != "Inconnu" else color_unknown
+                color = color_known if name != UNKNOWN_NAME else color_unknown
                 
                 # Rectangle autour du visage
                 cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
@@ -322,7 +349,7 @@ def recognize_faces():
                 if debug_mode and data['distances']:
                     y_debug = top - 10
                     for i, dist in enumerate(data['distances'][:3]):  # Top 3
-                        debug_text = f"{known_face_names[i]}: {dist:.3f}"
+                        debug_text = f"{face_matcher.name_of(i)}: {dist:.3f}"
                         cv2.putText(frame, debug_text, (left, y_debug),
                                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
                         y_debug -= 15
@@ -331,7 +358,7 @@ def recognize_faces():
             info_y = 30
             
             # Nombre de visages
-            cv2.putText(frame, f"Visages: {len(last_face_locations)}", 
+            cv2.putText(frame, f"Visages: {len(face_annotations)}", 
                        (10, info_y), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color_text, 2)
             info_y += 30
             
@@ -352,6 +379,13 @@ def recognize_faces():
                 cv2.putText(frame, "DEBUG MODE", 
                            (frame.shape[1] - 150, 30), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+                
+                # Réglages choisis par le contrôleur adaptatif
+                cv2.putText(frame, f"Echelle x{face_pipeline.scale:.2f} - 1/{face_pipeline.process_interval}", 
+                           (frame.shape[1] - 210, 55), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 0), 1)
+            
+            METRICS.observe("draw", time.perf_counter() - draw_start)
             
             # Afficher la frame
             cv2.imshow('Reconnaissance Faciale', frame)
@@ -365,6 +399,10 @@ def recognize_faces():
             elif key == ord('d'):
                 debug_mode = not debug_mode
                 logger.info(f"🔧 Mode debug: {'ON' if debug_mode else 'OFF'}")
+            elif key == ord('r'):
+                # Rechargement incrémental (seuls les nouveaux visages sont lus)
+                face_matcher = load_known_faces(logger, config, previous=face_matcher)
+                face_pipeline.reset()
     
     except KeyboardInterrupt:
         logger.info("👋 Interruption clavier (Ctrl+C)")
@@ -376,6 +414,10 @@ def recognize_faces():
         # Libérer les ressources
         video_capture.release()
         cv2.destroyAllWindows()
+        recognition_log.close()
+        if recognition_pool is not None:
+            recognition_pool.close()
+        METRICS.log_summary(logger)
         logger.info("=" * 50)
         logger.info("🛑 Arrêt du système de reconnaissance")
         logger.info("=" * 50)
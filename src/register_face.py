@@ -5,9 +5,10 @@ EPIC 4 - US 4.1, 4.2, 4.3
 """
 import cv2
 import face_recognition
-import pickle
-import os
-from datetime import datetime
+import sys
+
+sys.path.append('.')
+from src.gallery_store import GalleryStore
 
 def capture_face(name):
     """Capture plusieurs images d'un visage pour l'enregistrement"""
@@ -97,30 +98,15 @@ def capture_face(name):
 
 
 def save_face_data(name, encodings):
-    """Sauvegarde les encodings dans un fichier"""
-    
-    # Créer le dossier si nécessaire
-    data_dir = "data/faces"
-    os.makedirs(data_dir, exist_ok=True)
-    
-    # Nom du fichier
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{data_dir}/{name}_{timestamp}.pkl"
-    
-    # Sauvegarder
-    data = {
-        'name': name,
-        'encodings': encodings,
-        'timestamp': timestamp
-    }
+    """Ajoute les encodings à la galerie"""
     
-    with open(filename, 'wb') as f:
-        pickle.dump(data, f)
+    store = GalleryStore("data/faces")
+    total = store.add_person(name, encodings)
     
-    print(f"\n✅ Visage enregistré: {filename}")
-    print(f"📊 {len(encodings)} encodings sauvegardés")
+    print(f"\n✅ Visage enregistré: {store.directory}")
+    print(f"📊 {len(encodings)} encodings sauvegardés ({total} au total dans la galerie)")
     
-    return filename
+    return store.directory
 
 
 def main():
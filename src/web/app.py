@@ -5,40 +5,26 @@ EPIC 10 - Interface web avec notifications Discord, downscale intelligent et FPS
 """
 from flask import Flask, render_template, Response, jsonify, request
 import cv2
-import face_recognition
-import pickle
-import glob
 import json
 from datetime import datetime
 from pathlib import Path
 import threading
 import logging
 import sys
+import time
 
 # Importer le module de notifications
 sys.path.append('../..')
-from src.notifications import NotificationManager
-
-
-class FPSCounter:
-    """Compteur de FPS"""
-    
-    def __init__(self):
-        self.fps = 0
-        self.frame_count = 0
-        self.start_time = datetime.now()
-    
-    def update(self):
-        """Met à jour le compteur FPS"""
-        self.frame_count += 1
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        
-        if elapsed > 1.0:
-            self.fps = self.frame_count / elapsed
-            self.frame_count = 0
-            self.start_time = datetime.now()
-        
-        return self.fps
+from src.notifications import NotificationManager, Detection
+from src.face_matcher import FaceMatcher, UNKNOWN_NAME
+from src.gallery_store import GalleryStore
+from src.ann_index import index_settings
+from src.recognition_debounce import RecognitionDebouncer
+from src.recognition_log import RecognitionLogWriter
+from src.face_pipeline import detect_face_locations, encode_faces
+from src.recognition_pool import RecognitionPool
+from src.camera_supervisor import CameraSupervisor
+from src.metrics import METRICS, FPSCounter
 
 
 app = Flask(__name__)
@@ -48,13 +34,19 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Variables globales
-camera = None
-camera_lock = threading.Lock()
-known_face_encodings = []
-known_face_names = []
+supervisor = None
+supervisor_lock = threading.Lock()
+stream_threads = {}
+detected_people = {}  # Détections courantes par caméra (suivi de présence)
+debouncer = None
+gallery_store = GalleryStore("../../data/faces")
+face_matcher = FaceMatcher.empty()
+reload_lock = threading.Lock()
 recognition_active = False
 last_recognition = {"name": None, "confidence": 0, "timestamp": None}
 notification_manager = None
+recognition_log = None
+recognition_pool = None
 
 
 class Config:
@@ -95,167 +87,253 @@ def init_notifications():
     logger.info("📢 Gestionnaire de notifications initialisé")
 
 
-def load_known_faces():
-    """Charge tous les visages enregistrés"""
-    global known_face_encodings, known_face_names
+def init_recognition_pool():
+    """
+    Démarre les processus de reconnaissance (recognition.pool.workers > 0)
     
-    known_face_encodings = []
-    known_face_names = []
+    À appeler avant tout autre thread : les workers sont lancés proprement.
+    """
+    global recognition_pool
+    recognition_pool = RecognitionPool.from_config(Config())
+
+
+def init_recognition_log():
+    """Initialise le journal des reconnaissances (CSV + historique SQLite)"""
+    global recognition_log
+    recognition_log = RecognitionLogWriter.from_config(Config(), base_dir="../..")
+    logger.info("🗂️  Journal des reconnaissances initialisé")
+
+
+def init_metrics():
+    """
+    Déclare les mesures lues à chaque export /metrics
+    - Files d'attente (pool, notifications, journal) et frames perdues
+    - Les durées par étape sont enregistrées directement par chaque module
+    """
+    def per_camera(value):
+        def collect():
+            if supervisor is None:
+                return []
+            return [({"camera": camera.id}, value(camera)) for camera in supervisor.cameras.values()]
+        return collect
+    
+    def stats(source, keys):
+        def collect():
+            component = source()
+            if component is None:
+                return None
+            return [({"result": key}, component.stats[key]) for key in keys]
+        return collect
+    
+    METRICS.register("face_recognition_active", "Reconnaissance activée",
+                     lambda: recognition_active)
+    METRICS.register("face_gallery_encodings", "Encodings chargés dans la galerie",
+                     lambda: len(face_matcher))
+    
+    # Caméras : frames capturées, jamais examinées, sautées faute de mouvement
+    METRICS.register("face_camera_frames_total", "Frames capturées",
+                     per_camera(lambda camera: camera.grabber.sequence), kind="counter")
+    METRICS.register("face_camera_frames_skipped_total", "Frames remplacées avant d'être examinées",
+                     per_camera(lambda camera: camera.stats["skipped"]), kind="counter")
+    METRICS.register("face_camera_motion_idle_frames_total", "Frames sautées (scène immobile)",
+                     per_camera(lambda camera: camera.pipeline.motion_gate.stats["idle_frames"]
+                                if camera.pipeline.motion_gate else 0), kind="counter")
+    METRICS.register("face_camera_fps", "FPS du flux diffusé",
+                     per_camera(lambda camera: camera.fps.fps))
+    METRICS.register("face_camera_viewers", "Clients MJPEG connectés",
+                     per_camera(lambda camera: camera.broadcaster.viewers))
+    
+    # Pool de processus : frames en cours et abandonnées (tous les workers occupés)
+    METRICS.register("face_pool_pending", "Frames en cours ou en attente dans le pool",
+                     lambda: recognition_pool.depth if recognition_pool else None)
+    METRICS.register("face_pool_frames_total", "Frames confiées au pool",
+                     stats(lambda: recognition_pool, ["submitted", "completed", "dropped", "errors"]),
+                     kind="counter")
+    
+    # Notifications et journal
+    dispatcher = lambda: notification_manager.dispatcher if notification_manager else None
+    METRICS.register("face_notification_queue_depth", "Notifications en attente d'envoi",
+                     lambda: dispatcher().depth if dispatcher() else None)
+    METRICS.register("face_notifications_total", "Notifications traitées",
+                     stats(dispatcher, ["queued", "sent", "failed", "dropped", "coalesced"]), kind="counter")
+    METRICS.register("face_recognition_log_queue_depth", "Lignes de journal en attente d'écriture",
+                     lambda: recognition_log.depth if recognition_log else None)
+    METRICS.register("face_recognition_log_rows_total", "Lignes de journal",
+                     stats(lambda: recognition_log, ["written", "dropped"]), kind="counter")
+
+
+def load_known_faces():
+    """
+    Recharge la galerie de manière incrémentale
+    - Seules les lignes ajoutées depuis le dernier chargement sont traitées
+    - Le nouveau matcher est publié en une seule affectation : le streaming
+      voit toujours une galerie complète (l'ancienne ou la nouvelle)
+    """
+    global face_matcher
     
-    face_files = glob.glob("../../data/faces/*.pkl")
+    with reload_lock:
+        config = Config()
+        tolerance = config.get("recognition", "tolerance") or 0.6
+        current = face_matcher.snapshot
+        snapshot = gallery_store.snapshot(previous=current)
+        
+        if snapshot is current and face_matcher.tolerance == tolerance:
+            logger.info("📊 Galerie inchangée")
+            return
+        
+        if snapshot.count == 0 and gallery_store.legacy_files():
+            logger.warning("⚠️  Anciens fichiers .pkl détectés: lancez 'python3 src/gallery_store.py --migrate'")
+        
+        previous = face_matcher if snapshot.extends(current) else None
+        new_matcher = FaceMatcher.from_snapshot(
+            snapshot,
+            tolerance=tolerance,
+            previous=previous,
+            index_settings=index_settings(config),
+            index_dir=gallery_store.directory
+        )
+        
+        if previous is not None:
+            logger.info(f"➕ {snapshot.count - snapshot.delta_start} nouvel(s) encoding(s) chargé(s)")
+        
+        # Publication atomique du nouveau snapshot
+        face_matcher = new_matcher
     
-    if not face_files:
+    if len(face_matcher) == 0:
         logger.warning("⚠️  Aucun visage enregistré trouvé")
-        return
-    
-    logger.info(f"📂 Chargement de {len(face_files)} fichier(s)...")
-    
-    for file_path in face_files:
-        try:
-            with open(file_path, 'rb') as f:
-                data = pickle.load(f)
-                for encoding in data['encodings']:
-                    known_face_encodings.append(encoding)
-                    known_face_names.append(data['name'])
-                logger.info(f"✅ Chargé: {data['name']}")
-        except Exception as e:
-            logger.error(f"❌ Erreur: {e}")
-    
-    logger.info(f"📊 Total: {len(known_face_encodings)} encodings")
+    else:
+        logger.info(f"📊 Total: {len(face_matcher)} encodings pour {face_matcher.people_count} personne(s)")
 
 
-def get_camera():
-    """Récupère ou initialise la caméra"""
-    global camera
+def get_supervisor():
+    """
+    Récupère ou démarre le superviseur des caméras
+    - Un thread de capture par source (section "cameras", sinon "camera")
+    - Un thread de reconnaissance partagé (même galerie, même pool)
+    - Un thread d'annotation/diffusion par caméra
+    """
+    global supervisor, debouncer
     
-    with camera_lock:
-        if camera is None or not camera.isOpened():
-            camera = cv2.VideoCapture(0)
-            camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            logger.info("📹 Webcam initialisée")
+    with supervisor_lock:
+        if supervisor is None:
+            config = Config()
+            
+            # Anti-rebond des logs de reconnaissance (la présence reçoit toutes les détections)
+            debouncer = RecognitionDebouncer.from_config(config)
+            
+            # Détection réduite x0.5, une frame sur 3 au départ (réglées ensuite selon
+            # la latence mesurée) + suivi : seuls les nouveaux visages sont encodés
+            supervisor = CameraSupervisor.from_config(
+                config,
+                matcher=lambda: face_matcher,
+                handler=handle_results,
+                pool=recognition_pool
+            )
+            supervisor.active = recognition_active
+            supervisor.start()
+            
+            for camera in supervisor.cameras.values():
+                stream_threads[camera.id] = threading.Thread(
+                    target=run_stream, args=(camera,), name=f"stream-{camera.id}", daemon=True
+                )
+                stream_threads[camera.id].start()
+            
+            logger.info("🎬 Pipeline de reconnaissance démarré")
     
-    return camera
+    return supervisor
 
 
-def detect_faces_optimized(frame):
+def get_camera(camera_id=None):
     """
-    Détection optimisée avec downscaling intelligent
-    - Détecte sur une image réduite (2x plus rapide)
-    - Encode sur l'image originale (précision maximale)
+    Thread de capture d'une caméra (la première par défaut)
+    Le thread possède le périphérique ; les flux lisent la dernière frame publiée
     """
-    # Réduire la taille pour la détection (gain de performance ~60%)
-    small_frame = cv2.resize(frame, (0, 0), fx=0.5, fy=0.5)
-    rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-    
-    # Détecter sur la petite image
-    face_locations_small = face_recognition.face_locations(rgb_small, model="hog")
-    
-    # Si aucun visage détecté, retourner vide
-    if not face_locations_small:
-        return [], []
+    supervisor = get_supervisor()
+    camera = supervisor.get(camera_id) if camera_id is not None else supervisor.default
+    return camera.grabber if camera is not None else None
+
+
+def publish_recognitions(face_data, sequence, debouncer):
+    """
+    Diffuse les résultats d'une frame reconnue
+    - Met à jour la dernière reconnaissance et le journal (anti-rebond)
+    - Retourne les détections légères pour le suivi de présence
+    """
+    global last_recognition
     
-    # Scale up les coordonnées pour l'image originale (x2)
-    face_locations = [
-        (top * 2, right * 2, bottom * 2, left * 2)
-        for (top, right, bottom, left) in face_locations_small
-    ]
+    detected_people = []
     
-    # Encoder sur l'image ORIGINALE pour garder la précision
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+    for data in face_data:
+        name = data['name']
+        confidence = data['confidence']
+        
+        if name != UNKNOWN_NAME:
+            # Mettre à jour la dernière reconnaissance
+            last_recognition = {
+                "name": name,
+                "confidence": float(confidence),
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            if debouncer.should_emit(name, confidence):
+                logger.info(f"✅ Reconnu: {name} ({confidence:.2%})")
+                if recognition_log:
+                    recognition_log.log(name, confidence, last_recognition["timestamp"])
+            
+            # Détection légère : les pixels restent dans l'anneau du grabber
+            detected_people.append(Detection(name, confidence, data['location'], sequence))
     
-    return face_locations, face_encodings
+    return detected_people
 
 
-def generate_frames():
-    """Génère les frames pour le streaming vidéo"""
-    global recognition_active, last_recognition
-    
-    frame_count = 0
-    process_every_n_frames = 3
-    
-    # Variables pour mémoriser les derniers résultats
-    last_face_locations = []
-    last_face_data = []
-    detected_people = []  # Déplacer ici pour garder entre frames
+def handle_results(camera, results):
+    """
+    Résultats d'une caméra (thread de reconnaissance, à chaque nouvelle frame)
+    - Journal et dernière reconnaissance pour chaque frame reconnue
+    - Événements de présence à CHAQUE frame, avec les captures de cette caméra
+    """
+    for sequence, face_data in results:
+        detected_people[camera.id] = publish_recognitions(face_data, sequence, debouncer)
     
-    # Compteur FPS
-    fps_counter = FPSCounter()
+    if notification_manager:
+        events = notification_manager.update_presence(detected_people.get(camera.id, []),
+                                                      camera.grabber.frame_at)
+        notification_manager.process_events(events)
+
+
+def run_stream(camera):
+    """
+    Annotation et diffusion d'une caméra
+    - Annotation et encodage JPEG une seule fois par frame
+    - Les octets JPEG sont publiés dans le tampon de diffusion de la caméra
+    - Annotation et encodage sautés quand aucun client ne regarde
+    """
+    last_sequence = 0
     
     while True:
-        camera = get_camera()
-        
-        success, frame = camera.read()
-        if not success:
-            logger.error("❌ Erreur de lecture frame")
-            break
-        
-        frame_count += 1
+        # Attendre la prochaine frame publiée (partagée, en lecture seule)
+        last_sequence, raw_frame = camera.grabber.wait_next(last_sequence)
+        if raw_frame is None:
+            continue
         
         # Mettre à jour FPS
-        current_fps = fps_counter.update()
+        current_fps = camera.fps.update()
         
-        # Reconnaissance uniquement si activée
-        if recognition_active:
-            # Traiter la détection toutes les N frames
-            if frame_count % process_every_n_frames == 0:
-                detected_people = []  # Réinitialiser la liste
-                
-                try:
-                    # UTILISER LA DÉTECTION OPTIMISÉE
-                    face_locations, face_encodings = detect_faces_optimized(frame)
-                    
-                    # Réinitialiser les données
-                    face_data = []
-                    
-                    for face_encoding in face_encodings:
-                        matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.6)
-                        name = "Inconnu"
-                        confidence = 0.0
-                        
-                        if True in matches:
-                            face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                            best_match_index = face_distances.argmin()
-                            
-                            if matches[best_match_index]:
-                                name = known_face_names[best_match_index]
-                                confidence = 1 - face_distances[best_match_index]
-                                
-                                # Mettre à jour la dernière reconnaissance
-                                last_recognition = {
-                                    "name": name,
-                                    "confidence": float(confidence),
-                                    "timestamp": datetime.now().isoformat()
-                                }
-                                
-                                logger.info(f"✅ Reconnu: {name} ({confidence:.2%})")
-                                
-                                # Ajouter à la liste des personnes détectées
-                                detected_people.append((name, confidence, frame.copy()))
-                        
-                        face_data.append({
-                            'name': name,
-                            'confidence': confidence
-                        })
-                    
-                    # Mémoriser les résultats
-                    last_face_locations = face_locations
-                    last_face_data = face_data
-                
-                except Exception as e:
-                    logger.error(f"❌ Erreur reconnaissance: {e}")
-            
-            # Traiter les événements de présence à CHAQUE frame
-            if notification_manager:
-                events = notification_manager.update_presence(detected_people)
-                notification_manager.process_events(events)
+        # Personne ne regarde : inutile d'annoter et d'encoder
+        if camera.broadcaster.viewers == 0:
+            continue
+        
+        # Copie unique pour l'annotation, partagée ensuite par tous les clients
+        draw_start = time.perf_counter()
+        frame = raw_frame.copy()
         
-        # Dessiner avec les derniers résultats mémorisés
-        for (top, right, bottom, left), data in zip(last_face_locations, last_face_data):
+        # Dessiner les derniers résultats (boîtes extrapolées par le suivi)
+        face_annotations = camera.pipeline.annotations(last_sequence, camera.face_data)
+        for data in face_annotations:
+            top, right, bottom, left = data['location']
             name = data['name']
             confidence = data['confidence']
-            color = (0, 255, 0) if name != "Inconnu" else (0, 0, 255)
+            color = (0, 255, 0) if name != UNKNOWN_NAME else (0, 0, 255)
             
             # Rectangle
             cv2.rectangle(frame, (left, top), (right, bottom), color, 2)
@@ -269,14 +347,14 @@ def generate_frames():
         # Overlay d'informations
         info_y = 30
         
-        # Timestamp
+        # Caméra et timestamp
         timestamp = datetime.now().strftime("%H:%M:%S")
-        cv2.putText(frame, timestamp, (10, info_y),
+        cv2.putText(frame, f"{camera.name} {timestamp}", (10, info_y),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         info_y += 30
         
         # Nombre de visages
-        cv2.putText(frame, f"Visages: {len(last_face_locations)}", (10, info_y),
+        cv2.putText(frame, f"Visages: {len(face_annotations)}", (10, info_y),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         info_y += 30
         
@@ -288,12 +366,24 @@ def generate_frames():
         if recognition_active:
             cv2.circle(frame, (frame.shape[1] - 30, 30), 10, (0, 255, 0), -1)
         
-        # Encoder la frame en JPEG
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
+        METRICS.observe("draw", time.perf_counter() - draw_start)
         
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        # Encoder la frame en JPEG une seule fois pour tous les clients
+        with METRICS.time("jpeg"):
+            ret, buffer = cv2.imencode('.jpg', frame)
+        if ret:
+            camera.broadcaster.publish(buffer.tobytes())
+
+
+def start_pipeline():
+    """Démarre les caméras et le pipeline de reconnaissance s'ils ne tournent pas déjà"""
+    get_supervisor()
+
+
+def generate_frames(camera):
+    """Génère les frames pour le streaming vidéo (lecture du tampon de diffusion)"""
+    return camera.broadcaster.stream()
+
 
 @app.route('/')
 def index():
@@ -302,18 +392,35 @@ def index():
 
 
 @app.route('/video_feed')
-def video_feed():
-    """Route pour le streaming vidéo"""
-    return Response(generate_frames(),
+@app.route('/video_feed/<cam_id>')
+def video_feed(cam_id=None):
+    """Route pour le streaming vidéo (première caméra par défaut)"""
+    supervisor = get_supervisor()
+    camera = supervisor.get(cam_id) if cam_id is not None else supervisor.default
+    
+    if camera is None:
+        return jsonify({"error": f"Caméra inconnue: {cam_id}"}), 404
+    
+    return Response(generate_frames(camera),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
+@app.route('/api/cameras')
+def list_cameras():
+    """Caméras configurées, avec leur flux et leur état"""
+    cameras = get_supervisor().status()
+    for camera in cameras:
+        camera["feed"] = f"/video_feed/{camera['id']}"
+    return jsonify({"cameras": cameras})
+
+
 @app.route('/api/toggle_recognition', methods=['POST'])
 def toggle_recognition():
     """Active/désactive la reconnaissance"""
     global recognition_active
     
     recognition_active = not recognition_active
+    get_supervisor().active = recognition_active
     status = "activée" if recognition_active else "désactivée"
     logger.info(f"🔄 Reconnaissance {status}")
     
@@ -328,19 +435,29 @@ def status():
     """Retourne le statut actuel"""
     return jsonify({
         "recognition_active": recognition_active,
-        "known_faces_count": len(set(known_face_names)),
-        "last_recognition": last_recognition
+        "known_faces_count": face_matcher.people_count,
+        "last_recognition": last_recognition,
+        "detection": supervisor.default.pipeline.status() if supervisor else None,
+        "cameras": {camera.id: camera.pipeline.status() for camera in supervisor.cameras.values()}
+                   if supervisor else {}
     })
 
 
+@app.route('/metrics')
+def metrics():
+    """Mesures au format texte Prometheus (durées par étape, files, frames perdues)"""
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/reload_faces', methods=['POST'])
 def reload_faces():
     """Recharge les visages enregistrés"""
     load_known_faces()
+    people_count = face_matcher.people_count
     return jsonify({
         "success": True,
-        "count": len(set(known_face_names)),
-        "message": f"{len(set(known_face_names))} personne(s) chargée(s)"
+        "count": people_count,
+        "message": f"{people_count} personne(s) chargée(s)"
     })
 
 
@@ -348,16 +465,72 @@ def reload_faces():
 def get_logs():
     """Récupère les derniers logs de reconnaissance"""
     try:
+        limit = request.args.get('limit', 20, type=int)
+        
+        # Historique SQLite : parcours inverse de l'index, coût proportionnel à N
+        if recognition_log and recognition_log.history:
+            rows = reversed(recognition_log.history.recent(limit))
+            lines = [f"{row['timestamp']},{row['name']},{row['confidence']:.4f}\n" for row in rows]
+            return jsonify({"logs": lines})
+        
         log_file = Path("../../logs/recognitions.csv")
         if log_file.exists():
-            with open(log_file, 'r') as f:
-                lines = f.readlines()[-20:]  # 20 dernières lignes
-            return jsonify({"logs": lines})
+            return jsonify({"logs": tail_lines(log_file, limit)})
         return jsonify({"logs": []})
     except Exception as e:
         return jsonify({"error": str(e)})
 
 
+@app.route('/api/history')
+def get_history():
+    """
+    Historique des reconnaissances
+    
+    Paramètres : start, end (horodatages ISO), name, limit, offset,
+    group_by ("name", "day" ou "hour") pour les agrégats
+    """
+    if not recognition_log or not recognition_log.history:
+        return jsonify({"error": "Historique désactivé"}), 404
+    
+    history = recognition_log.history
+    start = request.args.get('start')
+    end = request.args.get('end')
+    name = request.args.get('name')
+    group_by = request.args.get('group_by', 'name')
+    
+    try:
+        result = history.query(
+            start=start,
+            end=end,
+            name=name,
+            limit=request.args.get('limit', 50, type=int),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        result["counts"] = history.counts(start=start, end=end, name=name, group_by=group_by)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def tail_lines(path, count, block_size=8192):
+    """Dernières lignes d'un fichier, lues depuis la fin (sans tout charger)"""
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        position = f.tell()
+        data = b''
+        
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    if position > 0:
+        lines = lines[1:]  # Première ligne potentiellement tronquée
+    return [line for line in lines if not line.startswith("timestamp,")][-count:]
+
+
 # Variables globales pour l'enregistrement
 registration_mode = False
 registration_name = ""
@@ -440,25 +613,10 @@ def save_registration():
         }), 400
     
     try:
-        # Créer le dossier si nécessaire
-        data_dir = Path("../../data/faces")
-        data_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Nom du fichier
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = data_dir / f"{registration_name}_{timestamp}.pkl"
-        
-        # Sauvegarder
-        data = {
-            'name': registration_name,
-            'encodings': registration_encodings,
-            'timestamp': timestamp
-        }
+        # Ajouter à la galerie
+        gallery_store.add_person(registration_name, registration_encodings)
         
-        with open(filename, 'wb') as f:
-            pickle.dump(data, f)
-        
-        logger.info(f"✅ Visage sauvegardé: {filename}")
+        logger.info(f"✅ Visage sauvegardé: {registration_name} ({len(registration_encodings)} encodings)")
         
         # Notification d'enregistrement
         if notification_manager:
@@ -477,7 +635,7 @@ def save_registration():
         return jsonify({
             "success": True,
             "message": f"Visage de {temp_name} enregistré avec succès !",
-            "filename": str(filename)
+            "filename": str(gallery_store.directory)
         })
     
     except Exception as e:
@@ -498,21 +656,23 @@ def generate_frames_registration():
     
     # Compteur FPS
     fps_counter = FPSCounter()
+    last_sequence = 0
     
     while True:
         camera = get_camera()
         
-        success, frame = camera.read()
-        if not success:
-            break
+        last_sequence, frame = camera.wait_next(last_sequence)
+        if frame is None:
+            continue
+        frame = frame.copy()
         
         # Mettre à jour FPS
         current_fps = fps_counter.update()
         
         if registration_mode:
             try:
-                # UTILISER LA DÉTECTION OPTIMISÉE
-                face_locations, _ = detect_faces_optimized(frame)
+                # Détection sur image réduite (pas d'encodage pour l'aperçu)
+                face_locations = detect_face_locations(frame, scale=0.5)
                 
                 if len(face_locations) == 1:
                     # Un seul visage - OK
@@ -565,13 +725,13 @@ def auto_capture():
         return jsonify({"success": False, "message": "Toutes les photos capturées"}), 400
     
     camera = get_camera()
-    success, frame = camera.read()
+    _, frame = camera.read()
     
-    if not success:
+    if frame is None:
         return jsonify({"success": False, "message": "Erreur lecture caméra"}), 500
     
-    # UTILISER LA DÉTECTION OPTIMISÉE
-    face_locations, face_encodings = detect_faces_optimized(frame)
+    # Détection sur image réduite, encodage sur l'image d'origine
+    face_locations = detect_face_locations(frame, scale=0.5)
     
     if len(face_locations) != 1:
         return jsonify({
@@ -579,6 +739,8 @@ def auto_capture():
             "message": "Un seul visage requis"
         }), 400
     
+    face_encodings = encode_faces(frame, face_locations)
+    
     # Utiliser l'encodage déjà calculé
     registration_encodings.append(face_encodings[0])
     registration_count += 1
@@ -608,11 +770,23 @@ if __name__ == '__main__':
     logger.info("🌐 Démarrage de l'interface web")
     logger.info("=" * 50)
     
+    # Workers de reconnaissance (avant les autres threads)
+    init_recognition_pool()
+    
+    # Mesures exportées sur /metrics
+    init_metrics()
+    
     # Charger les visages au démarrage
     load_known_faces()
     
     # Initialiser les notifications
     init_notifications()
     
+    # Journal des reconnaissances (écrit en arrière-plan)
+    init_recognition_log()
+    
+    # Démarrer les caméras et la reconnaissance (présence suivie même sans client connecté)
+    start_pipeline()
+    
     # Lancer l'application
     app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
@@ -11,6 +11,8 @@ const knownFacesSpan = document.getElementById('known-faces');
 const recognitionStatusSpan = document.getElementById('recognition-status');
 const logsDiv = document.getElementById('logs');
 const testHaBtn = document.getElementById('test-ha-btn');
+const cameraTabs = document.getElementById('camera-tabs');
+const videoStream = document.getElementById('video-stream');
 
 // Toggle reconnaissance
 toggleBtn.addEventListener('click', async () => {
@@ -163,10 +165,54 @@ testHaBtn.addEventListener('click', async () => {
     }
 });
 
+// Caméras : un onglet par flux (masqués s'il n'y a qu'une caméra)
+async function loadCameras() {
+    try {
+        const response = await fetch('/api/cameras');
+        const data = await response.json();
+        
+        if (!data.cameras || data.cameras.length < 2) {
+            return;
+        }
+        
+        const stored = localStorage.getItem('camera');
+        const selected = data.cameras.some(camera => camera.id === stored) ? stored : data.cameras[0].id;
+        
+        cameraTabs.innerHTML = '';
+        data.cameras.forEach(camera => {
+            const tab = document.createElement('button');
+            tab.className = 'camera-tab';
+            tab.textContent = camera.name;
+            tab.dataset.feed = camera.feed;
+            tab.addEventListener('click', () => selectCamera(camera.id, tab));
+            cameraTabs.appendChild(tab);
+            
+            if (camera.id === selected) {
+                selectCamera(camera.id, tab);
+            }
+        });
+        cameraTabs.hidden = false;
+    } catch (error) {
+        console.error('Erreur chargement caméras:', error);
+    }
+}
+
+function selectCamera(cameraId, tab) {
+    cameraTabs.querySelectorAll('.camera-tab').forEach(t => t.classList.remove('active'));
+    tab.classList.add('active');
+    
+    // Le flux précédent est fermé en remplaçant la source de l'image
+    if (videoStream.getAttribute('src') !== tab.dataset.feed) {
+        videoStream.src = tab.dataset.feed;
+    }
+    localStorage.setItem('camera', cameraId);
+}
+
 // Mise à jour automatique toutes les 2 secondes
 setInterval(updateStatus, 2000);
 setInterval(updateLogs, 5000);
 
 // Initialisation
+loadCameras();
 updateStatus();
 updateLogs();
\ No newline at end of file
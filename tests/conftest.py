@@ -0,0 +1,98 @@
+"""
+Configuration commune des tests
+Les modules sont importés comme dans les scripts (from src.X import ...),
+depuis la racine du dépôt.
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import http_client
+
+
+class DictConfig:
+    """Configuration en mémoire, même interface que Config.get(*keys)"""
+
+    def __init__(self, values=None):
+        self.config = values or {}
+
+    def get(self, *keys):
+        value = self.config
+        for key in keys:
+            value = value.get(key)
+            if value is None:
+                return None
+        return value
+
+
+def wait_until(condition, timeout=5.0):
+    """Attend qu'une condition devienne vraie (threads d'arrière-plan)"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition non atteinte")
+        time.sleep(0.01)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Serveur HTTP/1.1 local : compte les connexions TCP acceptées et les requêtes reçues"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self.status = 204
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # Keep-alive
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append((self.command, self.path, body))
+
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def shared_http(monkeypatch):
+    """Client HTTP partagé neuf pour chaque test (fermé à la fin)"""
+    monkeypatch.setattr(http_client, "_shared_client", None)
+    yield
+    if http_client._shared_client is not None:
+        http_client._shared_client.close()
@@ -0,0 +1,52 @@
+"""Enregistrement en masse : manifeste et remplacement des personnes modifiées"""
+import numpy as np
+import pytest
+
+pytest.importorskip("face_recognition")
+
+from src.bulk_enroll import (STATUS_ENROLLED, STATUS_ERROR, EnrollmentManifest,
+                             replace_people)
+from src.gallery_store import ENCODING_SIZE, GalleryStore
+
+
+@pytest.fixture
+def photos(tmp_path):
+    images = []
+    for person in ("alice", "bob"):
+        (tmp_path / "photos" / person).mkdir(parents=True)
+        for index in range(2):
+            path = tmp_path / "photos" / person / f"{index}.jpg"
+            path.write_bytes(b"jpeg")
+            images.append((person, path))
+    return images
+
+
+def test_errors_are_not_recorded(tmp_path, photos):
+    manifest = EnrollmentManifest(tmp_path / "manifest.json")
+    manifest.record(photos[0][1], "alice", STATUS_ERROR)
+    manifest.record(photos[1][1], "alice", STATUS_ENROLLED)
+
+    assert not manifest.is_done(photos[0][1])
+    assert manifest.is_done(photos[1][1])
+
+
+def test_modified_photo_replaces_the_person(tmp_path, photos):
+    store = GalleryStore(tmp_path / "faces")
+    store.add_many([(person, [np.zeros(ENCODING_SIZE, dtype=np.float32)] * 2, None)
+                    for person in ("alice", "bob")])
+
+    manifest = EnrollmentManifest(tmp_path / "manifest.json")
+    for person, path in photos:
+        manifest.record(path, person, STATUS_ENROLLED)
+
+    photos[0][1].write_bytes(b"modified jpeg")
+    stale = {person for person, path in photos if manifest.is_stale(path)}
+    assert stale == {"alice"}
+
+    replace_people(store, manifest, photos, stale)
+
+    # Anciennes lignes retirées ; toutes les photos d'alice à ré-encoder, même après relecture
+    assert store.load()[2] == ["bob"]
+    reloaded = EnrollmentManifest(tmp_path / "manifest.json")
+    assert [reloaded.is_stale(path) for _, path in photos] == [True, True, False, False]
+    assert reloaded.is_done(photos[2][1])
@@ -0,0 +1,61 @@
+"""Supervision des caméras : configuration et résultats jetés hors reconnaissance"""
+import numpy as np
+import pytest
+
+pytest.importorskip("face_recognition")
+
+from conftest import DictConfig
+from src.camera_supervisor import Camera, CameraSupervisor
+from src.face_pipeline import FacePipeline
+from src.face_tracker import FaceTracker
+
+
+class StubGrabber:
+    """Une nouvelle frame à chaque lecture"""
+
+    def __init__(self):
+        self.source = "stub"
+        self.sequence = 0
+        self.frame_event = None
+
+    def read(self):
+        self.sequence += 1
+        return self.sequence, np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+class StubPool:
+    """Rend une fois les résultats préparés, puis plus rien"""
+
+    def __init__(self, items):
+        self.items = items
+        self.collects = 0
+
+    def submit(self, frame, frame_index, params, extra=None, client=None):
+        return True
+
+    def collect(self, timeout=0.0, client=None):
+        self.collects += 1
+        items, self.items = self.items, []
+        return items
+
+
+def test_model_comes_from_the_recognition_section():
+    config = DictConfig({"recognition": {"model": "cnn"}})
+    supervisor = CameraSupervisor.from_config(config, matcher=lambda: None)
+    assert supervisor.default.pipeline.model == "cnn"
+
+
+def test_results_are_discarded_while_recognition_is_off():
+    stale = {"frame_index": 1, "locations": [(100, 200, 200, 100)], "scan": "full",
+             "encodings": [np.zeros(128)], "duration": 0.01, "latency": 0.01, "extra": 0.0}
+    pool = StubPool([stale])
+    camera = Camera("0", StubGrabber(), FacePipeline(FaceTracker(), pool=pool))
+    supervisor = CameraSupervisor([camera], matcher=lambda: None, pool=pool)
+
+    supervisor._cycle()
+    assert pool.collects == 1 and pool.items == []
+
+    # Reprise : le résultat d'avant la désactivation n'est pas appliqué
+    supervisor.active = True
+    supervisor._cycle()
+    assert camera.face_data == []
@@ -0,0 +1,41 @@
+"""Pipeline de reconnaissance : résultats dessinés entre deux détections"""
+import pytest
+
+pytest.importorskip("face_recognition")
+
+from src.face_pipeline import FacePipeline
+from src.face_tracker import FaceTracker
+
+ALICE = (100, 200, 200, 100)
+BOB = (100, 500, 200, 400)
+
+
+def test_annotations_skip_tracks_without_identity():
+    pipeline = FacePipeline(FaceTracker())
+
+    pending = pipeline._track(0, [ALICE, BOB], "full", now=0.0)
+    # Encodage en cours : aucune piste n'a encore d'identité
+    assert pipeline.annotations(1, []) == []
+
+    # Visage de Bob sauté (pas d'encoding) : il attend la détection suivante
+    results = pipeline._complete(pending, [{"name": "alice", "confidence": 0.9}, None])
+
+    assert [r["name"] for r in results] == ["alice"]
+    assert [(a["name"], a["location"]) for a in pipeline.annotations(1, results)] == [("alice", ALICE)]
+
+
+def test_annotations_read_the_published_tracks_only():
+    pipeline = FacePipeline(FaceTracker())
+    pending = pipeline._track(0, [ALICE], "full", now=0.0)
+    pipeline._complete(pending, [{"name": "alice", "confidence": 0.9}])
+
+    # Frame suivante en cours (thread de reconnaissance) : le dessin garde l'état publié
+    moved = (100, 220, 200, 120)
+    pending = pipeline._track(1, [moved], "full", now=0.1)
+    assert [a["location"] for a in pipeline.annotations(1, [])] == [ALICE]
+
+    pipeline._complete(pending, [])
+    assert [a["location"] for a in pipeline.annotations(1, [])] == [moved]
+
+    pipeline.reset()
+    assert pipeline.annotations(2, []) == []
@@ -0,0 +1,76 @@
+"""Suivi des visages : association, extrapolation et planification des encodages"""
+from conftest import DictConfig
+from src.face_tracker import FaceTracker, box_iou
+
+MATCH = {"name": "alice", "confidence": 0.9}
+
+
+def test_box_iou():
+    assert box_iou((0, 10, 10, 0), (0, 10, 10, 0)) == 1.0
+    assert box_iou((0, 10, 10, 0), (20, 30, 30, 20)) == 0.0
+    assert abs(box_iou((0, 10, 10, 0), (0, 15, 10, 5)) - 1 / 3) < 1e-9
+
+
+def test_identity_is_kept_until_reverification():
+    tracker = FaceTracker(reverify_interval=2.0)
+
+    [track] = tracker.update([(100, 200, 200, 100)], frame_index=0, now=0.0)
+    tracker.identify(track, MATCH, now=0.0)
+
+    # Même visage, légèrement déplacé : même piste, pas de nouvel encodage
+    assert tracker.update([(104, 204, 204, 104)], frame_index=1, now=1.0) == []
+    assert tracker.visible_tracks() == [track]
+    assert track.name == "alice"
+
+    # Échéance de re-vérification : la piste est à nouveau encodée
+    assert tracker.update([(108, 208, 208, 108)], frame_index=2, now=2.5) == [track]
+    assert tracker.stats == {"tracks": 1, "encoded": 2, "reused": 1}
+
+
+def test_new_face_gets_a_new_track():
+    tracker = FaceTracker()
+    [first] = tracker.update([(100, 200, 200, 100)], frame_index=0, now=0.0)
+    tracker.identify(first, MATCH, now=0.0)
+
+    to_encode = tracker.update([(100, 200, 200, 100), (100, 500, 200, 400)], frame_index=1, now=0.5)
+
+    assert len(to_encode) == 1
+    assert to_encode[0] is not first and not to_encode[0].identified
+    assert len(tracker.visible_tracks()) == 2
+
+
+def test_lost_track_is_dropped_after_max_missed():
+    tracker = FaceTracker(max_missed=2)
+    [track] = tracker.update([(100, 200, 200, 100)], frame_index=0, now=0.0)
+
+    tracker.update([], frame_index=1, now=0.1)
+    tracker.update([], frame_index=2, now=0.2)
+    assert tracker.tracks == [track] and tracker.visible_tracks() == []
+
+    tracker.update([], frame_index=3, now=0.3)
+    assert tracker.tracks == []
+
+
+def test_prediction_follows_velocity():
+    tracker = FaceTracker()
+    [track] = tracker.update([(100, 200, 200, 100)], frame_index=0, now=0.0)
+    tracker.update([(100, 220, 200, 120)], frame_index=2, now=0.1)
+
+    # Vitesse lissée : 5 px/frame vers la droite
+    assert track.predict(4) == (100, 230, 200, 130)
+    assert track.predict(2) == track.box
+
+
+def test_fast_face_is_matched_by_center_distance():
+    tracker = FaceTracker(iou_threshold=0.9)
+    [track] = tracker.update([(100, 200, 200, 100)], frame_index=0, now=0.0)
+
+    tracker.update([(110, 230, 210, 130)], frame_index=1, now=0.1)
+
+    assert tracker.tracks == [track]
+
+
+def test_tracking_can_be_disabled():
+    assert FaceTracker.from_config(DictConfig({"recognition": {"tracking": {"enabled": False}}})) is None
+    tracker = FaceTracker.from_config(DictConfig({"recognition": {"tracking": {"max_missed": 5}}}))
+    assert tracker.max_missed == 5 and tracker.iou_threshold == 0.3
@@ -0,0 +1,30 @@
+"""Thread de capture : frames publiées et historique des captures"""
+import cv2
+import numpy as np
+
+from conftest import wait_until
+from src.frame_grabber import FrameGrabber
+
+
+def write_video(path, frames=20, width=64, height=48):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 25, (width, height))
+    for index in range(frames):
+        writer.write(np.full((height, width, 3), index * 10, dtype=np.uint8))
+    writer.release()
+
+
+def test_history_keeps_the_last_frames(tmp_path):
+    video = tmp_path / "clip.avi"
+    write_video(video)
+    grabber = FrameGrabber(str(video), history=5, reconnect_delay=60).start()
+
+    try:
+        wait_until(lambda: grabber.sequence >= 20)
+    finally:
+        grabber.stop()
+
+    sequence, frame = grabber.read()
+    assert grabber.frame_at(sequence) is frame
+    assert grabber.frame_at(sequence - 4) is not None
+    assert grabber.frame_at(sequence - 5) is None
+    assert not frame.flags.writeable
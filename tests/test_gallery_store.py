@@ -0,0 +1,120 @@
+"""Galerie binaire : ajouts, suppression, rechargement incrémental"""
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import wait_until
+from src import gallery_store
+from src.gallery_store import ENCODING_SIZE, GalleryStore
+
+
+def encodings(value, count=2):
+    return [np.full(ENCODING_SIZE, value, dtype=np.float32) for _ in range(count)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return GalleryStore(tmp_path / "faces")
+
+
+def test_empty_gallery(store):
+    encodings_, labels, names, meta = store.load()
+    assert encodings_.shape == (0, ENCODING_SIZE)
+    assert len(labels) == 0 and names == [] and meta["count"] == 0
+
+
+def test_add_and_load(store):
+    assert store.add_person("alice", encodings(0.1)) == 2
+    assert store.add_many([("bob", encodings(0.2, 3), None), ("alice", encodings(0.3, 1), None)]) == 6
+
+    loaded, labels, names, meta = store.load()
+
+    assert names == ["alice", "bob"]
+    assert labels.tolist() == [0, 0, 1, 1, 1, 0]
+    assert np.allclose(loaded[:, 0], [0.1, 0.1, 0.2, 0.2, 0.2, 0.3])
+    assert [e["start"] for e in meta["people"][0]["enrollments"]] == [0, 5]
+
+
+def test_remove_person_compacts_rows_and_labels(store):
+    store.add_many([("alice", encodings(0.1), None), ("bob", encodings(0.2), None),
+                    ("carol", encodings(0.3), None)])
+    generation = store.read_meta()["generation"]
+
+    assert store.remove_person("bob")
+    assert not store.remove_person("bob")
+
+    loaded, labels, names, meta = store.load()
+    assert names == ["alice", "carol"]
+    assert labels.tolist() == [0, 0, 1, 1]
+    assert np.allclose(loaded[:, 0], [0.1, 0.1, 0.3, 0.3])
+    assert meta["people"][1]["enrollments"][0]["start"] == 2
+    assert meta["generation"] != generation
+
+
+def test_remove_people_compacts_once(store):
+    store.add_many([("alice", encodings(0.1), None), ("bob", encodings(0.2), None),
+                    ("carol", encodings(0.3), None), ("dave", encodings(0.4), None)])
+
+    assert store.remove_people(["alice", "carol", "eve"]) == ["alice", "carol"]
+
+    loaded, labels, names, meta = store.load()
+    assert names == ["bob", "dave"]
+    assert labels.tolist() == [0, 0, 1, 1]
+    assert np.allclose(loaded[:, 0], [0.2, 0.2, 0.4, 0.4])
+    assert [person["enrollments"][0]["start"] for person in meta["people"]] == [0, 2]
+
+
+def test_snapshot_reload_is_incremental(store):
+    store.add_person("alice", encodings(0.1))
+    first = store.snapshot()
+
+    # Rien n'a changé : même snapshot
+    assert store.snapshot(previous=first) is first
+
+    store.add_person("bob", encodings(0.2))
+    second = store.snapshot(previous=first)
+    assert second.count == 4 and second.delta_start == 2
+
+    # Compaction : nouvelle génération, rechargement complet
+    store.remove_person("alice")
+    third = store.snapshot(previous=second)
+    assert third.names == ("bob",) and third.delta_start == 0
+
+
+def test_interrupted_append_is_ignored(store):
+    store.add_person("alice", encodings(0.1))
+    with open(store.encodings_file, "ab") as f:
+        f.write(b"\0" * 100)
+
+    assert store.load()[0].shape == (2, ENCODING_SIZE)
+    assert store.add_person("bob", encodings(0.2)) == 4
+    assert np.allclose(store.load()[0][:, 0], [0.1, 0.1, 0.2, 0.2])
+
+
+def test_snapshot_during_compaction_is_consistent(store, monkeypatch):
+    store.add_many([("alice", encodings(0.1, 4), None), ("bob", encodings(0.2, 4), None)])
+    old_size = store.encodings_file.stat().st_size
+
+    # gallery.json écrit en retard : les fichiers de données sont déjà remplacés
+    release = threading.Event()
+    write_meta = store._write_meta
+
+    def slow_write_meta(meta):
+        release.wait(5.0)
+        write_meta(meta)
+
+    monkeypatch.setattr(store, "_write_meta", slow_write_meta)
+    monkeypatch.setattr(gallery_store, "LOAD_RETRY_DELAY", 0.01)
+
+    remover = threading.Thread(target=store.remove_person, args=("alice",))
+    remover.start()
+    wait_until(lambda: store.encodings_file.stat().st_size < old_size)
+
+    threading.Timer(0.2, release.set).start()
+    snapshot = store.snapshot()
+    remover.join()
+
+    assert snapshot.names == ("bob",)
+    assert snapshot.count == 4 and len(snapshot.labels) == 4
+    assert np.allclose(snapshot.encodings[:, 0], 0.2)
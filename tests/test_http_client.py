@@ -0,0 +1,72 @@
+"""Réutilisation des connexions du client HTTP partagé"""
+from datetime import datetime
+
+from conftest import DictConfig
+from src.http_client import get_http_client
+from src.home_assistant_integration import HomeAssistantIntegration
+from src.notifications import NotificationManager
+
+
+def test_shared_client_reuses_connection(stub_server, shared_http):
+    client = get_http_client()
+
+    for i in range(5):
+        response = client.post(f"{stub_server.url}/hook/{i}", json={"i": i})
+        assert response.status_code == 204
+
+    assert len(stub_server.requests) == 5
+    assert stub_server.connections == 1
+
+
+def test_shared_client_applies_configured_timeouts(shared_http):
+    client = get_http_client(DictConfig({"http": {"connect_timeout": 1.5, "read_timeout": 4}}))
+
+    assert client.default_timeout == (1.5, 4)
+    assert get_http_client() is client
+
+
+def test_discord_notifications_reuse_connection(stub_server, shared_http):
+    config = DictConfig({
+        "notifications": {"discord": {"webhook_url": f"{stub_server.url}/webhook", "send_image": False}}
+    })
+    manager = NotificationManager(config)
+
+    try:
+        now = datetime.now()
+        assert manager._send_discord_arrival("alice", {"confidence": 0.9, "frame": None, "timestamp": now})
+        assert manager._send_discord_arrival("bob", {"confidence": 0.8, "frame": None, "timestamp": now})
+        manager._send_discord_departure("alice", {"departure_time": now, "duration": 42})
+    finally:
+        manager.dispatcher.stop()
+
+    assert [path for _, path, _ in stub_server.requests] == ["/webhook"] * 3
+    assert stub_server.connections == 1
+
+
+def test_home_assistant_actions_reuse_connection(stub_server, shared_http):
+    stub_server.status = 200
+    # Un groupe par action : appels successifs, une seule connexion suffit
+    actions = [
+        {"service": "light.turn_on", "entity_id": "light.entree", "group": 0},
+        {"service": "switch.turn_on", "entity_id": "switch.porte", "group": 1},
+        {"service": "light.turn_off", "entity_id": "light.garage", "group": 2}
+    ]
+    config = DictConfig({
+        "home_assistant": {
+            "enabled": True,
+            "url": stub_server.url,
+            "token": "secret",
+            "actions": {"on_arrival": actions}
+        }
+    })
+    integration = HomeAssistantIntegration(config)
+
+    assert integration.test_connection()
+    report = integration.execute_actions("on_arrival", "alice")
+    integration.executor.shutdown()
+
+    assert report["success"]
+    assert [path for _, path, _ in stub_server.requests] == [
+        "/api/", "/api/services/light/turn_on", "/api/services/switch/turn_on", "/api/services/light/turn_off"
+    ]
+    assert stub_server.connections == 1
@@ -0,0 +1,123 @@
+"""File d'envoi : regroupement, relances et file pleine"""
+import threading
+import time
+
+import pytest
+
+from conftest import wait_until
+from src.notification_dispatcher import NotificationDispatcher
+
+
+@pytest.fixture
+def blocked_dispatcher():
+    """Dispatcher à un worker, occupé par une tâche bloquante jusqu'à release.set()"""
+    dispatcher = NotificationDispatcher({"workers": 1, "backoff": 0.01, "max_backoff": 0.05})
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5.0)
+
+    dispatcher.submit("discord", block)
+    assert started.wait(5.0)
+    yield dispatcher, release
+    release.set()
+    dispatcher.stop()
+
+
+def test_pending_task_with_same_key_is_replaced(blocked_dispatcher):
+    dispatcher, release = blocked_dispatcher
+    sent = []
+
+    dispatcher.submit("discord", sent.append, "premier", key=("discord", "alice"))
+    dispatcher.submit("discord", sent.append, "second", key=("discord", "alice"))
+    dispatcher.submit("discord", sent.append, "bob", key=("discord", "bob"))
+    assert dispatcher.depth == 2
+
+    release.set()
+    wait_until(lambda: dispatcher.depth == 0 and dispatcher.stats["sent"] == 3)
+
+    assert sorted(sent) == ["bob", "second"]
+    assert dispatcher.stats["coalesced"] == 1
+
+
+def test_failed_task_is_retried_until_success():
+    dispatcher = NotificationDispatcher({"workers": 1, "backoff": 0.01, "retries": {"discord": 3}})
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        return len(attempts) >= 3
+
+    try:
+        dispatcher.submit("discord", flaky)
+        wait_until(lambda: dispatcher.stats["sent"] == 1)
+    finally:
+        dispatcher.stop()
+
+    assert len(attempts) == 3
+    assert dispatcher.stats["failed"] == 0
+    # Backoff exponentiel : 0,01 s puis 0,02 s
+    assert attempts[2] - attempts[1] >= attempts[1] - attempts[0] >= 0.01
+
+
+def test_retries_are_bounded_per_destination():
+    dispatcher = NotificationDispatcher({"workers": 1, "backoff": 0.01, "retries": {"discord": 2}})
+    calls = {"discord": 0, "home_assistant": 0}
+
+    def fail(destination):
+        calls[destination] += 1
+        return False
+
+    try:
+        dispatcher.submit("discord", fail, "discord")
+        dispatcher.submit("home_assistant", fail, "home_assistant")
+        wait_until(lambda: dispatcher.stats["failed"] == 2)
+    finally:
+        dispatcher.stop()
+
+    # Discord : 1 envoi + 2 relances ; Home Assistant : jamais relancé (TTS)
+    assert calls == {"discord": 3, "home_assistant": 1}
+
+
+def test_exception_counts_as_failure():
+    dispatcher = NotificationDispatcher({"workers": 1, "retries": {"discord": 0}})
+
+    def boom():
+        raise RuntimeError("réseau")
+
+    try:
+        dispatcher.submit("discord", boom)
+        wait_until(lambda: dispatcher.stats["failed"] == 1)
+    finally:
+        dispatcher.stop()
+
+
+def test_full_queue_drops_oldest(blocked_dispatcher):
+    dispatcher, release = blocked_dispatcher
+    dispatcher.settings["max_queue"] = 2
+    sent = []
+
+    for i in range(4):
+        assert dispatcher.submit("discord", sent.append, i)
+
+    release.set()
+    wait_until(lambda: dispatcher.depth == 0 and len(sent) == 2)
+
+    assert sent == [2, 3]
+    assert dispatcher.stats["dropped"] == 2
+
+
+def test_full_queue_drop_new_policy(blocked_dispatcher):
+    dispatcher, release = blocked_dispatcher
+    dispatcher.settings.update({"max_queue": 2, "policy": "drop_new"})
+    sent = []
+
+    results = [dispatcher.submit("discord", sent.append, i) for i in range(4)]
+
+    release.set()
+    wait_until(lambda: dispatcher.depth == 0 and len(sent) == 2)
+
+    assert results == [True, True, False, False]
+    assert sent == [0, 1]
@@ -0,0 +1,40 @@
+"""Suivi de présence : arrivées et captures jointes"""
+import logging
+
+import numpy as np
+
+from conftest import DictConfig
+from src.notifications import Detection, NotificationManager
+
+
+def make_manager():
+    manager = NotificationManager(DictConfig())
+    manager.dispatcher.stop()
+    return manager
+
+
+def test_arrival_carries_frame_from_history():
+    manager = make_manager()
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    events = manager.update_presence([Detection("alice", 0.9, (0, 2, 2, 0), 7)], {7: frame}.get)
+
+    assert [(e["type"], e["name"]) for e in events] == [("arrival", "alice")]
+    assert events[0]["data"]["frame"] is frame
+    # Déjà présente : pas de nouvelle arrivée
+    assert manager.update_presence([Detection("alice", 0.9, (0, 2, 2, 0), 8)], {}.get) == []
+
+
+def test_missing_frame_is_logged(caplog):
+    manager = make_manager()
+
+    with caplog.at_level(logging.WARNING, logger="src.notifications"):
+        events = manager.update_presence([Detection("alice", 0.9, (0, 2, 2, 0), 3)], {}.get)
+
+    assert events[0]["data"]["frame"] is None
+    assert "Frame 3" in caplog.text
+
+
+def test_unknown_faces_are_ignored():
+    manager = make_manager()
+    assert manager.update_presence([Detection("Inconnu", 0.0, (0, 2, 2, 0), 1)]) == []
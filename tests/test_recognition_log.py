@@ -0,0 +1,116 @@
+"""Journal des reconnaissances : écriture par lots, file bornée, rotation, reprise des CSV"""
+import os
+import threading
+import time
+
+from conftest import DictConfig, wait_until
+from src.recognition_log import CSV_HEADER, CsvSink, RecognitionLogWriter
+
+
+class RecordingSink:
+    """Destination en mémoire : garde chaque lot reçu"""
+
+    def __init__(self, block=None):
+        self.batches = []
+        self.closed = False
+        self.block = block
+
+    def write(self, rows):
+        if self.block is not None:
+            self.block.wait(5.0)
+        self.batches.append(list(rows))
+
+    def close(self):
+        self.closed = True
+
+
+def test_full_batch_is_written_without_waiting_for_interval():
+    sink = RecordingSink()
+    writer = RecognitionLogWriter({"batch_size": 3, "flush_interval": 60}, sinks=[sink])
+
+    for i in range(3):
+        writer.log("alice", 0.9, timestamp=f"t{i}")
+    wait_until(lambda: writer.stats["batches"] == 1)
+
+    # Lot incomplet : gardé en mémoire jusqu'au flush
+    writer.log("bob", 0.8, timestamp="t3")
+    time.sleep(0.1)
+    assert writer.depth == 1
+
+    writer.flush()
+    writer.close()
+
+    assert [[row[0] for row in batch] for batch in sink.batches] == [["t0", "t1", "t2"], ["t3"]]
+    assert writer.stats == {"written": 4, "dropped": 0, "batches": 2}
+
+
+def test_close_flushes_pending_rows():
+    sink = RecordingSink()
+    writer = RecognitionLogWriter({"batch_size": 100, "flush_interval": 60}, sinks=[sink])
+
+    writer.log("alice", 0.9)
+    writer.log("bob", 0.8)
+    writer.close()
+
+    assert [row[1] for batch in sink.batches for row in batch] == ["alice", "bob"]
+    assert sink.closed
+    # Après fermeture, plus rien n'est accepté
+    writer.log("carol", 0.7)
+    assert writer.depth == 0
+
+
+def test_full_queue_drops_oldest_rows():
+    release = threading.Event()
+    sink = RecordingSink(block=release)
+    writer = RecognitionLogWriter({"batch_size": 1, "flush_interval": 60, "max_queue": 2}, sinks=[sink])
+
+    # Le premier lot occupe le thread d'écriture ; la file ne garde que les 2 dernières lignes
+    writer.log("first", 0.9, timestamp="t0")
+    writer.flush(timeout=0.2)
+    for i in range(1, 5):
+        writer.log("alice", 0.9, timestamp=f"t{i}")
+
+    release.set()
+    writer.close()
+
+    written = [row[0] for batch in sink.batches for row in batch]
+    assert written == ["t0", "t3", "t4"]
+    assert writer.stats["dropped"] == 2
+
+
+def test_csv_sink_rotates_by_size(tmp_path):
+    path = tmp_path / "recognitions.csv"
+    sink = CsvSink(path, rotate="size", max_bytes=50)
+
+    sink.write([("2025-01-01T10:00:00", "alice", 0.9)])
+    sink.write([("2025-01-01T10:00:01", "bob", 0.8)])
+    sink.write([("2025-01-01T10:00:02", "carol", 0.7)])
+    sink.close()
+
+    archives = sorted(p for p in tmp_path.iterdir() if p != path)
+    assert len(archives) == 2
+    assert path.read_text() == CSV_HEADER + "2025-01-01T10:00:02,carol,0.7000\n"
+    assert all(archive.read_text().startswith(CSV_HEADER) for archive in archives)
+
+
+def test_empty_history_is_filled_from_existing_csv(tmp_path):
+    (tmp_path / "logs").mkdir()
+    archive = tmp_path / "logs" / "recognitions_20250101.csv"
+    archive.write_text(CSV_HEADER + "2025-01-01T10:00:00,alice,0.9000\n")
+    os.utime(archive, (0, 0))
+    (tmp_path / "logs" / "recognitions.csv").write_text(
+        CSV_HEADER + "2025-01-02T10:00:00,bob, jr,0.8000\n2025-01-02T10:00:01,car")
+
+    writer = RecognitionLogWriter.from_config(DictConfig(), base_dir=tmp_path)
+    try:
+        rows = writer.history.recent(10)
+        assert [(row["name"], row["confidence"]) for row in rows] == [("bob, jr", 0.8), ("alice", 0.9)]
+    finally:
+        writer.close()
+
+    # Base déjà remplie : pas de second import
+    writer = RecognitionLogWriter.from_config(DictConfig(), base_dir=tmp_path)
+    try:
+        assert len(writer.history.recent(10)) == 2
+    finally:
+        writer.close()
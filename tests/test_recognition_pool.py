@@ -0,0 +1,97 @@
+"""Pool de processus : frames en attente, remplacement, workers morts et ordre des résultats"""
+import numpy as np
+import pytest
+
+from src.recognition_pool import RecognitionPool
+
+PARAMS = {"regions": None, "scale": 0.5, "model": "hog", "padding": 0.75, "skip_boxes": []}
+
+
+def make_frame(width=64, height=48):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def pool():
+    pool = RecognitionPool(workers=1, max_pending=3)
+    yield pool
+    pool.close()
+
+
+def test_full_pool_replaces_oldest_waiting_frame(pool):
+    camera, other = object(), object()
+
+    # Frame 0 envoyée au worker ; 1 et 2 attendent
+    assert pool.submit(make_frame(), 0, PARAMS, client=camera)
+    assert pool.submit(make_frame(), 1, PARAMS, client=other)
+    assert pool.submit(make_frame(), 2, PARAMS, client=camera)
+
+    # Pool plein : la plus ancienne frame en attente de la même caméra cède sa place
+    assert pool.submit(make_frame(), 3, PARAMS, client=camera)
+
+    assert pool.depth == 3
+    assert pool.stats["dropped"] == 1
+    assert [pool._pending[job][1] for job in pool._order[camera]] == [0, 3]
+    assert [pool._pending[job][1] for job in pool._order[other]] == [1]
+
+    # Client sans frame en attente : la plus ancienne, toutes caméras confondues
+    third = object()
+    assert pool.submit(make_frame(), 4, PARAMS, client=third)
+    assert list(pool._order[other]) == []
+    assert [pool._pending[job][1] for job in pool._order[third]] == [4]
+    assert pool.stats["dropped"] == 2
+
+
+def test_frame_is_dropped_when_every_pending_frame_is_running():
+    pool = RecognitionPool(workers=2, max_pending=2)
+    try:
+        assert pool.submit(make_frame(), 0, PARAMS)
+        assert pool.submit(make_frame(), 1, PARAMS)
+        assert not pool.submit(make_frame(), 2, PARAMS)
+        assert pool.stats["dropped"] == 1 and pool.depth == 2
+    finally:
+        pool.close()
+
+
+def test_dead_worker_is_restarted_and_its_frame_failed(pool):
+    worker = pool._processes[0]
+    worker.kill()
+    worker.join(timeout=5.0)
+
+    # Frame envoyée au worker mort : rendue en erreur, worker remplacé
+    assert pool.submit(make_frame(), 0, PARAMS)
+    collected = pool.collect(timeout=1.0)
+
+    assert [item["frame_index"] for item in collected] == [0]
+    assert pool.stats["errors"] == 1 and pool.stats["restarts"] == 1
+    assert pool.depth == 0 and pool.alive
+
+    # Le nouveau worker répond (en erreur si face_recognition est absent)
+    assert pool.submit(make_frame(), 1, PARAMS)
+    collected = []
+    while not collected:
+        collected.extend(pool.collect(timeout=10.0))
+    assert collected[0]["frame_index"] == 1
+
+
+def test_results_come_back_in_order_after_frame_size_change(pool):
+    pytest.importorskip("face_recognition")
+
+    for index in range(3):
+        pool.submit(make_frame(), index, PARAMS, extra=index)
+
+    collected = []
+    while len(collected) < 3:
+        collected.extend(pool.collect(timeout=10.0))
+    assert [item["frame_index"] for item in collected] == [0, 1, 2]
+    assert [item["extra"] for item in collected] == [0, 1, 2]
+
+    # Frames plus grandes : emplacements recréés, segments des workers rattachés
+    for index in range(3, 6):
+        pool.submit(make_frame(320, 240), index, PARAMS)
+
+    collected = []
+    while len(collected) < 3:
+        collected.extend(pool.collect(timeout=10.0))
+    assert [item["frame_index"] for item in collected] == [3, 4, 5]
+    assert pool.stats["errors"] == 0